@@ -0,0 +1,55 @@
+"""Autocomplete username untuk pencarian teman.
+
+Prefix dicari dengan LIKE 'prefix%' (username_lower__startswith) pada
+Profile.username_lower, yang di PostgreSQL ber-index varchar_pattern_ops
+sehingga index terpakai tanpa bergantung pada collation database. Status
+hubungan semua kandidat diambil sekaligus: satu query set id teman dan satu
+query FriendRequest.
+"""
+from django.db.models import Q
+
+from .friend_graph import friend_ids
+from .models import FriendRequest, Profile
+
+FRIEND = 'friend'
+PENDING = 'pending'    # user sudah mengirim permintaan ke kandidat
+INCOMING = 'incoming'  # kandidat sudah mengirim permintaan ke user
+NONE = 'none'
+
+
+def prefix_filter(prefix):
+    return {'username_lower__startswith': prefix.lower()}
+
+
+def relationship_statuses(user, candidate_ids):
+    """{id kandidat: status hubungan dengan user}."""
+    friends = friend_ids(user.id)
+    statuses = {uid: FRIEND if uid in friends else NONE for uid in candidate_ids}
+    requests = FriendRequest.objects.filter(
+        Q(from_user=user, to_user_id__in=candidate_ids) | Q(from_user_id__in=candidate_ids, to_user=user)
+    ).values_list('from_user_id', 'to_user_id')
+    for from_id, to_id in requests:
+        if from_id == user.id and statuses.get(to_id) == NONE:
+            statuses[to_id] = PENDING
+        elif to_id == user.id and statuses.get(from_id) == NONE:
+            statuses[from_id] = INCOMING
+    return statuses
+
+
+def autocomplete(user, prefix, limit=10):
+    profiles = list(
+        Profile.objects.filter(**prefix_filter(prefix))
+        .exclude(user=user)
+        .select_related('user')
+        .order_by('username_lower')[:limit]
+    )
+    statuses = relationship_statuses(user, [p.user_id for p in profiles]) if profiles else {}
+    return [
+        {
+            'id': p.user_id,
+            'username': p.user.username,
+            'photo_url': p.photo_url or '/static/img/defaultprofile.png',
+            'status': statuses[p.user_id],
+        }
+        for p in profiles
+    ]
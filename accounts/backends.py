@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend yang memuat User beserta Profile dalam satu query.
+
+    Hampir semua view (is_admin, redirect login per role, dashboard, akun)
+    membaca request.user.profile; dengan select_related di sini akses itu
+    tidak lagi menambah query kedua per request.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
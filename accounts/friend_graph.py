@@ -0,0 +1,47 @@
+"""Layanan graf pertemanan.
+
+Cek "apakah A berteman dengan B" tidak perlu memuat seluruh daftar teman:
+are_friends() cukup satu query exists() ke tabel relasi Profile.friends
+(ber-index unik). Set id teman (saran teman, jumlah teman, teman bersama,
+autocomplete) diambil untuk banyak user sekaligus dalam satu query.
+
+Semua fungsi membaca database langsung. Cache per proses tidak bisa
+di-invalidate dari worker lain, sehingga setelah accept/unfriend worker
+lain akan menampilkan data lama; versi di database pun tetap butuh satu
+query per baca, sama dengan query relasinya sendiri.
+"""
+from .models import Profile
+
+Friendship = Profile.friends.through
+
+
+def _query_friend_ids(user_ids):
+    result = {user_id: set() for user_id in user_ids}
+    pairs = Friendship.objects.filter(from_profile__user_id__in=user_ids).values_list(
+        'from_profile__user_id', 'to_profile__user_id'
+    )
+    for user_id, friend_id in pairs:
+        result[user_id].add(friend_id)
+    return {user_id: frozenset(ids) for user_id, ids in result.items()}
+
+
+def friend_ids_many(user_ids):
+    """{user_id: frozenset(id teman)} untuk banyak user sekaligus (1 query)."""
+    return _query_friend_ids(set(user_ids))
+
+
+def friend_ids(user_id):
+    return friend_ids_many([user_id])[user_id]
+
+
+def are_friends(user, other):
+    if user.pk == other.pk:
+        return False
+    return Friendship.objects.filter(from_profile__user_id=user.pk, to_profile__user_id=other.pk).exists()
+
+
+def mutual_friend_counts(user_id, other_ids):
+    """{other_id: jumlah teman bersama dengan user_id}."""
+    sets = friend_ids_many([user_id, *other_ids])
+    mine = sets[user_id]
+    return {other_id: len(mine & sets[other_id]) for other_id in other_ids}
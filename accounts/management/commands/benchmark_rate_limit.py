@@ -0,0 +1,54 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from sportspace.ratelimit import get_storage, rate_limit
+
+
+def plain_view(request):
+    return HttpResponse('ok')
+
+
+limited_view = rate_limit('benchmark', '1000000/s', key='ip')(plain_view)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark overhead decorator rate_limit per request untuk setiap storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=1000, help='Jumlah IP berbeda')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['requests']):
+            request = factory.get('/', REMOTE_ADDR=f'10.{i % options["clients"] // 256}.{i % 256}.1')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        baseline = self._measure(plain_view, requests)
+        self.stdout.write(f'{len(requests)} requests, {options["clients"]} clients (median per request):')
+        self.stdout.write(f'  {"no rate limit":<14} {baseline * 1e6:7.2f} us')
+        for storage in ('LocalStorage', 'CacheStorage'):
+            with override_settings(RATE_LIMIT_STORAGE=f'sportspace.ratelimit.{storage}', RATE_LIMITS={}):
+                get_storage().clear()
+                seconds = self._measure(limited_view, requests)
+                get_storage().clear()
+            self.stdout.write(
+                f'  {storage:<14} {seconds * 1e6:7.2f} us  (+{(seconds - baseline) * 1e6:.2f} us overhead)'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark finished.'))
+
+    def _measure(self, view, requests, rounds=5):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for request in requests:
+                view(request)
+            timings.append((time.perf_counter() - start) / len(requests))
+        return statistics.median(timings)
@@ -0,0 +1,157 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from accounts.realtime import get_broker, user_channel
+from sportspace.asgi import application
+
+BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class StreamClient:
+    """Satu koneksi SSE ke aplikasi ASGI, dijalankan in-process tanpa socket."""
+
+    def __init__(self, path, cookie):
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode()), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        self.status = None
+        self.started = asyncio.Event()
+        self.received = asyncio.Queue()
+        self._request_sent = False
+        self._disconnect = asyncio.Event()
+        self.task = None
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def _send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            if body.startswith(b'retry:'):
+                self.started.set()
+            elif body.startswith(b'event: message'):
+                self.received.put_nowait(time.perf_counter())
+
+    def open(self):
+        self.task = asyncio.create_task(application(self.scope, self._receive, self._send))
+
+    async def close(self):
+        self._disconnect.set()
+        try:
+            await asyncio.wait_for(self.task, 5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.task.cancel()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test chat realtime: buka banyak koneksi SSE idle ke sportspace.asgi secara in-process, '
+        'lalu ukur memori per koneksi dan latensi pengiriman pesan. User uji dihapus di akhir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--messages', type=int, default=20, help='Pesan per user')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            [User(username=f'loadtest_{tag}_{i}', password='!') for i in range(options['users'])]
+        )
+        sessions = [self._session(user) for user in users]
+        try:
+            result = asyncio.run(self._run(users, sessions, options))
+        finally:
+            SessionStore.get_model_class().objects.filter(session_key__in=[s.session_key for s in sessions]).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        self._report(result, options)
+
+    def _session(self, user):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = BACKEND
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    async def _run(self, users, sessions, options):
+        path = reverse('accounts:chat_stream')
+        clients = []
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        for i in range(options['connections']):
+            session = sessions[i % len(sessions)]
+            client = StreamClient(path, f'sessionid={session.session_key}')
+            client.open()
+            clients.append((users[i % len(users)].pk, client))
+        await asyncio.wait_for(asyncio.gather(*(c.started.wait() for _, c in clients)), 300)
+        connect_seconds = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        # Kirim pesan dari thread lain, seperti send_chat_message di view sync
+        broker = get_broker()
+        latencies = []
+        for n in range(options['messages']):
+            sent = {}
+            for user in users:
+                sent[user.pk] = time.perf_counter()
+                await asyncio.to_thread(
+                    broker.publish, user_channel(user.pk),
+                    {'id': n, 'sender': 'loadtest', 'receiver': user.username, 'message': 'ping', 'timestamp': ''},
+                )
+            for user_id, client in clients:
+                received_at = await asyncio.wait_for(client.received.get(), 30)
+                latencies.append(received_at - sent[user_id])
+
+        subscribers = broker.subscriber_count()
+        await asyncio.gather(*(c.close() for _, c in clients))
+        return {
+            'connect_seconds': connect_seconds,
+            'memory': memory,
+            'latencies': sorted(latencies),
+            'subscribers': subscribers,
+            'statuses': {c.status for _, c in clients},
+        }
+
+    def _report(self, result, options):
+        n = options['connections']
+        latencies = result['latencies']
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(f'Connections: {n} idle SSE streams over {options["users"]} users (status {result["statuses"]})')
+        self.stdout.write(f'  open all        {result["connect_seconds"]:.2f} s')
+        self.stdout.write(f'  memory          {result["memory"] / n / 1024:.1f} KiB per connection')
+        self.stdout.write(f'  subscribers     {result["subscribers"]}')
+        self.stdout.write(
+            f'  delivery        {len(latencies)} events, '
+            f'p50 {statistics.median(latencies) * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS('Load test finished.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.profile_stats import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang statistik profil (total_booking, avg_rating) dari Booking dan Review, dijalankan tiap malam'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(batch_size=options['batch_size'])
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Fixed profile stats for {fixed} users.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Profile stats already up to date.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.suggestions import update_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Hitung ulang saran teman (teman dari teman, rekan match, venue yang sama) untuk semua user. '
+        'Jalankan terjadwal, misal tiap malam via cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        users = update_suggestions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Friend suggestions updated for {users} users.'))
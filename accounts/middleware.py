@@ -0,0 +1,52 @@
+from functools import partial
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject
+
+from .tokens import ACCESS, InvalidToken, read_token
+
+
+def _load_user(user_id):
+    user = User.objects.select_related('profile').filter(pk=user_id, is_active=True).first()
+    return user or AnonymousUser()
+
+
+async def _aload_user(request, user_id):
+    if not hasattr(request, '_token_user'):
+        user = await User.objects.select_related('profile').filter(pk=user_id, is_active=True).afirst()
+        request._token_user = user or AnonymousUser()
+    return request._token_user
+
+
+class TokenAuthenticationMiddleware:
+    """
+    Autentikasi request Flutter dengan header "Authorization: Bearer <access token>".
+
+    Jika header ada, request.user diambil dari id di token dan session tidak
+    pernah dibaca, jadi tidak ada query/UPDATE ke tabel session. Payload token
+    (uid, role) tersedia di request.token. Token yang tidak valid atau
+    kedaluwarsa dijawab 401 supaya client meminta token baru lewat refresh.
+    Request tanpa header tetap memakai session seperti biasa. request.auser()
+    (view async, misal chat_stream) juga diganti agar tidak jatuh ke session.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return self.get_response(request)
+
+        try:
+            payload = read_token(header[len('Bearer '):].strip(), ACCESS)
+        except InvalidToken as e:
+            return JsonResponse({'status': False, 'message': str(e)}, status=401)
+
+        request.token = payload
+        request.user = SimpleLazyObject(lambda: _load_user(payload['uid']))
+        request.auser = partial(_aload_user, request, payload['uid'])
+        # Header Authorization tidak dikirim otomatis oleh browser, jadi tidak rawan CSRF
+        request._dont_enforce_csrf_checks = True
+        return self.get_response(request)
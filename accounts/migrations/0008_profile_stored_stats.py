@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_profile_stats(apps, schema_editor):
+    """Isi statistik dari data yang sudah ada (lihat accounts/profile_stats.py)."""
+    Profile = apps.get_model('accounts', 'Profile')
+    Booking = apps.get_model('booking', 'Booking')
+    Review = apps.get_model('review', 'Review')
+
+    for row in Booking.objects.order_by().values('user_id').annotate(n=Count('id')):
+        Profile.objects.filter(user_id=row['user_id']).update(total_booking=row['n'])
+    for row in Review.objects.order_by().values('user_id').annotate(n=Count('id'), total=Sum('rating')):
+        total = float(row['total'] or 0)
+        Profile.objects.filter(user_id=row['user_id']).update(
+            total_review=row['n'], rating_sum=total, avg_rating=total / row['n'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_chatmessage'),
+        ('booking', '0001_initial'),
+        ('review', '0011_review_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avg_rating',
+            field=models.FloatField(default=0, help_text='Rata-rata rating pengguna'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_sum',
+            field=models.FloatField(default=0, help_text='Total nilai rating dari review yang ditulis'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='total_booking',
+            field=models.PositiveIntegerField(default=0, help_text='Jumlah booking yang pernah dilakukan'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='total_review',
+            field=models.PositiveIntegerField(default=0, help_text='Jumlah review yang pernah ditulis'),
+        ),
+        migrations.RunPython(backfill_profile_stats, migrations.RunPython.noop),
+    ]
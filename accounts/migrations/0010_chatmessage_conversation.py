@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_conversation(apps, schema_editor):
+    """Isi kunci percakapan untuk pesan lama (lihat accounts.models.conversation_key)."""
+    ChatMessage = apps.get_model('accounts', 'ChatMessage')
+    pairs = ChatMessage.objects.order_by().values_list('sender_id', 'receiver_id').distinct()
+    for sender_id, receiver_id in list(pairs):
+        low, high = sorted((sender_id, receiver_id))
+        ChatMessage.objects.filter(sender_id=sender_id, receiver_id=receiver_id).update(
+            conversation=f'{low}:{high}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_friendsuggestion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.CharField(default='', editable=False, max_length=41),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_conversation, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'id'], name='chat_conversation_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_chatmessage_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friendrequest',
+            index=models.Index(fields=['to_user', '-created_at', '-id'], name='friend_request_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
+
+
+def fill_username_lower(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    User = apps.get_model('auth', 'User')
+    usernames = User.objects.filter(pk=OuterRef('user_id')).values(lower=Lower('username'))
+    Profile.objects.update(username_lower=Subquery(usernames[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_friendrequest_inbox_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='username_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_username_lower, migrations.RunPython.noop),
+    ]
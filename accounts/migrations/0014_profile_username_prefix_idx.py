@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_revokedtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='username_lower',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['username_lower'], name='profile_username_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 class Profile(models.Model):
@@ -13,6 +13,8 @@ class Profile(models.Model):
     ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Salinan username huruf kecil untuk autocomplete berbasis index (lihat accounts/autocomplete.py)
+    username_lower = models.CharField(max_length=150, editable=False, default='')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='customer')
     phone = models.CharField(max_length=15, blank=True)
     address = models.CharField(max_length=255, blank=True)
@@ -22,26 +24,38 @@ class Profile(models.Model):
     friends = models.ManyToManyField("self", symmetrical=True, blank=True)
 
     bio = models.TextField(blank=True, default="", help_text="Deskripsi singkat tentang diri pengguna")
+    # Disimpan dan dijaga oleh signal Booking/Review (lihat accounts/profile_stats.py)
     total_booking = models.PositiveIntegerField(default=0, help_text="Jumlah booking yang pernah dilakukan")
-    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00, help_text="Rata-rata rating pengguna")
+    total_review = models.PositiveIntegerField(default=0, help_text="Jumlah review yang pernah ditulis")
+    rating_sum = models.FloatField(default=0, help_text="Total nilai rating dari review yang ditulis")
+    avg_rating = models.FloatField(default=0, help_text="Rata-rata rating pengguna")
     joined_date = models.DateField(default=timezone.now, editable=False, help_text="Tanggal pengguna bergabung")
 
+    STAT_FIELDS = ('total_booking', 'total_review', 'rating_sum', 'avg_rating')
+
+    class Meta:
+        indexes = [
+            # LIKE 'prefix%' untuk autocomplete; varchar_pattern_ops agar
+            # PostgreSQL memakai index apa pun collation-nya (opclass
+            # diabaikan di SQLite, di sana jadi index biasa)
+            models.Index(
+                fields=['username_lower'], name='profile_username_prefix_idx', opclasses=['varchar_pattern_ops']
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} ({self.role})"
-    
-     # ===== Dinamis dari model Booking dan Review =====
-    @property
-    def total_booking(self):
-        from booking.models import Booking 
-        return Booking.objects.filter(user=self.user).count()
-
-    @property
-    def avg_rating(self):
-        from review.models import Review
-        ratings = Review.objects.filter(user=self.user).values_list('rating', flat=True)
-        if ratings:
-            return round(sum(ratings) / len(ratings), 1)
-        return 0
+
+    def save(self, *args, **kwargs):
+        self.username_lower = self.user.username.lower()
+        # Statistik hanya diubah lewat update F(); jangan timpa dengan nilai lama
+        # di memori saat profil disimpan biasa (edit profil, user.save(), dll)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.STAT_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -54,6 +68,38 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     else:
         instance.profile.save()
 
+
+# ===== Statistik profil (total_booking, avg_rating) dari Booking dan Review =====
+
+@receiver(post_save, sender='booking.Booking')
+def count_booking_on_save(sender, instance, created, raw=False, **kwargs):
+    from .profile_stats import add_booking
+
+    if created and not raw:
+        add_booking(instance.user_id, 1)
+
+
+@receiver(post_delete, sender='booking.Booking')
+def count_booking_on_delete(sender, instance, **kwargs):
+    from .profile_stats import add_booking
+
+    add_booking(instance.user_id, -1)
+
+
+@receiver(post_save, sender='review.Review')
+def count_review_on_save(sender, instance, created, raw=False, **kwargs):
+    from .profile_stats import add_review
+
+    if created and not raw:
+        add_review(instance.user_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender='review.Review')
+def count_review_on_delete(sender, instance, **kwargs):
+    from .profile_stats import add_review
+
+    add_review(instance.user_id, instance.rating, -1)
+
 # FRIEND
 
 class FriendRequest(models.Model):
@@ -62,6 +108,11 @@ class FriendRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_accepted = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['to_user', '-created_at', '-id'], name='friend_request_inbox_idx'),
+        ]
+
     def accept(self):
         """Jika diterima, tambahkan ke daftar teman kedua belah pihak"""
         self.is_accepted = True
@@ -74,15 +125,55 @@ class FriendRequest(models.Model):
         return f"{self.from_user.username} → {self.to_user.username}"
     
 
+class FriendSuggestion(models.Model):
+    """Saran teman yang sudah dihitung (lihat accounts/suggestions.py)."""
+    user = models.ForeignKey(User, related_name='friend_suggestions', on_delete=models.CASCADE)
+    suggested = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+    mutual_friends = models.PositiveIntegerField(default=0)
+    shared_matches = models.PositiveIntegerField(default=0)
+    shared_venues = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [models.Index(fields=['user', '-score'], name='friend_suggestion_rank_idx')]
+
+    def __str__(self):
+        return f"{self.user.username} ⇢ {self.suggested.username} ({self.score})"
+
+
+def conversation_key(user_id, other_id):
+    """Kunci percakapan yang sama untuk kedua arah, misal (7, 3) dan (3, 7) -> "3:7"."""
+    low, high = sorted((int(user_id), int(other_id)))
+    return f"{low}:{high}"
+
+
 class ChatMessage(models.Model):
     sender = models.ForeignKey(User, related_name="sent_messages", on_delete=models.CASCADE)
     receiver = models.ForeignKey(User, related_name="received_messages", on_delete=models.CASCADE)
+    # Diisi otomatis di save(); dipakai untuk mengambil satu percakapan lewat index
+    conversation = models.CharField(max_length=41, editable=False)
     message = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [models.Index(fields=["conversation", "id"], name="chat_conversation_idx")]
+
+    def save(self, *args, **kwargs):
+        self.conversation = conversation_key(self.sender_id, self.receiver_id)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.sender.username} → {self.receiver.username}: {self.message[:30]}"
+
+
+class RevokedToken(models.Model):
+    """Denylist token Flutter yang dicabut sebelum kedaluwarsa (lihat accounts/tokens.py)."""
+    jti = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
 
     def __str__(self):
-        return f"{self.sender.username} → {self.receiver.username}: {self.message[:30]}"
\ No newline at end of file
+        return self.jti
@@ -0,0 +1,84 @@
+"""Statistik profil yang didenormalisasi: total_booking dan avg_rating.
+
+Nilainya dijaga secara inkremental oleh signal Booking/Review di
+accounts.models dengan update F(), sehingga halaman/endpoint profil cukup
+membaca kolom tanpa agregasi. Command reconcile_profile_stats (dijalankan
+tiap malam) menghitung ulang dari tabel aslinya jika ada yang meleset,
+misalnya rating review yang diubah langsung di admin.
+"""
+import math
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Profile
+
+
+def _average_expression():
+    return Case(
+        When(total_review__gt=0, then=F('rating_sum') / F('total_review')),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def add_booking(user_id, sign):
+    Profile.objects.filter(user_id=user_id).update(total_booking=F('total_booking') + sign)
+
+
+def add_review(user_id, rating, sign):
+    rating = float(rating or 0)
+    with transaction.atomic():
+        qs = Profile.objects.filter(user_id=user_id)
+        qs.update(
+            total_review=F('total_review') + sign,
+            rating_sum=F('rating_sum') + sign * rating,
+        )
+        # Update kedua agar rata-rata dihitung dari nilai yang sudah baru
+        qs.update(avg_rating=_average_expression())
+
+
+def compute_stats():
+    """Return {user_id: {...}} dihitung langsung dari Booking dan Review."""
+    from booking.models import Booking
+    from review.models import Review
+
+    stats = {}
+    for row in Booking.objects.order_by().values('user_id').annotate(n=Count('id')):
+        stats.setdefault(row['user_id'], {})['total_booking'] = row['n']
+    rows = Review.objects.order_by().values('user_id').annotate(n=Count('id'), total=Sum('rating'))
+    for row in rows:
+        stats.setdefault(row['user_id'], {}).update(total_review=row['n'], rating_sum=float(row['total'] or 0))
+    return stats
+
+
+def _differs(current, expected):
+    return not math.isclose(current, expected, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def reconcile(batch_size=500):
+    """Samakan statistik semua profil dengan isi Booking/Review.
+
+    Return jumlah profil yang nilainya diperbaiki.
+    """
+    fields = list(Profile.STAT_FIELDS)
+    stats = compute_stats()
+    fixed = []
+    for profile in Profile.objects.only('pk', 'user_id', *fields).iterator(chunk_size=batch_size):
+        row = stats.get(profile.user_id, {})
+        expected = {
+            'total_booking': row.get('total_booking', 0),
+            'total_review': row.get('total_review', 0),
+            'rating_sum': row.get('rating_sum', 0.0),
+        }
+        total = expected['total_review']
+        expected['avg_rating'] = expected['rating_sum'] / total if total else 0.0
+
+        if any(_differs(getattr(profile, f), v) for f, v in expected.items()):
+            for f, v in expected.items():
+                setattr(profile, f, v)
+            fixed.append(profile)
+
+    if fixed:
+        Profile.objects.bulk_update(fixed, fields, batch_size=batch_size)
+    return len(fixed)
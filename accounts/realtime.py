@@ -0,0 +1,114 @@
+"""Pub/sub untuk chat realtime (Server-Sent Events lewat ASGI).
+
+Setiap koneksi /accounts/chat-stream/ berlangganan channel milik user yang
+login; send_chat_message mem-publish pesan ke channel penerima (dan
+pengirim, untuk tab/perangkat lain). Stream hanya jalan di server ASGI
+(sportspace/asgi.py, misal uvicorn/daphne), bukan di worker WSGI sync.
+
+InProcessBroker hanya menjangkau koneksi di proses yang sama. Untuk
+beberapa proses/server, buat broker dengan method subscribe/publish yang
+sama di atas broker eksternal (misal Redis pub/sub) lalu set CHAT_BROKER.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'accounts.realtime.InProcessBroker'
+
+
+class Subscription:
+    def __init__(self, broker, channel, loop, max_queue):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queue)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client terlalu lambat; event dibuang, client bisa menyusul lewat ?after=
+            pass
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        """Dipanggil dari event loop (view async)."""
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        """Kirim event ke semua subscriber channel. Aman dipanggil dari thread mana pun."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+                delivered += 1
+            except RuntimeError:
+                # Event loop koneksi sudah ditutup
+                self.unsubscribe(subscription)
+        return delivered
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'CHAT_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def user_channel(user_id):
+    return f'chat:user:{user_id}'
+
+
+def chat_event(message, sender_username, receiver_username):
+    return {
+        'id': message.id,
+        'sender': sender_username,
+        'receiver': receiver_username,
+        'message': message.message,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+
+def publish_chat_message(message, sender_username, receiver_username):
+    event = chat_event(message, sender_username, receiver_username)
+    broker = get_broker()
+    for user_id in {message.receiver_id, message.sender_id}:
+        broker.publish(user_channel(user_id), event)
@@ -0,0 +1,177 @@
+"""Saran teman (friend suggestion).
+
+Dihitung di background oleh command update_friend_suggestions (jalankan
+terjadwal, misal tiap malam via cron) dan disimpan di FriendSuggestion.
+Skor kandidat untuk seorang user:
+
+    score = MUTUAL_WEIGHT * teman_bersama
+          + MATCH_WEIGHT * match_yang_dimainkan_bersama
+          + VENUE_WEIGHT * venue_yang_sama_sama_dibooking
+
+Endpoint cukup membaca baris yang sudah dihitung. Jika kurang (misal user
+baru), sisanya diisi sampel acak yang diambil dari posisi id acak di index,
+bukan ORDER BY RANDOM() atas seluruh tabel Profile.
+"""
+import random
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+
+from .friend_graph import friend_ids
+from .models import FriendRequest, FriendSuggestion, Profile
+
+MUTUAL_WEIGHT = 3
+MATCH_WEIGHT = 2
+VENUE_WEIGHT = 1
+MAX_STORED = 50
+# Venue dengan pemesan sebanyak ini terlalu umum untuk jadi sinyal kedekatan
+MAX_VENUE_USERS = 200
+
+
+# ===== Perhitungan (background job) =====
+
+def friend_graph():
+    """{user_id: set(user_id teman)} dari tabel relasi Profile.friends."""
+    profile_user = dict(Profile.objects.values_list('id', 'user_id'))
+    graph = defaultdict(set)
+    pairs = Profile.friends.through.objects.values_list('from_profile_id', 'to_profile_id')
+    for a, b in pairs.iterator():
+        graph[profile_user[a]].add(profile_user[b])
+    return graph
+
+
+def _co_occurrence(groups, max_size=None):
+    """{user: Counter(user lain: jumlah grup yang sama)} dari {grup: set(user)}."""
+    counts = defaultdict(Counter)
+    for members in groups.values():
+        if len(members) < 2 or (max_size and len(members) > max_size):
+            continue
+        for user_id in members:
+            counts[user_id].update(members - {user_id})
+    return counts
+
+
+def co_players():
+    from matchmaking.models import Match
+
+    groups = defaultdict(set)
+    for match_id, user_id in Match.players.through.objects.values_list('match_id', 'user_id').iterator():
+        groups[match_id].add(user_id)
+    for match_id, user_id in Match.objects.values_list('id', 'created_by_id').iterator():
+        groups[match_id].add(user_id)
+    return _co_occurrence(groups)
+
+
+def co_bookers():
+    from booking.models import Booking
+
+    groups = defaultdict(set)
+    pairs = Booking.objects.order_by().values_list('venue_id', 'user_id').distinct()
+    for venue_id, user_id in pairs.iterator():
+        groups[venue_id].add(user_id)
+    return _co_occurrence(groups, max_size=MAX_VENUE_USERS)
+
+
+def pending_pairs():
+    pairs = set()
+    for a, b in FriendRequest.objects.filter(is_accepted=False).values_list('from_user_id', 'to_user_id'):
+        pairs.add((a, b))
+        pairs.add((b, a))
+    return pairs
+
+
+def rank_candidates(user_id, graph, players, bookers, customers, pending):
+    """List (score, kandidat, teman_bersama, match_bersama, venue_bersama), terbaik dulu."""
+    mutual = Counter()
+    for friend_id in graph.get(user_id, ()):
+        mutual.update(graph.get(friend_id, ()))
+    shared_matches = players.get(user_id, Counter())
+    shared_venues = bookers.get(user_id, Counter())
+
+    candidates = (set(mutual) | set(shared_matches) | set(shared_venues)) & customers
+    candidates -= graph.get(user_id, set()) | {user_id}
+
+    rows = []
+    for candidate in candidates:
+        if (user_id, candidate) in pending:
+            continue
+        m, p, v = mutual[candidate], shared_matches[candidate], shared_venues[candidate]
+        score = MUTUAL_WEIGHT * m + MATCH_WEIGHT * p + VENUE_WEIGHT * v
+        rows.append((score, candidate, m, p, v))
+    rows.sort(key=lambda row: (-row[0], row[1]))
+    return rows[:MAX_STORED]
+
+
+def update_suggestions(batch_size=500):
+    """Hitung ulang saran teman semua user. Return jumlah user yang diproses."""
+    graph = friend_graph()
+    players = co_players()
+    bookers = co_bookers()
+    pending = pending_pairs()
+    customers = set(Profile.objects.filter(role='customer').values_list('user_id', flat=True))
+
+    user_ids = list(Profile.objects.order_by('user_id').values_list('user_id', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        rows = [
+            FriendSuggestion(
+                user_id=user_id, suggested_id=candidate, score=score,
+                mutual_friends=m, shared_matches=p, shared_venues=v,
+            )
+            for user_id in batch
+            for score, candidate, m, p, v in rank_candidates(user_id, graph, players, bookers, customers, pending)
+        ]
+        with transaction.atomic():
+            FriendSuggestion.objects.filter(user_id__in=batch).delete()
+            FriendSuggestion.objects.bulk_create(rows, batch_size=batch_size)
+    return len(user_ids)
+
+
+# ===== Penyajian (request) =====
+
+def random_profiles(count, exclude_user_ids):
+    """Sampel acak Profile customer mulai dari id acak (dua query range ber-index)."""
+    # MIN/MAX id tanpa filter cukup dibaca dari ujung index primary key
+    bounds = Profile.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['high'] is None:
+        return []
+    pivot = random.randint(bounds['low'], bounds['high'])
+    customers = (
+        Profile.objects.filter(role='customer')
+        .exclude(user_id__in=exclude_user_ids)
+        .select_related('user')
+        .order_by('id')
+    )
+    picked = list(customers.filter(id__gte=pivot)[:count])
+    if len(picked) < count:
+        picked += list(customers.filter(id__lt=pivot)[:count - len(picked)])
+    random.shuffle(picked)
+    return picked
+
+
+def suggestions_for(user, limit=15):
+    """List Profile yang disarankan untuk user, campuran hasil ranking dan acak.
+
+    Diambil acak dari 2 * limit saran teratas supaya tombol refresh tetap
+    menampilkan variasi, lalu diurutkan lagi berdasarkan skor.
+    """
+    excluded = set(friend_ids(user.id)) | {user.id}
+    pending = FriendRequest.objects.filter(is_accepted=False).filter(Q(from_user=user) | Q(to_user=user))
+    excluded |= {uid for pair in pending.values_list('from_user_id', 'to_user_id') for uid in pair}
+
+    pool = [
+        row for row in (
+            FriendSuggestion.objects.filter(user=user)
+            .select_related('suggested__profile')
+            .order_by('-score')[:limit * 2 + len(excluded)]
+        )
+        if row.suggested_id not in excluded
+    ][:limit * 2]
+    picked = sorted(random.sample(pool, min(limit, len(pool))), key=lambda row: -row.score)
+    profiles = [row.suggested.profile for row in picked]
+
+    if len(profiles) < limit:
+        excluded |= {row.suggested_id for row in picked}
+        profiles += random_profiles(limit - len(profiles), excluded)
+    return profiles
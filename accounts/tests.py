@@ -2,6 +2,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from accounts.models import Profile
+from accounts.autocomplete import prefix_filter
 
 
 class AccountsViewsTests(TestCase):
@@ -435,3 +436,889 @@ class FriendSystemTests(TestCase):
         for s in data["suggestions"]:
             self.assertNotEqual(s["username"], "alice")
             self.assertNotEqual(s["username"], "bob")
+
+
+import datetime
+from io import StringIO
+from django.core.management import call_command
+from booking.models import Booking, Venue
+from home.models import LapanganPadel
+from review.models import Review
+
+
+class ProfileStoredStatsTests(TestCase):
+    """total_booking dan avg_rating disimpan di Profile dan dijaga oleh signal."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='taka', password='Cukurukuk123!')
+        self.venue = Venue.objects.create(name='Padel A', location='Jakarta', address='Jl. A')
+        self.lapangan = LapanganPadel.objects.create(place_id='stat1', nama='Padel A', alamat='Jl. A')
+        self.lapangan2 = LapanganPadel.objects.create(place_id='stat2', nama='Padel B', alamat='Jl. B')
+
+    def _booking(self, hour):
+        return Booking.objects.create(
+            user=self.user, venue=self.venue, booking_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(hour), end_time=datetime.time(hour + 1),
+            customer_name='Taka', customer_email='taka@example.com', customer_phone='0812',
+        )
+
+    def _profile(self):
+        return Profile.objects.get(user=self.user)
+
+    def test_booking_signals_update_total(self):
+        booking = self._booking(8)
+        self._booking(9)
+        self.assertEqual(self._profile().total_booking, 2)
+        booking.delete()
+        self.assertEqual(self._profile().total_booking, 1)
+
+    def test_review_signals_update_average(self):
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=4, comment='ok')
+        review = Review.objects.create(user=self.user, lapangan=self.lapangan2, rating=5, comment='ok')
+        profile = self._profile()
+        self.assertEqual((profile.total_review, profile.avg_rating), (2, 4.5))
+        review.delete()
+        self.assertEqual(self._profile().avg_rating, 4.0)
+
+    def test_profile_save_keeps_counters(self):
+        profile = self._profile()  # nilai lama di memori
+        self._booking(8)
+        profile.bio = 'Halo'
+        profile.save()
+        self.assertEqual(self._profile().total_booking, 1)
+        self.assertEqual(self._profile().bio, 'Halo')
+
+        self.user.save()  # ikut menyimpan user.profile lewat signal
+        self.assertEqual(self._profile().total_booking, 1)
+
+    def test_profile_json_does_not_aggregate(self):
+        self._booking(8)
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=4, comment='ok')
+        self.client.login(username='taka', password='Cukurukuk123!')
+        # session, user JOIN profile
+        with self.assertNumQueries(2):
+            data = self.client.get(reverse('accounts:profile_json')).json()
+        self.assertEqual((data['total_booking'], data['avg_rating']), (1, 4.0))
+
+    def test_reconcile_fixes_drift(self):
+        self._booking(8)
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=3, comment='ok')
+        Profile.objects.filter(user=self.user).update(total_booking=9, avg_rating=1)
+
+        out = StringIO()
+        call_command('reconcile_profile_stats', stdout=out)
+        self.assertIn('Fixed profile stats for 1 users', out.getvalue())
+        profile = self._profile()
+        self.assertEqual((profile.total_booking, profile.avg_rating), (1, 3.0))
+
+        out = StringIO()
+        call_command('reconcile_profile_stats', stdout=out)
+        self.assertIn('already up to date', out.getvalue())
+
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts.models import FriendSuggestion
+from accounts.suggestions import suggestions_for
+from matchmaking.models import Match
+
+
+class FriendSuggestionTests(TestCase):
+    """Saran teman dihitung di background dan disajikan tanpa ORDER BY RANDOM()."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(username=name, password='Cukurukuk123!')
+            for name in ['ani', 'budi', 'cici', 'dodi', 'eka', 'fani']
+        }
+        u = self.users
+        u['ani'].profile.friends.add(u['budi'].profile)
+        u['budi'].profile.friends.add(u['cici'].profile)
+        match = Match.objects.create(mode='1v1', created_by=u['ani'])
+        match.players.add(u['dodi'])
+        venue = Venue.objects.create(name='Padel A', location='Jakarta', address='Jl. A')
+        for hour, name in [(8, 'ani'), (9, 'eka')]:
+            Booking.objects.create(
+                user=u[name], venue=venue, booking_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(hour), end_time=datetime.time(hour + 1),
+                customer_name=name, customer_email=f'{name}@example.com', customer_phone='0812',
+            )
+
+    def test_ranking(self):
+        out = StringIO()
+        call_command('update_friend_suggestions', stdout=out)
+        self.assertIn('updated for 6 users', out.getvalue())
+
+        rows = FriendSuggestion.objects.filter(user=self.users['ani']).order_by('-score')
+        self.assertEqual(
+            [(r.suggested.username, r.score) for r in rows],
+            [('cici', 3), ('dodi', 2), ('eka', 1)],
+        )
+        self.assertEqual(rows[0].mutual_friends, 1)
+
+    def test_excludes_friends_and_pending_requests(self):
+        FriendRequest.objects.create(from_user=self.users['ani'], to_user=self.users['dodi'])
+        call_command('update_friend_suggestions', stdout=StringIO())
+        suggested = set(
+            FriendSuggestion.objects.filter(user=self.users['ani']).values_list('suggested__username', flat=True)
+        )
+        self.assertEqual(suggested, {'cici', 'eka'})
+
+        names = {p.user.username for p in suggestions_for(self.users['ani'])}
+        self.assertNotIn('budi', names)
+        self.assertNotIn('dodi', names)
+        self.assertNotIn('ani', names)
+
+    def test_endpoint_ranked_then_random_fill(self):
+        call_command('update_friend_suggestions', stdout=StringIO())
+        self.client.login(username='ani', password='Cukurukuk123!')
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('accounts:get_friend_suggestions')).json()
+        self.assertFalse(any('RANDOM' in q['sql'].upper() for q in ctx.captured_queries))
+
+        names = [s['username'] for s in data['suggestions']]
+        self.assertEqual(names[:3], ['cici', 'dodi', 'eka'])
+        self.assertEqual(set(names), {'cici', 'dodi', 'eka', 'fani'})
+
+    def test_new_user_gets_random_sample(self):
+        names = {p.user.username for p in suggestions_for(self.users['fani'])}
+        self.assertEqual(names, {'ani', 'budi', 'cici', 'dodi', 'eka'})
+
+
+import json
+from accounts import friend_graph
+
+
+class FriendGraphTests(TestCase):
+    """Cek pertemanan lewat exists()/set id teman dalam satu query, bukan friends.all()."""
+
+    def setUp(self):
+        cache.clear()
+        self.ani = User.objects.create_user(username='ani', password='Cukurukuk123!')
+        self.budi = User.objects.create_user(username='budi', password='Cukurukuk123!')
+        self.cici = User.objects.create_user(username='cici', password='Cukurukuk123!')
+        self.ani.profile.friends.add(self.budi.profile)
+        self.budi.profile.friends.add(self.cici.profile)
+
+    def test_are_friends_single_exists_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(friend_graph.are_friends(self.ani, self.budi))
+        self.assertFalse(friend_graph.are_friends(self.ani, self.cici))
+        self.assertFalse(friend_graph.are_friends(self.ani, self.ani))
+
+    def test_friend_ids_many_single_query(self):
+        with self.assertNumQueries(1):
+            sets = friend_graph.friend_ids_many([self.ani.id, self.budi.id, self.cici.id])
+        self.assertEqual(sets[self.budi.id], {self.ani.id, self.cici.id})
+        self.assertEqual(sets[self.cici.id], {self.budi.id})
+
+    def test_unfriend_in_other_worker_visible(self):
+        # Tanpa signal/invalidasi sama sekali, seperti perubahan dari worker lain
+        friend_graph.friend_ids(self.ani.id)
+        Friendship = friend_graph.Friendship
+        Friendship.objects.filter(from_profile__user=self.ani).delete()
+        Friendship.objects.filter(to_profile__user=self.ani).delete()
+        self.assertEqual(friend_graph.friend_ids(self.ani.id), set())
+        self.assertFalse(friend_graph.are_friends(self.ani, self.budi))
+
+        self.client.login(username='ani', password='Cukurukuk123!')
+        response = self.client.get(reverse('accounts:get_chat_history', args=['budi']))
+        self.assertEqual(response.json(), {'success': False, 'message': 'Bukan teman.'})
+
+    def test_accept_visible_on_both_sides(self):
+        friend_graph.friend_ids_many([self.ani.id, self.cici.id])
+        FriendRequest.objects.create(from_user=self.ani, to_user=self.cici).accept()
+        self.assertIn(self.cici.id, friend_graph.friend_ids(self.ani.id))
+        self.assertIn(self.ani.id, friend_graph.friend_ids(self.cici.id))
+
+    def test_unfriend_visible_on_both_sides(self):
+        friend_graph.friend_ids_many([self.ani.id, self.budi.id])
+        self.client.login(username='ani', password='Cukurukuk123!')
+        response = self.client.post(
+            reverse('accounts:unfriend'), data=json.dumps({'username': 'budi'}), content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(friend_graph.friend_ids(self.ani.id), set())
+        self.assertEqual(friend_graph.friend_ids(self.budi.id), {self.cici.id})
+
+    def test_mutual_friend_counts(self):
+        counts = friend_graph.mutual_friend_counts(self.ani.id, [self.cici.id, self.budi.id])
+        self.assertEqual(counts, {self.cici.id: 1, self.budi.id: 0})
+
+        self.client.login(username='ani', password='Cukurukuk123!')
+        data = self.client.get(reverse('accounts:get_friend_suggestions')).json()
+        by_name = {s['username']: s['mutual_friends'] for s in data['suggestions']}
+        self.assertEqual(by_name['cici'], 1)
+
+
+from accounts.models import ChatMessage, conversation_key
+
+
+class ChatHistoryPaginationTests(TestCase):
+    """Riwayat chat diambil per halaman lewat index percakapan, bukan seluruhnya."""
+
+    def setUp(self):
+        cache.clear()
+        self.ani = User.objects.create_user(username='ani', password='Cukurukuk123!')
+        self.budi = User.objects.create_user(username='budi', password='Cukurukuk123!')
+        self.cici = User.objects.create_user(username='cici', password='Cukurukuk123!')
+        self.ani.profile.friends.add(self.budi.profile, self.cici.profile)
+        self.messages = [
+            ChatMessage.objects.create(
+                sender=self.ani if i % 2 == 0 else self.budi,
+                receiver=self.budi if i % 2 == 0 else self.ani,
+                message=f'pesan {i}',
+            )
+            for i in range(5)
+        ]
+        ChatMessage.objects.create(sender=self.cici, receiver=self.ani, message='percakapan lain')
+        self.client.login(username='ani', password='Cukurukuk123!')
+        self.url = reverse('accounts:get_chat_history', args=['budi'])
+
+    def _texts(self, data):
+        return [m['message'] for m in data['messages']]
+
+    def test_conversation_key_symmetric(self):
+        self.assertEqual(conversation_key(7, 3), conversation_key(3, 7))
+        self.assertEqual(self.messages[0].conversation, self.messages[1].conversation)
+
+    def test_latest_page_then_older(self):
+        data = self.client.get(self.url, {'limit': 2}).json()
+        self.assertEqual(self._texts(data), ['pesan 3', 'pesan 4'])
+        self.assertTrue(data['has_more'])
+        self.assertEqual(data['messages'][0]['sender'], 'budi')
+
+        data = self.client.get(self.url, {'limit': 2, 'before': data['oldest_id']}).json()
+        self.assertEqual(self._texts(data), ['pesan 1', 'pesan 2'])
+
+        data = self.client.get(self.url, {'limit': 2, 'before': data['oldest_id']}).json()
+        self.assertEqual(self._texts(data), ['pesan 0'])
+        self.assertFalse(data['has_more'])
+
+    def test_no_params_returns_full_history(self):
+        for i in range(60):
+            ChatMessage.objects.create(sender=self.budi, receiver=self.ani, message=f'lagi {i}')
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['messages']), 65)
+        self.assertEqual(self._texts(data)[0], 'pesan 0')
+        self.assertFalse(data['has_more'])
+        self.assertEqual(len(self.client.get(self.url, {'limit': 50}).json()['messages']), 50)
+
+    def test_after_returns_only_new_messages(self):
+        latest_id = self.client.get(self.url).json()['latest_id']
+        data = self.client.get(self.url, {'after': latest_id}).json()
+        self.assertEqual(data['messages'], [])
+        self.assertEqual(data['latest_id'], latest_id)
+
+        ChatMessage.objects.create(sender=self.budi, receiver=self.ani, message='baru')
+        data = self.client.get(self.url, {'after': latest_id}).json()
+        self.assertEqual(self._texts(data), ['baru'])
+
+    def test_query_count_constant(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for i in range(20):
+            ChatMessage.objects.create(sender=self.budi, receiver=self.ani, message=f'lagi {i}')
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'before': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+import asyncio
+from asgiref.sync import sync_to_async
+from unittest import mock
+from accounts import views as account_views
+from accounts.realtime import InProcessBroker, chat_event, get_broker, user_channel
+
+
+class RealtimeChatTests(TestCase):
+    def setUp(self):
+        self.ani = User.objects.create_user(username='ani', password='pw')
+        self.budi = User.objects.create_user(username='budi', password='pw')
+        self.ani.profile.friends.add(self.budi.profile)
+        self.url = reverse('accounts:chat_stream')
+
+    async def test_broker_delivers_to_channel_subscribers(self):
+        broker = InProcessBroker()
+        mine = broker.subscribe(user_channel(1))
+        other = broker.subscribe(user_channel(2))
+        self.assertEqual(broker.publish(user_channel(1), {'id': 1}), 1)
+        self.assertEqual(await mine.get(1), {'id': 1})
+        with self.assertRaises(asyncio.TimeoutError):
+            await other.get(0.05)
+        mine.close()
+        other.close()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_full_queue_drops_events(self):
+        broker = InProcessBroker(max_queue=1)
+        subscription = broker.subscribe(user_channel(1))
+        broker.publish(user_channel(1), {'id': 1})
+        broker.publish(user_channel(1), {'id': 2})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(1), {'id': 1})
+        self.assertTrue(subscription.queue.empty())
+        subscription.close()
+
+    def test_requires_asgi(self):
+        self.client.force_login(self.ani)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+
+    async def test_stream_pushes_new_message(self):
+        await self.async_client.aforce_login(self.ani)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        await self.async_client.aforce_login(self.budi)
+        await self.async_client.post(
+            reverse('accounts:send_chat_message'), {'username': 'ani', 'message': 'halo ani'}
+        )
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(b'event: message', chunk)
+        self.assertIn(b'halo ani', chunk)
+        await response.streaming_content.aclose()
+
+    async def test_replays_missed_messages(self):
+        old = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='lama')
+        missed = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='terlewat')
+        await self.async_client.aforce_login(self.ani)
+        response = await self.async_client.get(self.url, headers={'last-event-id': str(old.id)})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(f'id: {missed.id}'.encode(), chunk)
+        self.assertNotIn(b'lama', chunk)
+        await response.streaming_content.aclose()
+
+    async def test_message_published_during_replay_sent_once(self):
+        old = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='lama')
+        missed = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='terlewat')
+        missed_events = account_views._missed_chat_events
+
+        def replay_with_race(user, last_id):
+            # Pesan yang sama tiba lewat broker saat replay masih berjalan
+            get_broker().publish(user_channel(user.id), chat_event(missed, 'budi', 'ani'))
+            return missed_events(user, last_id)
+
+        await self.async_client.aforce_login(self.ani)
+        with mock.patch.object(account_views, '_missed_chat_events', replay_with_race):
+            response = await self.async_client.get(self.url, headers={'last-event-id': str(old.id)})
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            replayed = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(f'id: {missed.id}'.encode(), replayed)
+
+        await self.async_client.aforce_login(self.budi)
+        await self.async_client.post(
+            reverse('accounts:send_chat_message'), {'username': 'ani', 'message': 'baru'}
+        )
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(b'baru', chunk)
+        self.assertNotIn(b'terlewat', chunk)
+        await response.streaming_content.aclose()
+
+    async def test_out_of_order_broker_events_all_delivered(self):
+        first = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='satu')
+        second = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='dua')
+        await self.async_client.aforce_login(self.ani)
+        response = await self.async_client.get(self.url)
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        # Dua pengirim bersamaan: id yang lebih besar sampai ke broker lebih dulu
+        get_broker().publish(user_channel(self.ani.id), chat_event(second, 'budi', 'ani'))
+        get_broker().publish(user_channel(self.ani.id), chat_event(first, 'budi', 'ani'))
+        self.assertIn(b'dua', await asyncio.wait_for(anext(stream), 5))
+        self.assertIn(b'satu', await asyncio.wait_for(anext(stream), 5))
+        await response.streaming_content.aclose()
+
+    async def test_replay_pages_through_whole_backlog(self):
+        old = await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message='lama')
+        for i in range(5):
+            await sync_to_async(ChatMessage.objects.create)(sender=self.budi, receiver=self.ani, message=f'terlewat {i}')
+        await self.async_client.aforce_login(self.ani)
+        with mock.patch.object(account_views, 'CHAT_MAX_PAGE_SIZE', 2):
+            response = await self.async_client.get(self.url, headers={'last-event-id': str(old.id)})
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            chunks = [await asyncio.wait_for(anext(stream), 5) for _ in range(5)]
+        for i, chunk in enumerate(chunks):
+            self.assertIn(f'terlewat {i}'.encode(), chunk)
+        await response.streaming_content.aclose()
+
+
+class ChatInboxTests(TestCase):
+    def setUp(self):
+        self.ani = User.objects.create_user(username='ani', password='pw')
+        self.budi = User.objects.create_user(username='budi', password='pw')
+        self.cici = User.objects.create_user(username='cici', password='pw')
+        ChatMessage.objects.create(sender=self.budi, receiver=self.ani, message='halo')
+        ChatMessage.objects.create(sender=self.budi, receiver=self.ani, message='apa kabar')
+        ChatMessage.objects.create(sender=self.ani, receiver=self.cici, message='main besok?')
+        ChatMessage.objects.create(sender=self.cici, receiver=self.budi, message='bukan untuk ani')
+        self.client.force_login(self.ani)
+        self.url = reverse('accounts:chat_inbox')
+
+    def test_latest_message_and_unread_per_conversation(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual([c['username'] for c in data['conversations']], ['cici', 'budi'])
+        cici, budi = data['conversations']
+        self.assertEqual(cici['last_message']['message'], 'main besok?')
+        self.assertEqual(cici['unread'], 0)
+        self.assertEqual(budi['last_message']['message'], 'apa kabar')
+        self.assertEqual(budi['unread'], 2)
+        self.assertEqual(data['total_unread'], 2)
+
+    def test_query_count_constant(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for i in range(10):
+            other = User.objects.create_user(username=f'teman{i}', password='pw')
+            ChatMessage.objects.create(sender=other, receiver=self.ani, message='hai')
+        with CaptureQueriesContext(connection) as many:
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data['conversations']), 12)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_mark_read_single_update(self):
+        url = reverse('accounts:mark_chat_read')
+        self.client.get(self.url)  # muat session/user lebih dulu
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.post(url, {'username': 'budi'}).json()
+        self.assertEqual(data['updated'], 2)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in ctx.captured_queries), 1)
+        self.assertEqual(self.client.get(self.url).json()['total_unread'], 0)
+        # Pesan budi -> cici tidak ikut ditandai
+        self.assertFalse(ChatMessage.objects.get(message='bukan untuk ani').is_read)
+
+
+from unittest.mock import patch
+
+
+class ProfileBootstrapTests(TestCase):
+    # session, user+profile, teman, permintaan, saran (id teman, pending,
+    # FriendSuggestion, sampel acak 3) dan id teman untuk mutual friends
+    QUERY_BUDGET = 11
+
+    def setUp(self):
+        cache.clear()
+        self.ani = User.objects.create_user(username='ani', password='pw')
+        self.client.force_login(self.ani)
+        self.url = reverse('accounts:profile_bootstrap')
+
+    def _add_network(self, start, count):
+        for i in range(start, start + count):
+            friend = User.objects.create_user(username=f'teman{i}', password='pw')
+            self.ani.profile.friends.add(friend.profile)
+            stranger = User.objects.create_user(username=f'asing{i}', password='pw')
+            FriendRequest.objects.create(from_user=stranger, to_user=self.ani)
+            User.objects.create_user(username=f'calon{i}', password='pw')
+
+    def _measure(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(self.url).json()
+        return data, len(ctx.captured_queries)
+
+    def test_payload(self):
+        self._add_network(0, 2)
+        data, _ = self._measure()
+        self.assertEqual(data['profile']['username'], 'ani')
+        self.assertEqual(data['counters']['friends'], 2)
+        self.assertEqual(data['counters']['pending_requests'], 2)
+        self.assertEqual([f['username'] for f in data['friends']], ['teman0', 'teman1'])
+        self.assertEqual({r['from_user']['username'] for r in data['requests']}, {'asing0', 'asing1'})
+        suggested = {s['username'] for s in data['suggestions']}
+        self.assertTrue(suggested)
+        self.assertFalse(suggested & {'ani', 'teman0', 'teman1', 'asing0', 'asing1'})
+
+    @patch('accounts.suggestions.random.randint', side_effect=lambda low, high: high)
+    def test_query_budget_independent_of_network_size(self, _):
+        # Pivot sampel acak dipatok supaya jumlah query sampel selalu sama
+        self._add_network(0, 2)
+        _, few = self._measure()
+        self._add_network(2, 20)
+        data, many = self._measure()
+        self.assertEqual(len(data['friends']), 22)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, self.QUERY_BUDGET)
+
+
+class FriendListQueryTests(TestCase):
+    """Daftar teman/permintaan: jumlah query tetap untuk 1 vs 500 baris."""
+
+    def setUp(self):
+        self.ani = User.objects.create_user(username='ani', password='pw')
+        self.client.force_login(self.ani)
+
+    def _add_friends(self, names):
+        # bulk_create tidak memicu signal, jadi Profile dibuat manual
+        users = User.objects.bulk_create([User(username=name, password='!') for name in names])
+        profiles = Profile.objects.bulk_create([Profile(user=user) for user in users])
+        Friendship = Profile.friends.through
+        Friendship.objects.bulk_create(
+            [Friendship(from_profile=self.ani.profile, to_profile=p) for p in profiles]
+            + [Friendship(from_profile=p, to_profile=self.ani.profile) for p in profiles]
+        )
+        return users
+
+    def _add_requests(self, names):
+        users = User.objects.bulk_create([User(username=name, password='!') for name in names])
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        FriendRequest.objects.bulk_create([FriendRequest(from_user=user, to_user=self.ani) for user in users])
+
+    def _count(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_friends_constant_queries(self):
+        url = reverse('accounts:friends_json')
+        self._add_friends(['teman0000'])
+        data, one = self._count(url)
+        self.assertEqual(len(data['friends']), 1)
+        self._add_friends([f'teman{i:04d}' for i in range(1, 500)])
+        data, many = self._count(url)
+        self.assertEqual(len(data['friends']), 500)
+        self.assertEqual(one, many)
+
+    def test_friend_requests_constant_queries(self):
+        url = reverse('accounts:show_friend_requests')
+        self._add_requests(['asing0000'])
+        data, one = self._count(url)
+        self.assertEqual(data['requests'][0]['from_user']['username'], 'asing0000')
+        self._add_requests([f'asing{i:04d}' for i in range(1, 500)])
+        data, many = self._count(url)
+        self.assertEqual(len(data['requests']), 500)
+        self.assertEqual(one, many)
+
+    def test_friends_cursor_pagination(self):
+        url = reverse('accounts:friends_json')
+        self._add_friends([f'teman{i}' for i in range(5)])
+        data = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual([f['username'] for f in data['friends']], ['teman0', 'teman1'])
+        seen = [f['username'] for f in data['friends']]
+        while data['next_cursor']:
+            data = self.client.get(url, {'limit': 2, 'cursor': data['next_cursor']}).json()
+            seen += [f['username'] for f in data['friends']]
+        self.assertEqual(seen, [f'teman{i}' for i in range(5)])
+        self.assertEqual(self.client.get(url, {'cursor': '!!'}).status_code, 400)
+
+    def test_friend_requests_cursor_pagination(self):
+        url = reverse('accounts:show_friend_requests')
+        self._add_requests([f'asing{i}' for i in range(5)])
+        seen = []
+        params = {'limit': 2}
+        while True:
+            data = self.client.get(url, params).json()
+            seen += [r['from_user']['username'] for r in data['requests']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(sorted(seen), [f'asing{i}' for i in range(5)])
+        self.assertEqual(len(seen), 5)
+
+
+class UsernameAutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ani = User.objects.create_user(username='ani', password='pw')
+        self.users = {
+            name: User.objects.create_user(username=name, password='pw')
+            for name in ['Andi', 'anton', 'anya', 'angga', 'budi']
+        }
+        self.ani.profile.friends.add(self.users['Andi'].profile)
+        FriendRequest.objects.create(from_user=self.ani, to_user=self.users['anton'])
+        FriendRequest.objects.create(from_user=self.users['anya'], to_user=self.ani)
+        self.client.force_login(self.ani)
+        self.url = reverse('accounts:username_autocomplete')
+
+    def test_prefix_case_insensitive_with_statuses(self):
+        data = self.client.get(self.url, {'q': 'AN'}).json()
+        results = {r['username']: r['status'] for r in data['results']}
+        self.assertEqual(results, {'Andi': 'friend', 'angga': 'none', 'anton': 'pending', 'anya': 'incoming'})
+        self.assertEqual([r['username'] for r in data['results']], ['Andi', 'angga', 'anton', 'anya'])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.client.get(self.url, {'q': 'an', 'limit': 2}).json()['results']), 2)
+        self.assertEqual(self.client.get(self.url).json()['results'], [])
+
+    def test_prefix_uses_like_and_is_literal(self):
+        User.objects.create_user(username='an_dre', password='pw')
+        User.objects.create_user(username='an.dre', password='pw')
+        names = [r['username'] for r in self.client.get(self.url, {'q': 'an_'}).json()['results']]
+        self.assertEqual(names, ['an_dre'])
+        names = [r['username'] for r in self.client.get(self.url, {'q': 'an.'}).json()['results']]
+        self.assertEqual(names, ['an.dre'])
+        sql = str(Profile.objects.filter(**prefix_filter('an')).query).upper()
+        self.assertIn('LIKE', sql)
+
+    def test_username_change_updates_index(self):
+        budi = self.users['budi']
+        budi.username = 'Anjani'
+        budi.save()
+        names = [r['username'] for r in self.client.get(self.url, {'q': 'anj'}).json()['results']]
+        self.assertEqual(names, ['Anjani'])
+
+    def test_query_count_constant(self):
+        self.client.get(self.url, {'q': 'an'})
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url, {'q': 'an', 'limit': 1})
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url, {'q': 'an', 'limit': 20})
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+
+from datetime import timedelta
+from django.core import signing
+from django.utils import timezone
+from accounts import tokens
+from accounts.models import RevokedToken
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='flutter', password='Rahasia123!')
+        self.user.profile.role = 'venue_owner'
+        self.user.profile.save()
+
+    def _obtain(self):
+        response = self.client.post(
+            reverse('accounts:token_obtain'),
+            {'username': 'flutter', 'password': 'Rahasia123!'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _bearer(self, token):
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_obtain_returns_tokens_with_role(self):
+        data = self._obtain()
+        payload = tokens.read_token(data['access'])
+        self.assertEqual(payload['uid'], self.user.pk)
+        self.assertEqual(payload['role'], 'venue_owner')
+        self.assertEqual(data['role'], 'venue_owner')
+        bad = self.client.post(reverse('accounts:token_obtain'), {'username': 'flutter', 'password': 'salah'})
+        self.assertEqual(bad.status_code, 401)
+
+    def test_bearer_request_skips_session_table(self):
+        access = self._obtain()['access']
+        self.client.cookies.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('accounts:profile_json'), **self._bearer(access))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'flutter')
+        self.assertFalse([q for q in ctx.captured_queries if 'django_session' in q['sql']])
+
+    def test_csrf_not_required_with_bearer(self):
+        client = Client(enforce_csrf_checks=True)
+        access = self._obtain()['access']
+        response = client.post(reverse('accounts:mark_chat_read'), {'username': 'flutter'}, **self._bearer(access))
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_and_expired_tokens_rejected(self):
+        url = reverse('accounts:profile_json')
+        self.assertEqual(self.client.get(url, **self._bearer('sampah')).status_code, 401)
+        refresh = self._obtain()['refresh']
+        # Token refresh tidak bisa dipakai sebagai token akses
+        self.assertEqual(self.client.get(url, **self._bearer(refresh)).status_code, 401)
+        with patch.dict(tokens.TTL, {tokens.ACCESS: timedelta(seconds=-1)}):
+            access = tokens.make_token(self.user, tokens.ACCESS)
+            self.assertEqual(self.client.get(url, **self._bearer(access)).status_code, 401)
+
+    def test_refresh_rotates_and_old_refresh_is_revoked(self):
+        refresh = self._obtain()['refresh']
+        url = reverse('accounts:token_refresh')
+        first = self.client.post(url, {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(tokens.read_token(first.json()['access']))
+        again = self.client.post(url, {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(again.status_code, 401)
+
+    def test_revoke_denies_access_token(self):
+        data = self._obtain()
+        url = reverse('accounts:profile_json')
+        response = self.client.post(
+            reverse('accounts:token_revoke'), {'refresh': data['refresh']},
+            content_type='application/json', **self._bearer(data['access']),
+        )
+        self.assertTrue(response.json()['status'])
+        self.assertEqual(RevokedToken.objects.count(), 2)
+        self.assertEqual(self.client.get(url, **self._bearer(data['access'])).status_code, 401)
+
+    async def test_bearer_async_view_uses_token_user(self):
+        access = (await sync_to_async(tokens.issue_tokens)(self.user))['access']
+        response = await self.async_client.get(
+            reverse('accounts:chat_stream'), headers={'authorization': f'Bearer {access}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await response.streaming_content.aclose()
+
+    def test_revocation_checked_per_token(self):
+        access = tokens.issue_tokens(self.user)['access']
+        RevokedToken.objects.bulk_create(
+            RevokedToken(jti=f'{i:032x}', expires_at=timezone.now() + timedelta(days=30)) for i in range(50)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            tokens.read_token(access)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('LIMIT 1', ctx.captured_queries[0]['sql'])
+
+    def test_tampered_token_rejected(self):
+        access = self._obtain()['access']
+        forged = signing.dumps({'uid': self.user.pk, 'role': 'admin', 'typ': 'access', 'jti': 'x'}, salt='lain')
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.read_token(forged)
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.read_token(access[:-2] + 'xx')
+
+    def test_non_object_json_body_rejected(self):
+        for name in ('token_obtain', 'token_refresh', 'token_revoke'):
+            for body in ('[]', 'null', '"x"', '1'):
+                response = self.client.post(reverse(f'accounts:{name}'), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400, (name, body))
+                self.assertFalse(response.json()['status'])
+
+
+class ProfileBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='satu', password='Rahasia123!')
+
+    def test_session_user_loads_profile_in_same_query(self):
+        self.client.login(username='satu', password='Rahasia123!')
+        # session + user JOIN profile
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('accounts:profile_json'))
+        self.assertEqual(response.json()['role'], 'customer')
+
+    def test_bearer_user_loads_profile_in_same_query(self):
+        access = tokens.issue_tokens(self.user)['access']
+        # Cek jti di RevokedToken + user JOIN profile
+        with self.assertNumQueries(2):
+            self.client.get(reverse('accounts:profile_json'), HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_legacy_model_backend_session_still_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('accounts:profile_json')).status_code, 200)
+
+
+import requests
+from django.test import override_settings
+from sportspace import ratelimit
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit.get_storage().clear()
+        self.addCleanup(ratelimit.get_storage().clear)
+        self.user = User.objects.create_user(username='cepat', password='Rahasia123!')
+
+    def _login_flutter(self, ip='10.0.0.1'):
+        return self.client.post(
+            reverse('accounts:login_flutter'), {'username': 'cepat', 'password': 'salah'}, REMOTE_ADDR=ip
+        )
+
+    def test_token_bucket_refills(self):
+        state, wait = ratelimit.take(None, 0, 2, 1.0)
+        self.assertEqual(wait, 0)
+        state, wait = ratelimit.take(state, 0, 2, 1.0)
+        self.assertEqual(wait, 0)
+        state, wait = ratelimit.take(state, 0, 2, 1.0)
+        self.assertAlmostEqual(wait, 1.0)
+        _, wait = ratelimit.take(state, 1.5, 2, 1.0)
+        self.assertEqual(wait, 0)
+
+    @override_settings(RATE_LIMITS={'login': '3/m'})
+    def test_login_limited_per_ip_with_retry_after(self):
+        # Waktu dibekukan: bucket tidak terisi ulang selama login (hash password) berjalan
+        with patch('sportspace.ratelimit.time.monotonic', return_value=1000.0):
+            for _ in range(3):
+                self.assertEqual(self._login_flutter().status_code, 401)
+            response = self._login_flutter()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        # IP lain punya bucket sendiri
+        self.assertEqual(self._login_flutter(ip='10.0.0.2').status_code, 401)
+
+    @override_settings(RATE_LIMITS={'friend_search': '2/m'})
+    def test_friend_search_limited_per_user(self):
+        other = User.objects.create_user(username='lambat', password='Rahasia123!')
+        url = reverse('accounts:send_friend_request')
+        self.client.force_login(self.user)
+        for _ in range(2):
+            self.client.post(url, {'username': 'lambat', 'search_only': 'on'})
+        self.assertEqual(self.client.post(url, {'username': 'lambat', 'search_only': 'on'}).status_code, 429)
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(url, {'username': 'cepat', 'search_only': 'on'}).status_code, 200)
+
+    @override_settings(RATE_LIMITS={'friend_search': '1/m'})
+    def test_friend_request_without_search_not_limited(self):
+        User.objects.create_user(username='lambat', password='Rahasia123!')
+        url = reverse('accounts:send_friend_request')
+        self.client.force_login(self.user)
+        for _ in range(3):
+            self.assertEqual(self.client.post(url, {'username': 'lambat'}).status_code, 200)
+
+    def test_prune_keeps_buckets_of_slower_routes(self):
+        storage = ratelimit.LocalStorage()
+        storage.MAX_KEYS = 10
+        with patch('sportspace.ratelimit.time.monotonic', return_value=0.0):
+            for _ in range(5):
+                self.assertEqual(storage.consume('refresh:ip:a', 5, 5 / 3600), 0)
+            for i in range(8):
+                storage.consume(f'proxy:ip:{i}', 60, 1.0)
+        # Dua menit kemudian bucket 60/m sudah penuh lagi dan boleh dibuang,
+        # tapi bucket 5/h yang kosong harus tetap ada
+        with patch('sportspace.ratelimit.time.monotonic', return_value=120.0):
+            for i in range(8, 11):
+                storage.consume(f'proxy:ip:{i}', 60, 1.0)
+            self.assertNotIn('proxy:ip:0', storage._buckets)
+            self.assertGreater(storage.consume('refresh:ip:a', 5, 5 / 3600), 0)
+
+    def test_prune_evicts_least_recent_when_all_active(self):
+        storage = ratelimit.LocalStorage()
+        storage.MAX_KEYS = 10
+        with patch('sportspace.ratelimit.time.monotonic', return_value=0.0):
+            for i in range(11):
+                storage.consume(f'slow:{i}', 1, 1 / 3600)
+        self.assertLessEqual(len(storage._buckets), storage.MAX_KEYS)
+        self.assertNotIn('slow:0', storage._buckets)
+        self.assertIn('slow:10', storage._buckets)
+
+    @override_settings(RATE_LIMITS={'proxy_image': '2/m'})
+    def test_both_image_proxies_share_limit(self):
+        home_url = reverse('home:proxy_image')
+        review_url = reverse('review:proxy_image')
+        self.assertNotEqual(home_url, review_url)
+        params = {'url': 'https://contoh.test/a.jpg'}
+        with patch('requests.get', side_effect=requests.RequestException):
+            self.client.get(home_url, params, REMOTE_ADDR='10.0.0.3')
+            self.client.get(review_url, params, REMOTE_ADDR='10.0.0.3')
+            self.assertEqual(self.client.get(review_url, params, REMOTE_ADDR='10.0.0.3').status_code, 429)
+            self.assertEqual(self.client.get(home_url, params, REMOTE_ADDR='10.0.0.3').status_code, 429)
+
+    @override_settings(RATE_LIMITS={'login': None})
+    def test_route_can_be_disabled(self):
+        for _ in range(25):
+            self.assertEqual(self._login_flutter().status_code, 401)
+
+    @override_settings(
+        RATE_LIMIT_STORAGE='sportspace.ratelimit.CacheStorage', RATE_LIMITS={'login': '1/m'}
+    )
+    def test_cache_storage(self):
+        ratelimit.get_storage().clear()
+        self.assertEqual(self._login_flutter().status_code, 401)
+        self.assertEqual(self._login_flutter().status_code, 429)
@@ -0,0 +1,92 @@
+"""Token akses/refresh bertanda tangan untuk aplikasi Flutter.
+
+Token berisi id user, role, jenis token dan jti (id unik token), ditandatangani
+dengan SECRET_KEY lewat django.core.signing, jadi bisa diverifikasi tanpa
+membaca tabel session. Token akses berumur pendek; token refresh dipakai
+untuk meminta pasangan token baru dan diputar (yang lama dicabut) setiap
+dipakai.
+
+Token yang dicabut (logout, refresh) disimpan di RevokedToken sampai masa
+berlakunya habis. Setiap refresh mencabut satu token, jadi tabel itu tumbuh
+seiring jumlah user; pengecekan dilakukan per jti lewat index unik, bukan
+dengan memuat seluruh denylist.
+"""
+import uuid
+from datetime import timedelta
+
+from django.core import signing
+from django.utils import timezone
+
+from .models import RevokedToken
+
+SALT = 'accounts.token'
+ACCESS = 'access'
+REFRESH = 'refresh'
+TTL = {
+    ACCESS: timedelta(minutes=15),
+    REFRESH: timedelta(days=30),
+}
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _role(user):
+    try:
+        return user.profile.role
+    except Exception:
+        return 'customer'
+
+
+def make_token(user, kind, role=None):
+    payload = {
+        'uid': user.pk,
+        'role': role or _role(user),
+        'typ': kind,
+        'jti': uuid.uuid4().hex,
+    }
+    return signing.dumps(payload, salt=SALT, compress=True)
+
+
+def issue_tokens(user):
+    role = _role(user)
+    return {
+        'access': make_token(user, ACCESS, role),
+        'refresh': make_token(user, REFRESH, role),
+        'token_type': 'Bearer',
+        'expires_in': int(TTL[ACCESS].total_seconds()),
+    }
+
+
+def read_token(token, kind=ACCESS):
+    """Payload token yang valid, belum kedaluwarsa dan belum dicabut, atau raise InvalidToken."""
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=TTL[kind])
+    except signing.SignatureExpired:
+        raise InvalidToken('Token kedaluwarsa.')
+    except signing.BadSignature:
+        raise InvalidToken('Token tidak valid.')
+    if not isinstance(payload, dict) or payload.get('typ') != kind:
+        raise InvalidToken('Jenis token salah.')
+    if is_revoked(payload['jti']):
+        raise InvalidToken('Token sudah dicabut.')
+    return payload
+
+
+def is_revoked(jti):
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(token, kind):
+    """Cabut token yang masih valid. Return False jika token tidak valid atau sudah
+    dicabut (juga oleh request lain yang bersamaan, berkat constraint unik jti)."""
+    try:
+        payload = read_token(token, kind)
+    except InvalidToken:
+        return False
+    now = timezone.now()
+    RevokedToken.objects.filter(expires_at__lte=now).delete()
+    # Batas atas masa berlaku; token dibuat paling cepat sekarang - TTL
+    _, created = RevokedToken.objects.get_or_create(jti=payload['jti'], defaults={'expires_at': now + TTL[kind]})
+    return created
@@ -11,10 +11,14 @@ urlpatterns = [
     path('login-flutter/', views.login_flutter, name='login_flutter'), 
     path('register-flutter/', views.register_flutter, name='register_flutter'),
     path('logout-flutter/', views.logout_flutter, name='logout_flutter'),
+    path('token/', views.token_obtain, name='token_obtain'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
+    path('token/revoke/', views.token_revoke, name='token_revoke'),
 
        
     path('profile/', views.profile_view, name='profile'),
     path('profile/json/', views.profile_json, name='profile_json'),
+    path('profile/bootstrap/', views.profile_bootstrap, name='profile_bootstrap'),
     path('edit-profile-flutter/', views.edit_profile_flutter, name='edit_profile_flutter'),
     
     path("friends/send/", views.send_friend_request, name="send_friend_request"),
@@ -24,8 +28,12 @@ urlpatterns = [
     path("friends/count/", views.get_friend_count, name="get_friend_count"),
     path("friend-requests/count/", views.get_request_count, name="get_request_count"),
     path("friends/suggestions/", views.get_friend_suggestions, name="get_friend_suggestions"),
+    path("friends/autocomplete/", views.username_autocomplete, name="username_autocomplete"),
     path("friend-requests/", views.show_friend_requests, name="show_friend_requests"),
 
+    path("chat-stream/", views.chat_stream, name="chat_stream"),
     path("chat/<str:username>/", views.get_chat_history, name="get_chat_history"),
     path("chat-send/", views.send_chat_message, name="send_chat_message"),
+    path("chat-inbox/", views.chat_inbox, name="chat_inbox"),
+    path("chat-read/", views.mark_chat_read, name="mark_chat_read"),
 ]
@@ -2,23 +2,43 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login as auth_login, logout as auth_logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Max, Q
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from .forms import SignUpForm, ProfileForm
-from .models import Profile, FriendRequest, ChatMessage
+from .models import Profile, FriendRequest, ChatMessage, conversation_key
+from .friend_graph import are_friends, friend_ids, mutual_friend_counts
+from .realtime import chat_event, get_broker, publish_chat_message, user_channel
+from .suggestions import suggestions_for
+from .autocomplete import autocomplete
+from .tokens import ACCESS, REFRESH, InvalidToken, issue_tokens, read_token, revoke
 from django.views.decorators.http import require_POST
 from django.contrib.auth import authenticate, login as auth_login
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
+from sportspace.ratelimit import check_rate, rate_limit
+from sportspace.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_desc, parse_limit
 
+import asyncio
 import json
 
+FRIEND_PAGE_SIZE = 20
+AUTOCOMPLETE_SIZE = 10
+AUTOCOMPLETE_MAX_SIZE = 20
+FRIEND_MAX_PAGE_SIZE = 100
+CHAT_PAGE_SIZE = 50
+CHAT_MAX_PAGE_SIZE = 200
+CHAT_STREAM_HEARTBEAT = 15  # detik
+CHAT_STREAM_RETRY_MS = 3000
+
 # SIGN UP
 def signup(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
         if form.is_valid():
             user = form.save()
-            auth_login(request, user)
+            auth_login(request, user, backend="accounts.backends.ProfileModelBackend")
             return redirect('/home/')
     else:
         form = SignUpForm()
@@ -49,6 +69,7 @@ def logout(request):
 # FLUTTER AUTHENTICATION
 
 @csrf_exempt
+@rate_limit("login", "20/m", key="ip")
 def login_flutter(request):
     username = request.POST['username']
     password = request.POST['password']
@@ -67,6 +88,8 @@ def login_flutter(request):
                 "status": True,
                 "message": "Login berhasil!",
                 "role" : role,
+                # Token untuk header Authorization: Bearer (lihat accounts/tokens.py)
+                **issue_tokens(user),
             }, status=200)
         else:
             return JsonResponse({
@@ -138,19 +161,79 @@ def logout_flutter(request):
             "message": "Logout failed."
         }, status=401)
 
+def _request_data(request):
+    """Body JSON atau form POST; None jika JSON-nya valid tapi bukan object."""
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return request.POST
+    return data if isinstance(data, dict) else None
+
+
+def _invalid_body():
+    return JsonResponse({"status": False, "message": "Body JSON harus berupa object."}, status=400)
+
+
+@csrf_exempt
+@require_POST
+@rate_limit("login", "20/m", key="ip")
+def token_obtain(request):
+    """Login Flutter tanpa session: username + password -> token akses dan refresh."""
+    data = _request_data(request)
+    if data is None:
+        return _invalid_body()
+    user = authenticate(username=data.get("username"), password=data.get("password"))
+    if user is None or not user.is_active:
+        return JsonResponse({"status": False, "message": "Username atau password salah."}, status=401)
+    return JsonResponse({
+        "status": True,
+        "username": user.username,
+        "role": user.profile.role,
+        **issue_tokens(user),
+    })
+
+
+@csrf_exempt
+@require_POST
+def token_refresh(request):
+    """Tukar token refresh dengan pasangan token baru; token refresh lama dicabut."""
+    data = _request_data(request)
+    if data is None:
+        return _invalid_body()
+    refresh = data.get("refresh", "")
+    try:
+        payload = read_token(refresh, REFRESH)
+    except InvalidToken as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=401)
+
+    user = User.objects.select_related("profile").filter(pk=payload["uid"], is_active=True).first()
+    if user is None or not revoke(refresh, REFRESH):
+        return JsonResponse({"status": False, "message": "Token tidak valid."}, status=401)
+    return JsonResponse({"status": True, **issue_tokens(user)})
+
+
+@csrf_exempt
+@require_POST
+def token_revoke(request):
+    """Logout Flutter: cabut token refresh (dan token akses di header, jika ada)."""
+    data = _request_data(request)
+    if data is None:
+        return _invalid_body()
+    revoked = revoke(data.get("refresh", ""), REFRESH)
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        revoked = revoke(header[len("Bearer "):].strip(), ACCESS) or revoked
+    return JsonResponse({"status": revoked})
+
 @login_required
 def profile_view(request):
     # Pastikan profile selalu ada
     profile, _ = Profile.objects.get_or_create(user=request.user)
-    received_requests = FriendRequest.objects.filter(to_user=request.user, is_accepted=False)
-    friends = profile.friends.all()
-    suggestions = (
-        Profile.objects
-        .filter(role="customer")
-        .exclude(id=profile.id)
-        .exclude(id__in=profile.friends.all())
-        .order_by("?")[:15]  # acak biar dinamis
+    received_requests = (
+        FriendRequest.objects.filter(to_user=request.user, is_accepted=False)
+        .select_related("from_user__profile")
     )
+    friends = profile.friends.select_related("user")
 
     if request.method == 'POST':
         form = ProfileForm(request.POST, instance=profile)
@@ -175,31 +258,68 @@ def profile_view(request):
             "profile": profile,
             "friends": friends,
             "received_requests": received_requests,
-            "suggestions": suggestions,
             "total_booking": profile.total_booking,
-            "average_rating": profile.avg_rating,
+            "average_rating": round(profile.avg_rating, 1),
             "joined_date": profile.joined_date.strftime("%d %b %Y"),
             "form": form,
         })
 
 # JSON PROFILE (untuk AJAX)
 
-@login_required
-def profile_json(request):
-    profile = request.user.profile
-    return JsonResponse({
-        'username': request.user.username,
+def _profile_data(user, profile):
+    return {
+        'username': user.username,
         "role": profile.role,
-        'success': True,
-        'message': 'Profil berhasil diperbarui!',
         'email': profile.email,
         'phone': profile.phone,
         'address': profile.address,
         'photo_url': profile.photo_url,
         'bio': profile.bio,
         'total_booking': profile.total_booking,
-        'avg_rating': profile.avg_rating,
+        'avg_rating': round(profile.avg_rating, 1),
         'joined_date': profile.joined_date.strftime("%d %b %Y"),
+    }
+
+
+@login_required
+def profile_json(request):
+    return JsonResponse({
+        'success': True,
+        'message': 'Profil berhasil diperbarui!',
+        **_profile_data(request.user, request.user.profile),
+    })
+
+
+@login_required
+def profile_bootstrap(request):
+    """
+    Semua data awal halaman profil dalam satu request: profil, counter,
+    daftar teman, permintaan pertemanan yang menunggu dan saran teman.
+    Jumlah query tetap, tidak bergantung pada banyaknya teman/permintaan.
+    """
+    user = request.user
+    profile = user.profile
+    friends = list(profile.friends.select_related("user").order_by("user__username"))
+    requests = list(
+        FriendRequest.objects.filter(to_user=user, is_accepted=False)
+        .select_related("from_user__profile")
+        .order_by("-created_at")
+    )
+    suggestions = suggestions_for(user)
+
+    return JsonResponse({
+        "success": True,
+        "profile": _profile_data(user, profile),
+        "counters": {
+            "friends": len(friends),
+            "pending_requests": len(requests),
+            "total_booking": profile.total_booking,
+            "total_review": profile.total_review,
+            "avg_rating": round(profile.avg_rating, 1),
+        },
+        "friends": [_friend_data(f) for f in friends],
+        "requests": [_friend_request_data(r) for r in requests],
+        "suggestions": _suggestion_data(user, suggestions),
     })
 
 @csrf_exempt
@@ -274,6 +394,12 @@ def send_friend_request(request):
             search_only = "search_only" in request.POST
         # ========================================
 
+        # Hanya mode pencarian yang dibatasi (cegah enumerasi username)
+        if search_only:
+            limited = check_rate(request, "friend_search", "30/m")
+            if limited:
+                return limited
+
         if not username:
              return JsonResponse({"success": False, "message": "Username tidak boleh kosong."})
 
@@ -286,10 +412,9 @@ def send_friend_request(request):
             return JsonResponse({"success": False, "message": "Tidak bisa menambahkan diri sendiri."})
 
         target_profile = target_user.profile
-        user_profile = request.user.profile
 
         # === 1. Sudah berteman ===
-        if target_profile in user_profile.friends.all():
+        if are_friends(request.user, target_user):
             return JsonResponse({
                 "success": True,
                 "status": "friend",
@@ -384,41 +509,89 @@ def handle_friend_request(request):
 
     return JsonResponse({"success": False, "message": "Aksi tidak valid."})
 
+def _friend_request_data(req):
+    return {
+        "id": req.id,
+        "from_user": {
+            "id": req.from_user.id,
+            "username": req.from_user.username,
+            "photo_url": req.from_user.profile.photo_url or "",
+            "bio": req.from_user.profile.bio or "",
+        },
+        "created_at": req.created_at,
+    }
+
+
+def _friend_data(friend_profile):
+    return {
+        "username": friend_profile.user.username,
+        "photo_url": friend_profile.photo_url or "/static/img/defaultprofile.png",
+        "bio": friend_profile.bio or "",
+    }
+
+
+def _suggestion_data(user, suggestions):
+    mutual = mutual_friend_counts(user.id, [s.user_id for s in suggestions])
+    return [
+        {
+            "id": s.user.id,
+            "username": s.user.username,
+            "photo_url": s.photo_url or "/static/img/defaultprofile.png",
+            "bio": s.bio or "Aktif bermain padel!",
+            "mutual_friends": mutual[s.user_id],
+        }
+        for s in suggestions
+    ]
+
+
+def _wants_page(request):
+    # Tanpa ?cursor= dan ?limit= tetap list penuh (format lama) untuk client yang belum update
+    return "cursor" in request.GET or "limit" in request.GET
+
+
 @login_required
 def show_friend_requests(request):
-    requests = FriendRequest.objects.filter(to_user=request.user)
-    data = []
-    
-    for req in requests:
-        data.append({
-            "id": req.id, 
-            "from_user": { 
-                # === PASTIKAN BARIS INI ADA ===
-                "id": req.from_user.id, 
-                # ==============================
-                "username": req.from_user.username,
-                "photo_url": req.from_user.profile.photo_url or "",
-                "bio": req.from_user.profile.bio or "",
-            },
-            "created_at": req.created_at,
-        })
-        
-    return JsonResponse({"requests": data})
+    """
+    Permintaan pertemanan yang masuk, terbaru dulu.
+
+    Dengan ?cursor= atau ?limit= -> {"requests": [...], "next_cursor": ...}.
+    """
+    requests = FriendRequest.objects.filter(to_user=request.user).select_related("from_user__profile")
+    if not _wants_page(request):
+        requests = requests.order_by("-created_at", "-id")
+        return JsonResponse({"requests": [_friend_request_data(r) for r in requests]})
+
+    try:
+        page, next_cursor = paginate_desc(
+            requests, request.GET.get("cursor"), parse_limit(request, FRIEND_PAGE_SIZE, FRIEND_MAX_PAGE_SIZE)
+        )
+    except InvalidCursor:
+        return JsonResponse({"success": False, "message": "Cursor tidak valid."}, status=400)
+    return JsonResponse({"requests": [_friend_request_data(r) for r in page], "next_cursor": next_cursor})
 
 @login_required
 def friends_json(request):
-    profile = request.user.profile
-    friends = profile.friends.all()
-
-    data = []
-    for f in friends:
-        data.append({
-            "username": f.user.username,
-            "photo_url": f.photo_url or "/static/img/defaultprofile.png",
-            "bio": f.bio or "",
-        })
+    """
+    Daftar teman urut username.
 
-    return JsonResponse({"friends": data})
+    Dengan ?cursor= atau ?limit= -> {"friends": [...], "next_cursor": ...};
+    kursor berisi username terakhir di halaman sebelumnya.
+    """
+    friends = request.user.profile.friends.select_related("user").order_by("user__username")
+    if not _wants_page(request):
+        return JsonResponse({"friends": [_friend_data(f) for f in friends]})
+
+    if request.GET.get("cursor"):
+        try:
+            (after,) = decode_cursor(request.GET["cursor"])
+        except (InvalidCursor, ValueError):
+            return JsonResponse({"success": False, "message": "Cursor tidak valid."}, status=400)
+        friends = friends.filter(user__username__gt=after)
+
+    limit = parse_limit(request, FRIEND_PAGE_SIZE, FRIEND_MAX_PAGE_SIZE)
+    page = list(friends[:limit + 1])
+    next_cursor = encode_cursor([page[limit - 1].user.username]) if len(page) > limit else None
+    return JsonResponse({"friends": [_friend_data(f) for f in page[:limit]], "next_cursor": next_cursor})
 
 @csrf_exempt
 @login_required
@@ -445,15 +618,27 @@ def unfriend(request):
         profile = request.user.profile
         target_profile = target_user.profile
 
-        if target_profile in profile.friends.all():
-            profile.friends.remove(target_profile)
-            target_profile.friends.remove(profile)
+        if are_friends(request.user, target_user):
+            profile.friends.remove(target_profile)  # symmetrical, sisi target ikut terhapus
             return JsonResponse({"success": True, "message": f"Kamu tidak lagi berteman dengan {username}."})
         else:
             return JsonResponse({"success": False, "message": "Kamu tidak berteman dengan user ini."}, status=400)
 
     return JsonResponse({"success": False, "message": "Method not allowed"}, status=405)
 
+@login_required
+def username_autocomplete(request):
+    """
+    GET ?q=<awalan username>&limit=10 -> kandidat username yang diawali q
+    (tanpa membedakan huruf besar/kecil) beserta status hubungannya:
+    friend, pending (sudah kita kirimi), incoming (mengirimi kita) atau none.
+    """
+    prefix = request.GET.get("q", "").strip()
+    if not prefix:
+        return JsonResponse({"results": []})
+    limit = parse_limit(request, AUTOCOMPLETE_SIZE, AUTOCOMPLETE_MAX_SIZE)
+    return JsonResponse({"results": autocomplete(request.user, prefix, limit)})
+
 @login_required
 def get_request_count(request):
     count = FriendRequest.objects.filter(to_user=request.user, is_accepted=False).count()
@@ -461,31 +646,13 @@ def get_request_count(request):
 
 @login_required
 def get_friend_count(request):
-    profile = request.user.profile
-    count = profile.friends.count()
+    count = len(friend_ids(request.user.id))
     return JsonResponse({"count": count})
 
 @login_required
 def get_friend_suggestions(request):
-    profile = request.user.profile
-    suggestions = (
-        Profile.objects
-        .filter(role="customer")
-        .exclude(id=profile.id)
-        .exclude(id__in=profile.friends.all())
-        .order_by("?")[:15]
-    )
-
-    data = [
-        {
-            "id": s.user.id,
-            "username": s.user.username,
-            "photo_url": s.photo_url or "/static/img/defaultprofile.png",
-            "bio": s.bio or "Aktif bermain padel!",
-        }
-        for s in suggestions
-    ]
-    return JsonResponse({"suggestions": data})
+    suggestions = suggestions_for(request.user)
+    return JsonResponse({"suggestions": _suggestion_data(request.user, suggestions)})
 
 @login_required
 def get_chat_history(request, username):
@@ -495,21 +662,51 @@ def get_chat_history(request, username):
         return JsonResponse({"success": False, "message": "User tidak ditemukan."})
 
     # Pastikan mereka teman
-    if target.profile not in request.user.profile.friends.all():
+    if not are_friends(request.user, target):
         return JsonResponse({"success": False, "message": "Bukan teman."})
 
-    messages = ChatMessage.objects.filter(
-        sender__in=[request.user, target],
-        receiver__in=[request.user, target]
-    ).order_by("timestamp")
+    # ?after=<id>  -> pesan yang lebih baru dari id tsb (ambil pesan baru saja)
+    # ?before=<id> -> halaman pesan yang lebih lama dari id tsb
+    # ?limit=<n> saja -> n pesan terakhir
+    # tanpa parameter -> seluruh riwayat (format lama) untuk client yang belum update
+    try:
+        after = int(request.GET["after"]) if "after" in request.GET else None
+        before = int(request.GET["before"]) if "before" in request.GET else None
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Cursor tidak valid."}, status=400)
+    limit = parse_limit(request, CHAT_PAGE_SIZE, CHAT_MAX_PAGE_SIZE)
+
+    messages = ChatMessage.objects.filter(conversation=conversation_key(request.user.id, target.id))
+    if after is None and before is None and "limit" not in request.GET:
+        page = list(messages.order_by("id"))
+        has_more = False
+    elif after is not None:
+        page = list(messages.filter(id__gt=after).order_by("id")[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        if before is not None:
+            messages = messages.filter(id__lt=before)
+        page = list(messages.order_by("-id")[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
 
+    usernames = {request.user.id: request.user.username, target.id: target.username}
     data = [
-        {   "sender": msg.sender.username,
+        {   "id": msg.id,
+            "sender": usernames[msg.sender_id],
             "message": msg.message,
             "timestamp": msg.timestamp.isoformat()
-        } for msg in messages]
+        } for msg in page]
 
-    return JsonResponse({"success": True, "messages": data})
+    return JsonResponse({
+        "success": True,
+        "messages": data,
+        "has_more": has_more,
+        # untuk ?before= (halaman lebih lama) dan ?after= (pesan baru berikutnya)
+        "oldest_id": page[0].id if page else before,
+        "latest_id": page[-1].id if page else after,
+    })
 
 @csrf_exempt
 def send_chat_message(request):
@@ -528,8 +725,146 @@ def send_chat_message(request):
     if not target:
         return JsonResponse({"success": False, "message": "User tidak ditemukan."})
 
-    if target.profile not in request.user.profile.friends.all():
+    if not are_friends(request.user, target):
         return JsonResponse({"success": False, "message": "Tidak dapat mengirim pesan ke non-teman."})
 
-    ChatMessage.objects.create(sender=request.user, receiver=target, message=text)
-    return JsonResponse({"success": True, "message": "Pesan terkirim."})
\ No newline at end of file
+    chat = ChatMessage.objects.create(sender=request.user, receiver=target, message=text)
+    # Dorong ke stream realtime penerima (lihat accounts/realtime.py)
+    publish_chat_message(chat, request.user.username, target.username)
+    return JsonResponse({"success": True, "message": "Pesan terkirim.", "id": chat.id})
+
+
+@login_required
+def chat_inbox(request):
+    """
+    Daftar percakapan user: pesan terakhir dan jumlah pesan belum dibaca
+    per lawan chat, terbaru dulu. Selalu dua query berapa pun jumlah
+    percakapannya (agregasi per ChatMessage.conversation, lalu ambil pesan
+    terakhirnya sekaligus).
+    """
+    user = request.user
+    summaries = list(
+        ChatMessage.objects
+        .filter(Q(sender=user) | Q(receiver=user))
+        .order_by()
+        .values("conversation")
+        .annotate(
+            last_id=Max("id"),
+            unread=Count("id", filter=Q(receiver=user, is_read=False)),
+        )
+    )
+    unread = {row["last_id"]: row["unread"] for row in summaries}
+    last_messages = (
+        ChatMessage.objects
+        .filter(id__in=unread)
+        .select_related("sender", "receiver")
+        .order_by("-id")
+    )
+
+    conversations = []
+    for msg in last_messages:
+        other = msg.receiver if msg.sender_id == user.id else msg.sender
+        conversations.append({
+            "username": other.username,
+            "unread": unread[msg.id],
+            "last_message": {
+                "id": msg.id,
+                "sender": msg.sender.username,
+                "message": msg.message,
+                "timestamp": msg.timestamp.isoformat(),
+            },
+        })
+
+    return JsonResponse({
+        "success": True,
+        "conversations": conversations,
+        "total_unread": sum(unread.values()),
+    })
+
+
+@login_required
+@require_POST
+def mark_chat_read(request):
+    """Tandai semua pesan dari `username` ke user sebagai sudah dibaca (satu UPDATE)."""
+    target = User.objects.filter(username=request.POST.get("username")).first()
+    if not target:
+        return JsonResponse({"success": False, "message": "User tidak ditemukan."})
+
+    updated = ChatMessage.objects.filter(
+        conversation=conversation_key(request.user.id, target.id),
+        receiver=request.user,
+        is_read=False,
+    ).update(is_read=True)
+    return JsonResponse({"success": True, "updated": updated})
+
+
+# ===== Chat realtime (Server-Sent Events, butuh server ASGI) =====
+
+@login_required
+async def chat_stream(request):
+    """
+    Stream pesan chat baru untuk user yang login (text/event-stream).
+
+    Setiap pesan dikirim sebagai "event: message" dengan data JSON seperti
+    get_chat_history. Saat reconnect, browser mengirim Last-Event-ID dan
+    pesan yang terlewat dikirim ulang lebih dulu.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Di worker WSGI stream tanpa akhir akan menahan worker selamanya
+        return JsonResponse({"success": False, "message": "Realtime chat membutuhkan server ASGI."}, status=503)
+
+    user = await request.auser()
+    try:
+        last_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_id = None
+
+    async def events():
+        # Subscribe sebelum replay agar tidak ada pesan yang jatuh di antaranya.
+        # Pesan yang masuk selama replay bisa datang lagi lewat broker, jadi id
+        # yang sudah dikirim replay diingat dan dilewati sekali saja. Broker
+        # tidak menjamin urutan id, jadi jangan memfilter dengan "id <= terakhir".
+        subscription = get_broker().subscribe(user_channel(user.id))
+        replayed = set()
+        try:
+            yield f"retry: {CHAT_STREAM_RETRY_MS}\n\n"
+            cursor = last_id
+            while cursor is not None:
+                page = await sync_to_async(_missed_chat_events)(user, cursor)
+                for event in page:
+                    replayed.add(event["id"])
+                    yield _sse(event)
+                # Halaman penuh berarti mungkin masih ada sisa backlog
+                cursor = page[-1]["id"] if len(page) == CHAT_MAX_PAGE_SIZE else None
+            while True:
+                try:
+                    event = await subscription.get(CHAT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    replayed.clear()  # antrean sudah sepi, overlap replay selesai
+                    yield ": ping\n\n"  # jaga koneksi tetap hidup di proxy
+                    continue
+                if event["id"] in replayed:
+                    replayed.discard(event["id"])
+                    continue
+                yield _sse(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _sse(event):
+    return f"event: message\nid: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _missed_chat_events(user, last_id):
+    messages = (
+        ChatMessage.objects
+        .filter(Q(sender=user) | Q(receiver=user), id__gt=last_id)
+        .select_related("sender", "receiver")
+        .order_by("id")[:CHAT_MAX_PAGE_SIZE]
+    )
+    return [chat_event(m, m.sender.username, m.receiver.username) for m in messages]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
+from sync.models import SyncTrackedMixin
 
 class Venue(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -17,7 +18,10 @@ class Venue(models.Model):
     def __str__(self):
         return self.name
 
-class Booking(models.Model):
+class Booking(SyncTrackedMixin, models.Model):
+    sync_key = 'booking'
+    sync_owner_field = 'user_id'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE)
@@ -370,37 +370,42 @@ def api_my_bookings(request):
             | models.Q(booking_date=today, start_time__lte=current_time)
         )
 
-    bookings = bookings.order_by('-booking_date', '-start_time')
+    bookings = bookings.select_related('venue').order_by('-booking_date', '-start_time')
+
+    results = [serialize_booking(booking, now) for booking in bookings]
+    return JsonResponse({"results": results})
 
-    results = []
-    for booking in bookings:
-        is_past = (
-            booking.booking_date < today
-            or (
-                booking.booking_date == today
-                and booking.start_time <= current_time
-            )
-        )
-        status = "Booking complete" if is_past else "Booking on going"
-        results.append(
-            {
-                "id": str(booking.id),
-                "venue": {
-                    "id": str(booking.venue.id),
-                    "name": booking.venue.name,
-                    "location": booking.venue.location,
-                    "address": booking.venue.address,
-                    "image_url": booking.venue.image_url,
-                },
-                "booking_date": booking.booking_date.strftime("%Y-%m-%d"),
-                "start_time": booking.start_time.strftime("%H:%M"),
-                "end_time": booking.end_time.strftime("%H:%M"),
-                "customer_name": booking.customer_name,
-                "customer_email": booking.customer_email,
-                "customer_phone": booking.customer_phone,
-                "status": status,
-                "is_past": is_past,
-            }
-        )
 
-    return JsonResponse({"results": results})
\ No newline at end of file
+def serialize_booking(booking, now=None):
+    """Format Booking ke dict JSON (dipakai api_my_bookings dan sync feed)."""
+    jakarta_tz = pytz.timezone('Asia/Jakarta')
+    now = (now or timezone.now()).astimezone(jakarta_tz)
+    today = now.date()
+    current_time = now.time()
+
+    is_past = (
+        booking.booking_date < today
+        or (
+            booking.booking_date == today
+            and booking.start_time <= current_time
+        )
+    )
+    status = "Booking complete" if is_past else "Booking on going"
+    return {
+        "id": str(booking.id),
+        "venue": {
+            "id": str(booking.venue.id),
+            "name": booking.venue.name,
+            "location": booking.venue.location,
+            "address": booking.venue.address,
+            "image_url": booking.venue.image_url,
+        },
+        "booking_date": booking.booking_date.strftime("%Y-%m-%d"),
+        "start_time": booking.start_time.strftime("%H:%M"),
+        "end_time": booking.end_time.strftime("%H:%M"),
+        "customer_name": booking.customer_name,
+        "customer_email": booking.customer_email,
+        "customer_phone": booking.customer_phone,
+        "status": status,
+        "is_past": is_past,
+    }
\ No newline at end of file
@@ -9,6 +9,8 @@ class LapanganPadelAdmin(admin.ModelAdmin):
         'alamat',
         'rating',
         'total_review',
+        'app_rating',
+        'app_total_review',
         'is_featured',
         'created_at',
         'updated_at'
@@ -0,0 +1,58 @@
+"""Helper bersama untuk command import_lapangan dan export_lapangan."""
+import os
+import sys
+import time
+
+# Kolom yang ikut di-import/export. Urutannya dipakai sebagai header CSV.
+LAPANGAN_FIELDS = (
+    'place_id',
+    'nama',
+    'alamat',
+    'rating',
+    'total_review',
+    'thumbnail_url',
+    'notes',
+    'is_featured',
+)
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path, explicit=None):
+    """Pakai --format kalau ada, kalau tidak tebak dari ekstensi file."""
+    if explicit:
+        return explicit
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def open_stream(path, mode, std=None):
+    """Buka file, atau stream standar (std/stdin) jika path = '-'."""
+    if path == '-':
+        return std or sys.stdin
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+class Progress:
+    """Menghitung jumlah baris dan throughput (baris/detik)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+
+    def add(self, n):
+        self.rows += n
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def line(self, prefix):
+        return f'{prefix}: {self.rows} rows in {self.elapsed:.2f}s ({self.rate:,.0f} rows/s)'
@@ -0,0 +1,61 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.models import LapanganPadel
+from ._lapangan_io import FORMATS, LAPANGAN_FIELDS, Progress, detect_format, open_stream
+
+
+class Command(BaseCommand):
+    help = 'Export LapanganPadel ke CSV/JSONL secara streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File tujuan, atau '-' untuk stdout")
+        parser.add_argument('--format', choices=FORMATS, help='Default: ditebak dari ekstensi file')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size harus >= 1')
+
+        # Kalau data ditulis ke stdout, progress dikirim ke stderr agar tidak tercampur
+        log = self.stderr if path == '-' else self.stdout
+
+        # values() + iterator() supaya memori konstan: tidak ada instance model
+        # dan tidak ada result cache queryset.
+        rows = (
+            LapanganPadel.objects
+            .order_by('pk')
+            .values(*LAPANGAN_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+
+        progress = Progress()
+        try:
+            stream = open_stream(path, 'w', std=self.stdout)
+        except OSError as e:
+            raise CommandError(f'Tidak bisa membuka {path}: {e}')
+
+        try:
+            if fmt == 'csv':
+                writer = csv.DictWriter(stream, fieldnames=LAPANGAN_FIELDS)
+                writer.writeheader()
+                write = writer.writerow
+            else:
+                def write(row):
+                    stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+            for row in rows:
+                write(row)
+                progress.add(1)
+                if progress.rows % chunk_size == 0:
+                    log.write(progress.line('Exported'))
+        finally:
+            if path != '-':
+                stream.close()
+
+        log.write(self.style.SUCCESS(progress.line('Done')))
@@ -0,0 +1,163 @@
+import csv
+import json
+import uuid
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from home.models import LapanganPadel
+from sync.models import ChangeLog, record_changes
+from ._lapangan_io import FORMATS, LAPANGAN_FIELDS, Progress, detect_format, open_stream
+
+# Field yang di-update saat place_id sudah ada (place_id sendiri adalah key-nya)
+UPDATE_FIELDS = [f for f in LAPANGAN_FIELDS if f != 'place_id'] + ['updated_at', 'score_stale']
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'ya')
+
+
+def _to_float(value):
+    if value in (None, ''):
+        return None
+    return float(value)
+
+
+def _to_int(value):
+    if value in (None, ''):
+        return None
+    return int(float(value))
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def clean_row(raw):
+    """Ubah satu baris mentah (CSV/JSON) menjadi dict field LapanganPadel.
+
+    Raise ValueError jika baris tidak valid.
+    """
+    if not isinstance(raw, dict):
+        # Baris JSONL yang valid tapi bukan object, misal [] atau "teks"
+        raise ValueError('baris harus berupa object')
+    nama = str(raw.get('nama') or '').strip()
+    alamat = str(raw.get('alamat') or '').strip()
+    if not nama or not alamat:
+        raise ValueError('nama dan alamat wajib diisi')
+
+    return {
+        # Sama seperti create_lapangan_ajax: generate place_id internal jika kosong
+        'place_id': str(raw.get('place_id') or '').strip() or f"internal_{uuid.uuid4().hex}",
+        'nama': nama,
+        'alamat': alamat,
+        'rating': _to_float(raw.get('rating')),
+        'total_review': _to_int(raw.get('total_review')),
+        'thumbnail_url': raw.get('thumbnail_url') or None,
+        'notes': raw.get('notes') or '',
+        'is_featured': _to_bool(raw.get('is_featured')),
+    }
+
+
+def read_rows(stream, fmt):
+    """Generator baris mentah; membaca file secara streaming."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def upsert_chunk(rows):
+    """Upsert satu chunk berdasarkan place_id. Return (created, updated)."""
+    # Jika place_id muncul dua kali di chunk yang sama, baris terakhir yang dipakai
+    by_place_id = {row['place_id']: row for row in rows}
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = LapanganPadel.objects.in_bulk(list(by_place_id), field_name='place_id')
+
+        to_create = []
+        to_update = []
+        for place_id, row in by_place_id.items():
+            obj = existing.get(place_id)
+            if obj is None:
+                to_create.append(LapanganPadel(**row))
+            else:
+                for field, value in row.items():
+                    setattr(obj, field, value)
+                # bulk_update tidak menjalankan auto_now maupun save()
+                obj.updated_at = now
+                obj.score_stale = True
+                to_update.append(obj)
+
+        if to_create:
+            LapanganPadel.objects.bulk_create(to_create)
+        if to_update:
+            LapanganPadel.objects.bulk_update(to_update, UPDATE_FIELDS)
+        # bulk_create/bulk_update tidak memanggil save(), catat sync feed manual
+        record_changes(to_create + to_update, ChangeLog.UPSERT)
+
+    return len(to_create), len(to_update)
+
+
+class Command(BaseCommand):
+    help = 'Import LapanganPadel dari CSV/JSONL secara streaming (upsert berdasarkan place_id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File sumber, atau '-' untuk stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Default: ditebak dari ekstensi file')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size harus >= 1')
+
+        progress = Progress()
+        created_total = updated_total = skipped = 0
+
+        try:
+            stream = open_stream(path, 'r')
+        except OSError as e:
+            raise CommandError(f'Tidak bisa membuka {path}: {e}')
+
+        try:
+            raw_rows = read_rows(stream, fmt)
+            line_no = 0
+            while True:
+                batch = list(islice(raw_rows, chunk_size))
+                if not batch:
+                    break
+
+                rows = []
+                for raw in batch:
+                    line_no += 1
+                    try:
+                        rows.append(clean_row(raw))
+                    except (ValueError, TypeError) as e:
+                        skipped += 1
+                        self.stderr.write(self.style.WARNING(f'Row {line_no} skipped: {e}'))
+
+                if rows:
+                    created, updated = upsert_chunk(rows)
+                    created_total += created
+                    updated_total += updated
+                progress.add(len(batch))
+                self.stdout.write(progress.line('Imported'))
+        except (json.JSONDecodeError, csv.Error) as e:
+            raise CommandError(f'Format {fmt} tidak valid: {e}')
+        finally:
+            if path != '-':
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{progress.line("Done")}: {created_total} created, '
+            f'{updated_total} updated, {skipped} skipped.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from home.ranking import update_scores
+from ._lapangan_io import Progress
+
+
+class Command(BaseCommand):
+    help = (
+        'Hitung ulang skor recommended courts. Jalankan terjadwal (misal tiap 15 menit via cron); '
+        'gunakan --full sesekali (misal tiap malam) agar prior global ikut diperbarui.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Hitung ulang semua lapangan')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        progress = Progress()
+        progress.add(update_scores(full=options['full'], batch_size=options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(progress.line('Recommendation scores updated')))
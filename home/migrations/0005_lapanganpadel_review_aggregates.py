@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    """Isi kolom agregat dari review yang sudah ada (lihat review/aggregates.py)."""
+    LapanganPadel = apps.get_model('home', 'LapanganPadel')
+    Review = apps.get_model('review', 'Review')
+
+    def star_bucket(rating):
+        rating = float(rating or 0)
+        for star, lower in ((5, 4.5), (4, 3.5), (3, 2.5), (2, 1.5)):
+            if rating >= lower:
+                return star
+        return 1
+
+    totals = {}
+    for lapangan_id, rating in Review.objects.values_list('lapangan_id', 'rating').iterator():
+        row = totals.setdefault(lapangan_id, {'app_total_review': 0, 'app_rating_sum': 0.0})
+        row['app_total_review'] += 1
+        row['app_rating_sum'] += float(rating or 0)
+        star = f'app_star_{star_bucket(rating)}'
+        row[star] = row.get(star, 0) + 1
+
+    for lapangan_id, row in totals.items():
+        row['app_rating'] = row['app_rating_sum'] / row['app_total_review']
+        LapanganPadel.objects.filter(pk=lapangan_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_alter_lapanganpadel_place_id'),
+        ('review', '0009_alter_review_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_rating',
+            field=models.FloatField(blank=True, db_index=True, help_text='Rata-rata rating review dari aplikasi', null=True),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_rating_sum',
+            field=models.FloatField(default=0, help_text='Total nilai rating review dari aplikasi'),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_star_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_star_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_star_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_star_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_star_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_total_review',
+            field=models.PositiveIntegerField(default=0, help_text='Jumlah review dari aplikasi'),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
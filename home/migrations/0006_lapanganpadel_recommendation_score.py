@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_lapanganpadel_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='recommendation_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='score_stale',
+            field=models.BooleanField(db_index=True, default=True, help_text='Skor perlu dihitung ulang'),
+        ),
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='score_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_lapanganpadel_recommendation_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lapanganpadel',
+            name='app_review_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
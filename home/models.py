@@ -1,8 +1,11 @@
 # home/models.py
 from django.db import models
 from django.contrib.auth.models import User
+from sync.models import SyncTrackedMixin
+
+class LapanganPadel(SyncTrackedMixin, models.Model):
+    sync_key = 'lapangan'
 
-class LapanganPadel(models.Model):
     place_id = models.CharField(
         max_length=255, 
         unique=True, 
@@ -18,6 +21,24 @@ class LapanganPadel(models.Model):
     # Field tambahan untuk internal
     notes = models.TextField(blank=True, help_text="Catatan internal tentang lapangan ini")
     is_featured = models.BooleanField(default=False, help_text="Tampilkan di recommended")
+
+    # Agregat review internal (model Review), dijaga oleh signal di review.models
+    # lewat update F() sehingga tidak perlu query Avg per lapangan.
+    app_total_review = models.PositiveIntegerField(default=0, help_text="Jumlah review dari aplikasi")
+    app_rating_sum = models.FloatField(default=0, help_text="Total nilai rating review dari aplikasi")
+    app_rating = models.FloatField(null=True, blank=True, db_index=True, help_text="Rata-rata rating review dari aplikasi")
+    app_star_1 = models.PositiveIntegerField(default=0)
+    app_star_2 = models.PositiveIntegerField(default=0)
+    app_star_3 = models.PositiveIntegerField(default=0)
+    app_star_4 = models.PositiveIntegerField(default=0)
+    app_star_5 = models.PositiveIntegerField(default=0)
+    # Naik setiap agregat di atas berubah; bagian dari kunci cache stats review
+    app_review_version = models.PositiveIntegerField(default=0)
+
+    # Skor rekomendasi yang sudah dihitung (lihat home/ranking.py)
+    recommendation_score = models.FloatField(default=0, db_index=True)
+    score_updated_at = models.DateTimeField(null=True, blank=True)
+    score_stale = models.BooleanField(default=True, db_index=True, help_text="Skor perlu dihitung ulang")
     
     
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, help_text="User yang menambahkan data ini")
@@ -31,4 +52,12 @@ class LapanganPadel(models.Model):
         ordering = ['-rating', '-total_review']
 
     def __str__(self):
-        return self.nama
\ No newline at end of file
+        return self.nama
+
+    def save(self, *args, **kwargs):
+        # Data lapangan berubah -> skor rekomendasi perlu dihitung ulang
+        self.score_stale = True
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'score_stale'}
+        super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Perhitungan skor "recommended courts".
+
+Skor disimpan di LapanganPadel.recommendation_score (di-index) sehingga
+endpoint recommended cukup ORDER BY kolom tersebut. Skor dihitung ulang
+oleh command update_recommendations (dijalankan terjadwal, misal cron):
+
+    score = bayes_rating + BOOKING_WEIGHT * ln(1 + booking_terbaru) + FEATURED_BOOST
+
+bayes_rating adalah rata-rata Bayesian dari gabungan rating Google dan
+review aplikasi, ditarik ke rata-rata global sebanyak PRIOR_WEIGHT review
+virtual. Dengan begitu lapangan 5.0 dengan 1 review tidak mengalahkan
+lapangan 4.8 dengan 2000 review.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from booking.models import Booking
+from .models import LapanganPadel
+
+PRIOR_WEIGHT = 20
+DEFAULT_MEAN = 3.0
+BOOKING_WINDOW = timedelta(days=30)
+BOOKING_WEIGHT = 0.15
+FEATURED_BOOST = 0.25
+
+def global_mean():
+    """Rata-rata rating seluruh lapangan (Google + aplikasi), dipakai sebagai prior."""
+    totals = LapanganPadel.objects.aggregate(
+        google_sum=Sum(F('rating') * F('total_review')),
+        google_n=Sum('total_review', filter=Q(rating__isnull=False)),
+        app_sum=Sum('app_rating_sum'),
+        app_n=Sum('app_total_review'),
+    )
+    n = (totals['google_n'] or 0) + (totals['app_n'] or 0)
+    if not n:
+        return DEFAULT_MEAN
+    return ((totals['google_sum'] or 0) + (totals['app_sum'] or 0)) / n
+
+
+def recent_booking_counts(now=None):
+    """Jumlah booking per nama venue dalam BOOKING_WINDOW terakhir.
+
+    Booking terhubung ke booking.Venue, yang dipetakan ke LapanganPadel lewat
+    nama (sama seperti lapangan_to_venue).
+    """
+    now = now or timezone.now()
+    rows = (
+        Booking.objects
+        .filter(created_at__gte=now - BOOKING_WINDOW)
+        .order_by()
+        .values('venue__name')
+        .annotate(n=Count('id'))
+    )
+    return {row['venue__name']: row['n'] for row in rows}
+
+
+def compute_score(lapangan, mean, recent_bookings=0):
+    google_n = (lapangan.total_review or 0) if lapangan.rating is not None else 0
+    google_sum = (lapangan.rating or 0) * google_n
+    votes = google_n + lapangan.app_total_review
+    rating_sum = google_sum + lapangan.app_rating_sum
+
+    bayes = (rating_sum + PRIOR_WEIGHT * mean) / (votes + PRIOR_WEIGHT)
+    score = bayes + BOOKING_WEIGHT * math.log1p(recent_bookings)
+    if lapangan.is_featured:
+        score += FEATURED_BOOST
+    return round(score, 6)
+
+
+def _dirty_lapangan(now):
+    """Queryset lapangan yang skornya perlu dihitung ulang sejak run terakhir.
+
+    Return None jika belum pernah ada run (harus full recompute).
+    """
+    last_run = LapanganPadel.objects.aggregate(last=Max('score_updated_at'))['last']
+    if last_run is None:
+        return None
+
+    # Venue yang jumlah booking-nya dalam window berubah: ada booking baru,
+    # atau ada booking yang keluar dari window sejak run terakhir.
+    changed_venues = (
+        Booking.objects
+        .filter(
+            Q(created_at__gte=last_run)
+            | Q(created_at__gte=last_run - BOOKING_WINDOW, created_at__lt=now - BOOKING_WINDOW)
+        )
+        .values('venue__name')
+    )
+    return LapanganPadel.objects.filter(
+        Q(score_stale=True) | Q(score_updated_at__isnull=True) | Q(nama__in=changed_venues)
+    )
+
+
+def update_scores(full=False, batch_size=500):
+    """Hitung ulang skor rekomendasi. Return jumlah lapangan yang diperbarui.
+
+    Mode inkremental hanya menyentuh lapangan yang datanya berubah; prior
+    (rata-rata global) baru ikut berubah untuk semua lapangan saat full=True.
+    """
+    now = timezone.now()
+    queryset = None if full else _dirty_lapangan(now)
+    if queryset is None:
+        queryset = LapanganPadel.objects.all()
+
+    mean = global_mean()
+    bookings = recent_booking_counts(now)
+
+    fields = ['pk', 'nama', 'rating', 'total_review', 'app_total_review', 'app_rating_sum', 'is_featured']
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        # Tandai sudah diambil sebelum datanya dibaca: perubahan yang masuk
+        # setelah ini menandai stale lagi dan diproses pada run berikutnya.
+        LapanganPadel.objects.filter(pk__in=batch_ids).update(score_stale=False)
+        batch = list(LapanganPadel.objects.filter(pk__in=batch_ids).only(*fields))
+        for lapangan in batch:
+            lapangan.recommendation_score = compute_score(lapangan, mean, bookings.get(lapangan.nama, 0))
+            lapangan.score_updated_at = now
+        LapanganPadel.objects.bulk_update(batch, ['recommendation_score', 'score_updated_at'])
+    return len(ids)
@@ -1,12 +1,20 @@
 from django.test import TestCase
 
 # Create your tests here.
+import csv
 import json
+import os
+import tempfile
+from datetime import date, time as dtime
+from io import StringIO
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from unittest.mock import patch # Penting untuk mem-mock API
+from booking.models import Booking, Venue
 from .models import LapanganPadel
+from .ranking import update_scores
 
 class ViewTests(TestCase):
     
@@ -365,4 +373,115 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 500)
         data = response.json()
         self.assertEqual(data['status'], 'error')
-        self.assertIn('Google Maps API key not configured', data['message'])
\ No newline at end of file
+        self.assertIn('Google Maps API key not configured', data['message'])
+
+
+class LapanganBulkIOCommandTests(TestCase):
+    """Tes command import_lapangan & export_lapangan."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        LapanganPadel.objects.create(place_id="place_lama", nama="Lapangan Lama", alamat="Jl. Lama", rating=3.0)
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_import_jsonl_upserts_by_place_id(self):
+        """Baris dengan place_id yang sudah ada di-update, sisanya dibuat."""
+        path = self._path("lapangan.jsonl")
+        rows = [
+            {"place_id": "place_lama", "nama": "Lapangan Diupdate", "alamat": "Jl. Baru", "rating": 4.5},
+            {"place_id": "place_baru", "nama": "Lapangan Baru", "alamat": "Jl. X", "is_featured": True},
+            {"nama": "Tanpa Place ID", "alamat": "Jl. Y"},
+            {"place_id": "invalid", "nama": "", "alamat": "Jl. Z"},
+        ]
+        with open(path, "w") as f:
+            f.write("\n".join(json.dumps(r) for r in rows))
+
+        out = StringIO()
+        call_command("import_lapangan", path, "--chunk-size", "2", stdout=out, stderr=StringIO())
+
+        self.assertEqual(LapanganPadel.objects.count(), 3)
+        lama = LapanganPadel.objects.get(place_id="place_lama")
+        self.assertEqual(lama.nama, "Lapangan Diupdate")
+        self.assertEqual(lama.rating, 4.5)
+        self.assertTrue(LapanganPadel.objects.get(place_id="place_baru").is_featured)
+        self.assertTrue(LapanganPadel.objects.get(nama="Tanpa Place ID").place_id.startswith("internal_"))
+        self.assertIn("2 created, 1 updated, 1 skipped", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+    def test_import_jsonl_non_object_rows_skipped(self):
+        path = self._path("campur.jsonl")
+        with open(path, "w") as f:
+            f.write('[]\nnull\n"teks"\n{"nama": "Valid", "alamat": "Jl. V"}\n')
+
+        out, err = StringIO(), StringIO()
+        call_command("import_lapangan", path, stdout=out, stderr=err)
+        self.assertTrue(LapanganPadel.objects.filter(nama="Valid").exists())
+        self.assertIn("1 created, 0 updated, 3 skipped", out.getvalue())
+        self.assertIn("Row 1 skipped", err.getvalue())
+
+    def test_export_csv_roundtrip(self):
+        """Hasil export CSV bisa di-import kembali tanpa duplikat."""
+        LapanganPadel.objects.create(place_id="place_dua", nama="Dua", alamat="Jl. Dua", total_review=7)
+        path = self._path("lapangan.csv")
+        call_command("export_lapangan", path, "--chunk-size", "1", stdout=StringIO())
+
+        with open(path, newline="") as f:
+            exported = list(csv.DictReader(f))
+        self.assertEqual([r["place_id"] for r in exported], ["place_lama", "place_dua"])
+
+        call_command("import_lapangan", path, stdout=StringIO())
+        self.assertEqual(LapanganPadel.objects.count(), 2)
+        self.assertEqual(LapanganPadel.objects.get(place_id="place_dua").total_review, 7)
+
+    def test_export_jsonl_to_stdout(self):
+        out = StringIO()
+        call_command("export_lapangan", "-", "--format", "jsonl", stdout=out, stderr=StringIO())
+        lines = [json.loads(line) for line in out.getvalue().splitlines() if line]
+        self.assertEqual(lines[0]["place_id"], "place_lama")
+        self.assertEqual(lines[0]["nama"], "Lapangan Lama")
+
+
+class RecommendationRankingTests(TestCase):
+    """Tes skor recommended courts dan endpoint-nya."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123')
+        self.sedikit = LapanganPadel.objects.create(place_id="r1", nama="Sedikit", alamat="Jl. 1", rating=5.0, total_review=1)
+        self.banyak = LapanganPadel.objects.create(place_id="r2", nama="Banyak", alamat="Jl. 2", rating=4.8, total_review=2000)
+        self.biasa = LapanganPadel.objects.create(place_id="r3", nama="Biasa", alamat="Jl. 3", rating=4.0, total_review=300)
+
+    def test_bayesian_score_prefers_many_reviews(self):
+        self.assertEqual(update_scores(), 3)
+        self.sedikit.refresh_from_db()
+        self.banyak.refresh_from_db()
+        self.assertGreater(self.banyak.recommendation_score, self.sedikit.recommendation_score)
+        self.assertFalse(self.banyak.score_stale)
+
+    def test_incremental_update_only_touches_changed_lapangan(self):
+        update_scores()
+        self.assertEqual(update_scores(), 0)
+
+        # Lapangan diubah -> stale
+        self.biasa.is_featured = True
+        self.biasa.save()
+        # Booking baru di venue dengan nama yang sama -> ikut dihitung ulang
+        venue = Venue.objects.create(name="Sedikit", location="X", address="Jl. 1")
+        Booking.objects.create(
+            user=self.user, venue=venue, booking_date=date.today(),
+            start_time=dtime(10, 0), end_time=dtime(11, 0),
+            customer_name="A", customer_email="a@a.com", customer_phone="1",
+        )
+        self.assertEqual(update_scores(), 2)
+        self.assertEqual(update_scores(full=True), 3)
+
+    def test_recommended_endpoint_uses_precomputed_order(self):
+        update_scores()
+        response = self.client.get(reverse('home:get_recommended_lapangan_json') + '?limit=2')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['pk'], self.banyak.pk)
+        self.assertIn('recommendation_score', data[0]['fields'])
@@ -9,10 +9,12 @@ from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core import serializers
+from django.db.models import F
 from .models import LapanganPadel
 from booking.models import Venue
 from .forms import LapanganPadelForm
 from django.utils.html import strip_tags
+from sportspace.ratelimit import rate_limit
 
 def get_google_maps_data(query="lapangan padel di jakarta"):
     api_key = settings.GOOGLE_MAPS_API_KEY
@@ -84,27 +86,67 @@ def get_lapangan_modal(request, id=None):
     return render(request, 'home/modal.html', context)
 
 
+# Urutan yang bisa dipilih lewat ?sort= di get_lapangan_json
+LAPANGAN_SORTS = {
+    # Rating dari review aplikasi (kolom agregat, tanpa query tambahan)
+    'app_rating': [F('app_rating').desc(nulls_last=True), '-app_total_review'],
+    'google_rating': [F('rating').desc(nulls_last=True), '-total_review'],
+}
+
+def _lapangan_to_json(lapangan):
+    return {
+        "pk": lapangan.pk,
+        "model": "home.lapanganpadel", # Meniru format serializer asli
+        "fields": {
+            "nama": lapangan.nama,
+            "alamat": lapangan.alamat,
+            "rating": lapangan.rating,
+            "total_review": lapangan.total_review,
+            "thumbnail_url": lapangan.thumbnail_url,
+            "is_featured": lapangan.is_featured,
+            "app_rating": lapangan.app_rating,
+            "app_total_review": lapangan.app_total_review,
+            
+            # Secara eksplisit tambahkan ID user yang membuat data ini.
+            # Jika `added_by` kosong (untuk data lama), kirim `None`.
+            # Pakai added_by_id supaya tidak query User per lapangan.
+            "added_by": lapangan.added_by_id
+        }
+    }
+
+
 #@login_required(login_url='/accounts/login/')
 def get_lapangan_json(request):
     lapangan_objects = LapanganPadel.objects.all()
+    sort = request.GET.get('sort')
+    if sort in LAPANGAN_SORTS:
+        lapangan_objects = lapangan_objects.order_by(*LAPANGAN_SORTS[sort])
+    data = [_lapangan_to_json(lapangan) for lapangan in lapangan_objects]
+    return JsonResponse(data, safe=False)
+
+
+RECOMMENDED_DEFAULT_LIMIT = 10
+RECOMMENDED_MAX_LIMIT = 50
+
+#@login_required(login_url='/accounts/login/')
+def get_recommended_lapangan_json(request):
+    """
+    Recommended courts, diurutkan dari skor yang sudah dihitung
+    (recommendation_score, di-index). Skor diperbarui oleh command
+    update_recommendations, bukan saat request.
+    """
+    try:
+        limit = int(request.GET.get('limit', RECOMMENDED_DEFAULT_LIMIT))
+    except ValueError:
+        limit = RECOMMENDED_DEFAULT_LIMIT
+    limit = max(1, min(limit, RECOMMENDED_MAX_LIMIT))
+
+    lapangan_objects = LapanganPadel.objects.order_by('-recommendation_score', 'pk')[:limit]
     data = []
     for lapangan in lapangan_objects:
-        data.append({
-            "pk": lapangan.pk,
-            "model": "home.lapanganpadel", # Meniru format serializer asli
-            "fields": {
-                "nama": lapangan.nama,
-                "alamat": lapangan.alamat,
-                "rating": lapangan.rating,
-                "total_review": lapangan.total_review,
-                "thumbnail_url": lapangan.thumbnail_url,
-                "is_featured": lapangan.is_featured,
-                
-                # Secara eksplisit tambahkan ID user yang membuat data ini.
-                # Jika `added_by` kosong (untuk data lama), kirim `None`.
-                "added_by": lapangan.added_by.id if lapangan.added_by else None
-            }
-        })
+        item = _lapangan_to_json(lapangan)
+        item["fields"]["recommendation_score"] = lapangan.recommendation_score
+        data.append(item)
     return JsonResponse(data, safe=False)
 
 @login_required(login_url='/accounts/login/')
@@ -121,6 +163,8 @@ def get_lapangan_by_id(request, id):
             'thumbnail_url': lapangan.thumbnail_url,
             'notes': lapangan.notes,
             'is_featured': lapangan.is_featured,
+            'app_rating': lapangan.app_rating,
+            'app_total_review': lapangan.app_total_review,
         }
         return JsonResponse(data)
     except LapanganPadel.DoesNotExist:
@@ -236,6 +280,7 @@ def delete_lapangan_ajax(request, id):
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
         
 @login_required(login_url='/accounts/login/')
+@rate_limit('refresh_from_api', '5/h')  # setiap panggilan memakai kuota Google Places API
 def refresh_from_api(request):
     try:
         # Check if API key is configured
@@ -290,6 +335,7 @@ def refresh_from_api(request):
 
 
 
+@rate_limit('proxy_image', '60/m', key='ip')
 def proxy_image(request):
     image_url = request.GET.get('url')
     if not image_url:
@@ -0,0 +1,104 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from home.models import LapanganPadel
+from matchmaking.models import QueueEntry
+from matchmaking.queue import Matchmaker, MatchQueue
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark antrean matchmaking: index in-memory dan end-to-end dengan database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100000, help='Jumlah entri untuk index in-memory')
+        parser.add_argument('--db-entries', type=int, default=5000, help='Jumlah entri untuk benchmark database')
+        parser.add_argument('--venues', type=int, default=50)
+        parser.add_argument('--slots', type=int, default=24)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        venues = list(range(1, options['venues'] + 1))
+        base = datetime(2026, 1, 1, 8)
+        slots = [(base + timedelta(hours=i)).isoformat() for i in range(options['slots'])]
+
+        def preference():
+            # Sebagian pemain tidak peduli venue/jam
+            venue = rng.choice(venues) if rng.random() < 0.7 else None
+            slot = rng.choice(slots) if rng.random() < 0.7 else None
+            return rng.choice(('1v1', '2v2')), venue, slot
+
+        self._bench_index(options['entries'], preference)
+        self._bench_database(options['db_entries'], options['venues'], options['slots'], rng)
+
+    def _bench_index(self, count, preference):
+        entries = [(entry_id, *preference()) for entry_id in range(1, count + 1)]
+
+        queue = MatchQueue()
+        start = time.perf_counter()
+        for entry_id, mode, venue, slot in entries:
+            queue.push(entry_id, mode, venue, slot)
+        push_seconds = time.perf_counter() - start
+
+        queue = MatchQueue()
+        matches = 0
+        start = time.perf_counter()
+        for entry_id, mode, venue, slot in entries:
+            if queue.match_or_push(entry_id, mode, venue, slot) is not None:
+                matches += 1
+        match_seconds = time.perf_counter() - start
+
+        self.stdout.write(f'Index in-memory, {count} entri:')
+        self.stdout.write(f'  enqueue tanpa matching : {count / push_seconds:12,.0f} entri/detik')
+        self.stdout.write(
+            f'  enqueue + matching     : {count / match_seconds:12,.0f} entri/detik, '
+            f'{matches / match_seconds:10,.0f} match/detik ({matches} match, {len(queue)} menunggu)'
+        )
+
+    def _bench_database(self, count, venue_count, slot_count, rng):
+        # Semua data dibuat dalam transaksi yang di-rollback di akhir
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(User(username=f'bench_mm_{i}') for i in range(count))
+                users = list(User.objects.filter(username__startswith='bench_mm_').order_by('id'))
+                LapanganPadel.objects.bulk_create(
+                    LapanganPadel(nama=f'Bench {i}', alamat='-') for i in range(venue_count)
+                )
+                venues = list(LapanganPadel.objects.filter(nama__startswith='Bench ', alamat='-'))
+                base = timezone.now().replace(minute=0, second=0, microsecond=0)
+                slots = [base + timedelta(hours=i) for i in range(slot_count)]
+
+                matchmaker = Matchmaker()
+                matchmaker.sync()
+                matches = 0
+                start = time.perf_counter()
+                for user in users:
+                    entry = QueueEntry.objects.create(
+                        user=user,
+                        mode=rng.choice(('1v1', '2v2')),
+                        venue=rng.choice(venues) if rng.random() < 0.7 else None,
+                        slot=rng.choice(slots) if rng.random() < 0.7 else None,
+                        teammate='Bench',
+                    )
+                    matches += len(matchmaker.sync(entry))
+                seconds = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f'Database end-to-end (enqueue + sync per request), {count} entri:')
+        self.stdout.write(
+            f'  {count / seconds:,.0f} enqueue/detik, {matches / seconds:,.0f} match/detik '
+            f'({matches} match, {seconds * 1000 / count:.2f} ms per enqueue)'
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark selesai.'))
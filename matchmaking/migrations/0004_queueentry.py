@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_lapanganpadel_recommendation_score'),
+        ('matchmaking', '0003_remove_match_is_full_alter_match_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('1v1', '1 vs 1'), ('2v2', '2 vs 2')], max_length=3)),
+                ('slot', models.DateTimeField(blank=True, null=True)),
+                ('teammate', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='matchmaking.match')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_entries', to=settings.AUTH_USER_MODEL)),
+                ('venue', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='home.lapanganpadel')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('match__isnull', True)), fields=('user',), name='one_waiting_entry_per_user')],
+            },
+        ),
+    ]
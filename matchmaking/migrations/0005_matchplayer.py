@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_memberships(apps, schema_editor):
+    # Sebelum constraint ada, join bersamaan bisa membuat user terdaftar di
+    # beberapa match; pertahankan pendaftaran paling awal
+    MatchPlayer = apps.get_model('matchmaking', 'MatchPlayer')
+    duplicated = (
+        MatchPlayer.objects.values('user_id')
+        .annotate(first_id=Min('id'), n=models.Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicated:
+        MatchPlayer.objects.filter(user_id=row['user_id']).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matchmaking', '0004_queueentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Tabel relasi otomatis dijadikan model eksplisit tanpa mengubah tabelnya
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='MatchPlayer',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matchmaking.match')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'matchmaking_match_players',
+                        'unique_together': {('match', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='match',
+                    name='players',
+                    field=models.ManyToManyField(blank=True, related_name='matches_joined', through='matchmaking.MatchPlayer', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.RunPython(drop_duplicate_memberships, migrations.RunPython.noop),
+        # (match, user) unik sudah tersirat dari user unik
+        migrations.AlterUniqueTogether(
+            name='matchplayer',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='matchplayer',
+            constraint=models.UniqueConstraint(fields=('user',), name='one_active_match_per_user'),
+        ),
+    ]
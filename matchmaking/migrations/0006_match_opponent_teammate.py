@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matchmaking', '0005_matchplayer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='opponent_teammate',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
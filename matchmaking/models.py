@@ -1,8 +1,43 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from sync.models import SyncTrackedMixin
 
 
-class Match(models.Model):
+class MatchQuerySet(models.QuerySet):
+    def with_player_info(self, user=None):
+        """
+        Match beserta data yang dibaca MatchSerializer/template tanpa query per match:
+        num_players (jumlah pemain terdaftar), user_registered (jika user
+        diberikan), created_by dan daftar pemain (prefetch).
+        """
+        Players = self.model.players.through
+        player_count = (
+            Players.objects.filter(match_id=OuterRef('pk'))
+            .order_by().values('match_id').annotate(n=Count('pk')).values('n')
+        )
+        qs = (
+            self.select_related('created_by')
+            .prefetch_related(Prefetch('players', queryset=User.objects.only('id', 'username')))
+            .annotate(num_players=Coalesce(Subquery(player_count), Value(0)))
+        )
+        if user is not None and user.is_authenticated:
+            qs = qs.annotate(user_registered=Exists(
+                Players.objects.filter(match_id=OuterRef('pk'), user_id=user.pk)
+            ))
+        return qs
+
+    def open(self):
+        """Match yang masih bisa di-join (lihat Match.can_join); butuh with_player_info()."""
+        # 1v1 penuh pada 2 pemain; 2v2 hanya menerima 2 akun (teman sementara
+        # tidak dihitung), jadi keduanya terbuka selama pemain terdaftar < 2
+        return self.filter(num_players__lt=2)
+
+
+class Match(SyncTrackedMixin, models.Model):
+    sync_key = 'match'
+
     MODE_CHOICES = [
         ('1v1', '1 vs 1'),
         ('2v2', '2 vs 2'),
@@ -13,20 +48,32 @@ class Match(models.Model):
         User, on_delete=models.CASCADE, related_name='matches_created'
     )
     players = models.ManyToManyField(
-        User, related_name='matches_joined', blank=True
+        User, related_name='matches_joined', blank=True, through='MatchPlayer'
     )
     temp_teammate = models.CharField(max_length=100, blank=True, null=True)
+    # Teman pemain lawan (2v2 dari antrean matchmaking, kedua tim membawa teman)
+    opponent_teammate = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = MatchQuerySet.as_manager()
+
+    def _registered_count(self):
+        # Pakai anotasi/prefetch dari with_player_info() jika ada
+        if hasattr(self, 'num_players'):
+            return self.num_players
+        if 'players' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.players.all())
+        return self.players.count()
+
     @property
     def mode_display(self):
         return self.get_mode_display()
 
     @property
     def player_count(self):
-        count = self.players.count()
-        if self.mode == '2v2' and self.temp_teammate:
-            count += 1
+        count = self._registered_count()
+        if self.mode == '2v2':
+            count += bool(self.temp_teammate) + bool(self.opponent_teammate)
         return count
 
     @property
@@ -46,10 +93,10 @@ class Match(models.Model):
             return False
 
         if self.mode == '1v1':
-            return self.players.count() < 2
+            return self._registered_count() < 2
 
         if self.mode == '2v2':
-            return self.players.count() < 2
+            return self._registered_count() < 2
 
         return False
 
@@ -59,3 +106,50 @@ class Match(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Matches"
+
+
+class MatchPlayer(models.Model):
+    """Tabel relasi Match.players (tabel lama hasil ManyToManyField otomatis).
+
+    user unik: database menolak user yang terdaftar di dua match sekaligus,
+    termasuk saat dua request join berjalan bersamaan.
+    """
+    match = models.ForeignKey(Match, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'matchmaking_match_players'
+        constraints = [
+            models.UniqueConstraint(fields=['user'], name='one_active_match_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} di match {self.match_id}"
+
+
+class QueueEntry(models.Model):
+    """Pemain yang menunggu dipasangkan otomatis (lihat matchmaking/queue.py).
+
+    venue dan slot (jam mulai, dibulatkan ke jam) opsional; kosong berarti
+    pemain mau bermain di mana/kapan saja. match terisi saat sudah dipasangkan.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='queue_entries')
+    mode = models.CharField(max_length=3, choices=Match.MODE_CHOICES)
+    venue = models.ForeignKey(
+        'home.LapanganPadel', on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    slot = models.DateTimeField(null=True, blank=True)
+    teammate = models.CharField(max_length=100, blank=True)
+    # Ikut terhapus bersama match supaya entri tidak kembali "menunggu"
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(match__isnull=True), name='one_waiting_entry_per_user'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} menunggu {self.mode}"
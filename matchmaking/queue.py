@@ -0,0 +1,190 @@
+"""Antrean matchmaking otomatis.
+
+Pemain masuk antrean (QueueEntry) untuk mode 1v1/2v2, opsional dengan venue
+dan slot jam. Dua entri cocok jika modenya sama dan venue/slot-nya sama atau
+salah satunya kosong ("di mana saja"/"kapan saja"); yang paling lama
+menunggu didahulukan.
+
+MatchQueue adalah index in-memory: setiap entri dimasukkan ke heap (urut id
+= urutan masuk) untuk bucket (mode, venue, slot) dan proyeksinya (mode,
+venue, *), (mode, *, slot), (mode, *, *). Mencari pasangan cukup melihat
+kepala paling banyak empat heap, jadi enqueue dan matching O(log n).
+Entri yang dibatalkan/dipasangkan tidak dicari di heap, hanya ditandai dan
+dibuang saat muncul di kepala (lazy deletion).
+
+Database tetap sumber kebenaran. Matchmaker di setiap proses menyinkronkan
+entri baru dari database (id > id terakhir), dan Match dibuat dalam satu
+transaksi yang memastikan kedua entri masih menunggu, jadi beberapa worker
+dengan index masing-masing tidak bisa memasangkan pemain yang sama dua kali.
+Sinkronisasi dijalankan saat enqueue dan setiap kali klien mengecek status
+antreannya, sehingga entri dari worker lain ikut terpasangkan.
+"""
+import heapq
+import threading
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .models import Match, MatchPlayer, QueueEntry
+
+ANY = '*'
+
+
+class MatchQueue:
+    def __init__(self):
+        self._heaps = defaultdict(list)
+        self._waiting = {}  # id entri -> (mode, venue_id, slot)
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._waiting
+
+    def push(self, entry_id, mode, venue_id=None, slot=None):
+        self._waiting[entry_id] = (mode, venue_id, slot)
+        for venue in (venue_id, ANY):
+            for time_slot in (slot, ANY):
+                heapq.heappush(self._heaps[(mode, venue, time_slot)], entry_id)
+
+    def discard(self, entry_id):
+        self._waiting.pop(entry_id, None)
+
+    def _head(self, key):
+        heap = self._heaps.get(key)
+        if heap is None:
+            return None
+        while heap and heap[0] not in self._waiting:
+            heapq.heappop(heap)
+        if not heap:
+            del self._heaps[key]
+            return None
+        return heap[0]
+
+    @staticmethod
+    def candidate_keys(mode, venue_id, slot):
+        # Nilai spesifik cocok dengan nilai yang sama atau kosong (None);
+        # nilai kosong cocok dengan apa saja (proyeksi ANY)
+        venues = (venue_id, None) if venue_id is not None else (ANY,)
+        slots = (slot, None) if slot is not None else (ANY,)
+        return [(mode, venue, time_slot) for venue in venues for time_slot in slots]
+
+    def find_partner(self, mode, venue_id=None, slot=None):
+        """Id entri cocok yang paling lama menunggu, atau None."""
+        heads = [self._head(key) for key in self.candidate_keys(mode, venue_id, slot)]
+        heads = [head for head in heads if head is not None]
+        return min(heads) if heads else None
+
+    def match_or_push(self, entry_id, mode, venue_id=None, slot=None):
+        """Keluarkan dan return pasangan untuk entri ini, atau masukkan entri ke antrean."""
+        partner = self.find_partner(mode, venue_id, slot)
+        if partner is None:
+            self.push(entry_id, mode, venue_id, slot)
+        else:
+            self.discard(partner)
+        return partner
+
+
+def create_match(first_id, second_id):
+    """Buat Match untuk dua entri yang masih menunggu (first = yang lebih dulu masuk).
+
+    Return (match, id entri yang sudah tidak menunggu). match None jika salah
+    satu entri sudah dibatalkan, dipasangkan oleh proses lain, atau pemainnya
+    sudah ikut match lain (entri seperti itu dihapus).
+    """
+    try:
+        with transaction.atomic():
+            entries = {
+                entry.id: entry
+                for entry in QueueEntry.objects.select_for_update().filter(
+                    id__in=[first_id, second_id], match__isnull=True
+                )
+            }
+            busy_users = set(
+                MatchPlayer.objects.filter(
+                    user_id__in=[entry.user_id for entry in entries.values()]
+                ).values_list('user_id', flat=True)
+            )
+            busy = {entry.id for entry in entries.values() if entry.user_id in busy_users}
+            if busy:
+                QueueEntry.objects.filter(id__in=busy).delete()
+            gone = {first_id, second_id} - set(entries) | busy
+            if gone:
+                return None, gone
+            first, second = entries[first_id], entries[second_id]
+            match = Match.objects.create(
+                mode=first.mode,
+                created_by=first.user,
+                temp_teammate=first.teammate or None,
+                opponent_teammate=second.teammate or None,
+            )
+            match.players.add(first.user_id, second.user_id)
+            QueueEntry.objects.filter(id__in=[first_id, second_id]).update(match=match)
+    except IntegrityError:
+        # Salah satu pemain join match lain bersamaan; cek ulang dengan data terbaru
+        return create_match(first_id, second_id)
+    return match, set()
+
+
+def _slot_key(slot):
+    return slot.isoformat() if slot else None
+
+
+class Matchmaker:
+    """MatchQueue milik proses ini, disinkronkan dengan QueueEntry di database."""
+
+    def __init__(self):
+        self.queue = MatchQueue()
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def sync(self, entry=None):
+        """Proses entri yang masuk sejak sinkronisasi terakhir. Return Match yang terbentuk.
+
+        entry (milik request ini) selalu ikut diproses: id dialokasikan saat
+        INSERT, jadi entri yang commit belakangan bisa punya id lebih kecil dari
+        yang sudah tersinkron.
+        """
+        with self._lock:
+            new_entries = list(
+                QueueEntry.objects.filter(id__gt=self._last_id, match__isnull=True)
+                .order_by('id')
+                .values_list('id', 'mode', 'venue_id', 'slot')
+            )
+            if entry is not None and entry.id <= self._last_id and entry.id not in self.queue:
+                new_entries.insert(0, (entry.id, entry.mode, entry.venue_id, entry.slot))
+
+            matches = []
+            for entry_id, mode, venue_id, slot in new_entries:
+                self._last_id = max(self._last_id, entry_id)
+                match = self._match(entry_id, mode, venue_id, _slot_key(slot))
+                if match:
+                    matches.append(match)
+            return matches
+
+    def _match(self, entry_id, mode, venue_id, slot):
+        while True:
+            partner = self.queue.find_partner(mode, venue_id, slot)
+            if partner is None:
+                self.queue.push(entry_id, mode, venue_id, slot)
+                return None
+            match, gone = create_match(partner, entry_id)
+            for gone_id in gone:
+                self.queue.discard(gone_id)
+            if match:
+                self.queue.discard(partner)
+                return match
+            if entry_id in gone:
+                return None
+            # Pasangan sudah dibatalkan/dipasangkan di proses lain; cari yang berikutnya
+
+    def discard(self, entry_id):
+        with self._lock:
+            self.queue.discard(entry_id)
+
+
+_matchmaker = Matchmaker()
+
+
+def get_matchmaker():
+    return _matchmaker
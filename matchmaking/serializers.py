@@ -31,10 +31,12 @@ class MatchSerializer(serializers.ModelSerializer):
             'is_user_creator',
             'can_user_join',
             'temp_teammate',
+            'opponent_teammate',
         ]
 
     def get_player_usernames(self, obj):
-        return list(obj.players.values_list('username', flat=True))
+        # .all() memakai hasil prefetch dari Match.objects.with_player_info()
+        return [player.username for player in obj.players.all()]
 
     def _get_user(self):
         request = self.context.get('request')
@@ -42,11 +44,15 @@ class MatchSerializer(serializers.ModelSerializer):
 
     def get_is_user_registered(self, obj):
         user = self._get_user()
-        return user.is_authenticated and obj.players.filter(pk=user.pk).exists()
+        if not user or not user.is_authenticated:
+            return False
+        if hasattr(obj, 'user_registered'):
+            return obj.user_registered
+        return obj.players.filter(pk=user.pk).exists()
 
     def get_is_user_creator(self, obj):
         user = self._get_user()
-        return user.is_authenticated and obj.created_by == user
+        return bool(user and user.is_authenticated) and obj.created_by_id == user.pk
 
     def get_can_user_join(self, obj):
         user = self._get_user()
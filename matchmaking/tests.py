@@ -1,8 +1,17 @@
-from django.test import TestCase, Client
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from django.test import TestCase, Client, TransactionTestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from home.models import LapanganPadel
 from .models import Match
+from .queue import Matchmaker, MatchQueue
 
 
 class MatchModelTests(TestCase):
@@ -172,3 +181,267 @@ class MatchmakingViewsTests(TestCase):
         self.assertRedirects(response, reverse('matchmaking:home'))
         messages = [m.message for m in get_messages(response.wsgi_request)]
         self.assertTrue(any("tidak memiliki izin" in msg for msg in messages))
+
+
+class MatchListJsonTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", password="pass")
+        # Satu user hanya boleh ada di satu match, jadi setiap match butuh pemain sendiri
+        self.others = [User.objects.create(username=f"lawan{i}") for i in range(25)]
+        self.client.login(username="user1", password="pass")
+        self.url = reverse('matchmaking:list_match_json')
+
+    def _match(self, mode, creator, *players, teammate=None):
+        match = Match.objects.create(mode=mode, created_by=creator, temp_teammate=teammate)
+        match.players.add(creator, *players)
+        return match
+
+    def _get(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_fields_match_model_logic(self):
+        full = self._match('1v1', self.others[0], self.others[1])
+        joined = self._match('2v2', self.others[2], self.user, teammate='Teman')
+        data, _ = self._get()
+        by_id = {row['id']: row for row in data}
+
+        self.assertEqual(by_id[full.id]['player_count'], 2)
+        self.assertTrue(by_id[full.id]['is_full'])
+        self.assertFalse(by_id[full.id]['can_user_join'])
+        self.assertEqual(by_id[full.id]['player_usernames'], ['lawan0', 'lawan1'])
+        self.assertEqual(by_id[full.id]['created_by_username'], 'lawan0')
+
+        self.assertEqual(by_id[joined.id]['player_count'], 3)
+        self.assertTrue(by_id[joined.id]['is_user_registered'])
+        self.assertEqual([row['id'] for row in data], [joined.id, full.id])
+
+        joined.players.remove(self.user)
+        mine = self._match('1v1', self.user)
+        data, _ = self._get()
+        by_id = {row['id']: row for row in data}
+        self.assertTrue(by_id[mine.id]['is_user_creator'])
+        self.assertTrue(by_id[mine.id]['is_user_registered'])
+        self.assertFalse(by_id[mine.id]['can_user_join'])
+        self.assertFalse(by_id[joined.id]['is_user_registered'])
+        self.assertEqual([row['id'] for row in data], [mine.id, joined.id, full.id])
+
+    def test_query_count_constant(self):
+        self._match('1v1', self.others[0])
+        _, one = self._get()
+        for i in range(20):
+            self._match('2v2', self.others[i + 1], teammate=f't{i}')
+        data, many = self._get()
+        self.assertEqual(len(data), 21)
+        self.assertEqual(one, many)
+
+    def test_open_filter(self):
+        open_match = self._match('1v1', self.others[0])
+        self._match('1v1', self.others[1], self.others[2])
+        self._match('2v2', self.others[3], self.user, teammate='Teman')
+        data, _ = self._get({'open': '1'})
+        self.assertEqual([row['id'] for row in data], [open_match.id])
+        self.assertTrue(data[0]['can_user_join'])
+
+    def test_cursor_pagination(self):
+        ids = [self._match('1v1', self.others[i]).id for i in range(5)]
+        seen = []
+        params = {'limit': 2}
+        while True:
+            data, _ = self._get(params)
+            seen += [row['id'] for row in data['results']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, ids[::-1])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'rusak'}).status_code, 400)
+
+
+class MatchQueueTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"antre{i}", password="pass") for i in range(4)]
+        self.venue = LapanganPadel.objects.create(nama="Padel A", alamat="Jl. A")
+        self.other_venue = LapanganPadel.objects.create(nama="Padel B", alamat="Jl. B")
+        self.url = reverse('matchmaking:match_queue')
+        # Index baru per test: id yang di-rollback bisa dipakai ulang oleh SQLite
+        patcher = patch('matchmaking.views.get_matchmaker', return_value=Matchmaker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, user, **data):
+        self.client.force_login(user)
+        data.setdefault('mode', '1v1')
+        return self.client.post(self.url, data=json.dumps(data), content_type='application/json')
+
+    def test_two_players_are_matched(self):
+        first = self._enqueue(self.users[0]).json()
+        self.assertEqual(first['status'], 'queued')
+        second = self._enqueue(self.users[1]).json()
+        self.assertEqual(second['status'], 'matched')
+
+        match = Match.objects.get(pk=second['match_id'])
+        self.assertEqual(match.created_by, self.users[0])
+        self.assertEqual(set(match.players.all()), {self.users[0], self.users[1]})
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.client.get(self.url).json(), {'status': 'matched', 'match_id': match.id})
+
+    def test_venue_and_slot_must_be_compatible(self):
+        self._enqueue(self.users[0], venue_id=self.venue.id, slot='2026-10-20T18:00:00')
+        self.assertEqual(self._enqueue(self.users[1], venue_id=self.other_venue.id).json()['status'], 'queued')
+        self.assertEqual(self._enqueue(self.users[2], venue_id=self.venue.id, slot='2026-10-20T19:00:00').json()['status'], 'queued')
+        # Jam dibulatkan; venue kosong berarti di mana saja
+        response = self._enqueue(self.users[3], slot='2026-10-20T18:45:00').json()
+        self.assertEqual(response['status'], 'matched')
+        self.assertEqual(
+            set(Match.objects.get(pk=response['match_id']).players.all()), {self.users[0], self.users[3]}
+        )
+
+    def test_two_vs_two_keeps_both_teammates(self):
+        self._enqueue(self.users[0], mode='2v2', teammate='Adit')
+        response = self._enqueue(self.users[1], mode='2v2', teammate='Bima').json()
+        match = Match.objects.get(pk=response['match_id'])
+        self.assertEqual((match.temp_teammate, match.opponent_teammate), ('Adit', 'Bima'))
+        self.assertEqual(match.player_count, 4)
+        self.assertTrue(match.is_full)
+
+    def test_oldest_compatible_entry_first(self):
+        self._enqueue(self.users[0])
+        self._enqueue(self.users[1], mode='2v2', teammate='Teman')
+        self._enqueue(self.users[2], mode='2v2', teammate='Teman')
+        response = self._enqueue(self.users[3]).json()
+        players = set(Match.objects.get(pk=response['match_id']).players.all())
+        self.assertEqual(players, {self.users[0], self.users[3]})
+
+    def test_cancel(self):
+        self._enqueue(self.users[0])
+        self.assertEqual(self.client.post(reverse('matchmaking:cancel_match_queue')).status_code, 200)
+        self.assertEqual(self.client.get(self.url).json(), {'status': 'idle'})
+        self.assertEqual(self._enqueue(self.users[1]).json()['status'], 'queued')
+        self.assertFalse(Match.objects.exists())
+
+    def test_rejects_invalid_requests(self):
+        self.assertEqual(self._enqueue(self.users[0], mode='3v3').status_code, 400)
+        self.assertEqual(self._enqueue(self.users[0], mode='2v2').status_code, 400)
+        self.assertEqual(self._enqueue(self.users[0], slot='besok').status_code, 400)
+        self.assertEqual(self._enqueue(self.users[0], venue_id='abc').status_code, 400)
+        self.assertEqual(self._enqueue(self.users[0], venue_id=[1]).status_code, 400)
+        self.assertEqual(self._enqueue(self.users[0]).status_code, 200)
+        self.assertEqual(self._enqueue(self.users[0]).status_code, 400)
+
+    def test_queue_index(self):
+        queue = MatchQueue()
+        queue.push(1, '1v1', venue_id=5, slot='18')
+        queue.push(2, '1v1')
+        queue.push(3, '1v1', venue_id=6)
+        self.assertEqual(queue.find_partner('1v1', venue_id=6), 2)
+        self.assertEqual(queue.match_or_push(4, '1v1', venue_id=5, slot='19'), 2)
+        self.assertEqual(queue.match_or_push(5, '1v1', venue_id=6, slot='19'), 3)
+        self.assertIsNone(queue.match_or_push(6, '2v2'))
+        queue.discard(1)
+        self.assertIsNone(queue.find_partner('1v1', venue_id=5, slot='18'))
+        self.assertEqual(len(queue), 1)
+
+
+class MatchJoinTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username="pembuat", password="pass")
+        self.user = User.objects.create_user(username="penantang", password="pass")
+        self.match = Match.objects.create(mode='1v1', created_by=self.creator)
+        self.match.players.add(self.creator)
+        self.client.force_login(self.user)
+
+    def _join(self, match):
+        return self.client.post(reverse('matchmaking:join_match_flutter', args=[match.id]))
+
+    def test_one_active_match_per_user(self):
+        other = Match.objects.create(mode='1v1', created_by=self.user)
+        other.players.add(self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.match.players.add(self.user)
+
+        response = self._join(self.match)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Sudah ikut match lain.')
+        self.assertEqual(self.client.post(reverse('matchmaking:create_1v1_flutter')).status_code, 400)
+        self.assertEqual(Match.objects.count(), 2)
+
+    def test_join_then_full(self):
+        self.assertEqual(self._join(self.match).json(), {'status': 'success'})
+        self.assertEqual(self._join(self.match).json()['status'], 'info')
+        late = User.objects.create_user(username="telat", password="pass")
+        self.client.force_login(late)
+        self.assertEqual(self._join(self.match).status_code, 400)
+        self.assertEqual(self.match.players.count(), 2)
+
+
+class ConcurrentMatchJoinTests(TransactionTestCase):
+    """Join bersamaan dari banyak thread (masing-masing koneksi database sendiri)."""
+
+    THREADS = 12
+
+    @classmethod
+    def setUpClass(cls):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise unittest.SkipTest("SQLite in-memory tidak mendukung koneksi paralel")
+        super().setUpClass()
+
+    def setUp(self):
+        # Perlebar jeda antara cek slot dan players.add supaya race pasti terjadi
+        # jika join tidak berada dalam satu transaksi yang terkunci
+        can_join = Match.can_join
+
+        def slow_can_join(match):
+            result = can_join(match)
+            time.sleep(0.02)
+            return result
+
+        patcher = patch.object(Match, 'can_join', slow_can_join)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _hammer(self, calls):
+        barrier = threading.Barrier(len(calls))
+        results = [None] * len(calls)
+
+        def run(index, user, match):
+            client = Client()
+            client.force_login(user)
+            try:
+                barrier.wait()
+                results[index] = client.post(
+                    reverse('matchmaking:join_match_flutter', args=[match.id])
+                ).status_code
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i, *call)) for i, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _match(self, mode, username, teammate=None):
+        creator = User.objects.create_user(username=username, password="pass")
+        match = Match.objects.create(mode=mode, created_by=creator, temp_teammate=teammate)
+        match.players.add(creator)
+        return match
+
+    def test_last_spot_is_taken_once(self):
+        match = self._match('1v1', 'pembuat')
+        users = [User.objects.create_user(username=f"pemain{i}", password="pass") for i in range(self.THREADS)]
+        results = self._hammer([(user, match) for user in users])
+
+        self.assertEqual(results.count(200), 1)
+        self.assertEqual(results.count(400), self.THREADS - 1)
+        self.assertEqual(match.players.count(), 2)
+
+    def test_user_joins_one_of_many_matches(self):
+        user = User.objects.create_user(username="pemain", password="pass")
+        matches = [self._match('2v2', f'pembuat{i}', teammate='Teman') for i in range(self.THREADS)]
+        results = self._hammer([(user, match) for match in matches])
+
+        self.assertEqual(results.count(200), 1)
+        self.assertEqual(Match.objects.filter(players=user).count(), 1)
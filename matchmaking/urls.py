@@ -19,4 +19,6 @@ urlpatterns = [
     path('create-2v2/', views.create_2v2_flutter, name='create_2v2_flutter'),
     path('join/<int:match_id>/', views.join_match_flutter, name='join_match_flutter'),
     path('delete/<int:match_id>/', views.delete_match_flutter, name='delete_match_flutter'),
+    path('queue/', views.match_queue, name='match_queue'),
+    path('queue/cancel/', views.cancel_match_queue, name='cancel_match_queue'),
 ]
@@ -1,16 +1,25 @@
 import json
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .models import Match
+from sportspace.pagination import InvalidCursor, paginate_desc, parse_limit
+from home.models import LapanganPadel
+from .models import Match, QueueEntry
+from .queue import get_matchmaker
 from .serializers import MatchSerializer
 
+MATCH_PAGE_SIZE = 20
+MATCH_MAX_PAGE_SIZE = 100
+
 
 # =======================
 # JSON API (FLUTTER)
@@ -19,21 +28,52 @@ from .serializers import MatchSerializer
 @login_required
 @api_view(['GET'])
 def list_match_json(request):
-    matches = Match.objects.all()
-    serializer = MatchSerializer(
-        matches, many=True, context={'request': request}
-    )
-    return Response(serializer.data)
+    """
+    Daftar match, terbaru dulu. ?open=1 -> hanya match yang masih bisa di-join.
+
+    Dengan ?cursor= atau ?limit= -> {"results": [...], "next_cursor": ...};
+    tanpa keduanya tetap list penuh (format lama).
+    """
+    matches = Match.objects.with_player_info(request.user)
+    if request.GET.get('open') in ('1', 'true'):
+        matches = matches.open()
+
+    if 'cursor' not in request.GET and 'limit' not in request.GET:
+        serializer = MatchSerializer(
+            matches.order_by('-created_at', '-id'), many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
+    try:
+        page, next_cursor = paginate_desc(
+            matches, request.GET.get('cursor'), parse_limit(request, MATCH_PAGE_SIZE, MATCH_MAX_PAGE_SIZE)
+        )
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=400)
+    serializer = MatchSerializer(page, many=True, context={'request': request})
+    return Response({'results': serializer.data, 'next_cursor': next_cursor})
 
 
 @login_required
 @api_view(['GET'])
 def detail_match_json(request, match_id):
-    match = get_object_or_404(Match, pk=match_id)
+    match = get_object_or_404(Match.objects.with_player_info(request.user), pk=match_id)
     serializer = MatchSerializer(match, context={'request': request})
     return Response(serializer.data)
 
 
+def _create_match(user, **fields):
+    """Buat match dengan user sebagai pemain pertama; None jika user sudah ikut match lain."""
+    try:
+        with transaction.atomic():
+            match = Match.objects.create(created_by=user, **fields)
+            match.players.add(user)
+    except IntegrityError:
+        # one_active_match_per_user, misal dua request create/join bersamaan
+        return None
+    return match
+
+
 @login_required
 @csrf_exempt
 def create_1v1_flutter(request):
@@ -46,8 +86,11 @@ def create_1v1_flutter(request):
             status=400,
         )
 
-    match = Match.objects.create(mode='1v1', created_by=request.user)
-    match.players.add(request.user)
+    if _create_match(request.user, mode='1v1') is None:
+        return JsonResponse(
+            {'status': 'error', 'message': 'Anda sudah terdaftar di match lain.'},
+            status=400,
+        )
 
     return JsonResponse({'status': 'success'})
 
@@ -76,10 +119,11 @@ def create_2v2_flutter(request):
             status=400,
         )
 
-    match = Match.objects.create(
-        mode='2v2', created_by=request.user, temp_teammate=teammate
-    )
-    match.players.add(request.user)
+    if _create_match(request.user, mode='2v2', temp_teammate=teammate) is None:
+        return JsonResponse(
+            {'status': 'error', 'message': 'Anda sudah terdaftar di match lain.'},
+            status=400,
+        )
 
     return JsonResponse({'status': 'success'})
 
@@ -90,25 +134,36 @@ def join_match_flutter(request, match_id):
     if request.method != 'POST':
         return JsonResponse({'status': 'error'}, status=405)
 
-    match = get_object_or_404(Match, pk=match_id)
     user = request.user
 
-    if match.players.filter(pk=user.pk).exists():
-        return JsonResponse({'status': 'info', 'message': 'Sudah terdaftar.'})
-
-    if Match.objects.filter(players=user).exclude(pk=match_id).exists():
+    try:
+        with transaction.atomic():
+            # Kunci baris match sampai commit: join lain ke match yang sama
+            # menunggu, jadi can_join() di bawah selalu melihat jumlah pemain terbaru
+            match = get_object_or_404(Match.objects.select_for_update(), pk=match_id)
+
+            if match.players.filter(pk=user.pk).exists():
+                return JsonResponse({'status': 'info', 'message': 'Sudah terdaftar.'})
+
+            if Match.objects.filter(players=user).exists():
+                return JsonResponse(
+                    {'status': 'error', 'message': 'Sudah ikut match lain.'},
+                    status=400,
+                )
+
+            if not match.can_join() or match.created_by_id == user.pk:
+                return JsonResponse(
+                    {'status': 'error', 'message': 'Tidak bisa join match.'},
+                    status=400,
+                )
+
+            match.players.add(user)
+    except IntegrityError:
+        # one_active_match_per_user: join/create lain milik user ini menang duluan
         return JsonResponse(
             {'status': 'error', 'message': 'Sudah ikut match lain.'},
             status=400,
         )
-
-    if not match.can_join() or match.created_by == user:
-        return JsonResponse(
-            {'status': 'error', 'message': 'Tidak bisa join match.'},
-            status=400,
-        )
-
-    match.players.add(user)
     return JsonResponse({'status': 'success'})
 
 
@@ -130,13 +185,116 @@ def delete_match_flutter(request, match_id):
     return JsonResponse({'status': 'success'})
 
 
+# =======================
+# ANTREAN MATCHMAKING (FLUTTER)
+# =======================
+
+def _queue_status(entry):
+    if entry is None:
+        return {'status': 'idle'}
+    if entry.match_id:
+        return {'status': 'matched', 'match_id': entry.match_id}
+    return {
+        'status': 'queued',
+        'entry_id': entry.id,
+        'mode': entry.mode,
+        'venue_id': entry.venue_id,
+        'slot': entry.slot.isoformat() if entry.slot else None,
+    }
+
+
+def _parse_slot(value):
+    slot = parse_datetime(value)
+    if slot is None:
+        raise ValueError(value)
+    if timezone.is_naive(slot):
+        slot = timezone.make_aware(slot)
+    # Dibulatkan ke jam supaya pemain dengan jam yang sama masuk bucket yang sama
+    return slot.replace(minute=0, second=0, microsecond=0)
+
+
+@login_required
+@csrf_exempt
+def match_queue(request):
+    """
+    Antrean matchmaking otomatis (lihat matchmaking/queue.py).
+
+    GET  -> status antrean user: idle, queued, atau matched (+ match_id).
+    POST -> masuk antrean. Body: mode ("1v1"/"2v2"), teammate (wajib untuk
+            2v2), venue_id dan slot (ISO datetime, dibulatkan ke jam) opsional.
+    """
+    matchmaker = get_matchmaker()
+    if request.method == 'GET':
+        # Sekalian memasangkan entri yang masuk lewat worker lain
+        matchmaker.sync()
+        entry = QueueEntry.objects.filter(user=request.user).order_by('-id').first()
+        return JsonResponse(_queue_status(entry))
+
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        data = request.POST
+
+    mode = data.get('mode')
+    if mode not in dict(Match.MODE_CHOICES):
+        return JsonResponse({'status': 'error', 'message': 'Mode tidak valid.'}, status=400)
+    teammate = (data.get('teammate') or '').strip()
+    if mode == '2v2' and not teammate:
+        return JsonResponse({'status': 'error', 'message': 'Nama teman wajib diisi.'}, status=400)
+
+    try:
+        venue_id = int(data['venue_id']) if data.get('venue_id') else None
+    except (TypeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'venue_id tidak valid.'}, status=400)
+    if venue_id and not LapanganPadel.objects.filter(pk=venue_id).exists():
+        return JsonResponse({'status': 'error', 'message': 'Lapangan tidak ditemukan.'}, status=400)
+    try:
+        slot = _parse_slot(data['slot']) if data.get('slot') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Format slot tidak valid.'}, status=400)
+
+    if Match.objects.filter(players=request.user).exists():
+        return JsonResponse(
+            {'status': 'error', 'message': 'Anda sudah terdaftar di match lain.'},
+            status=400,
+        )
+    try:
+        with transaction.atomic():
+            entry = QueueEntry.objects.create(
+                user=request.user, mode=mode, venue_id=venue_id, slot=slot, teammate=teammate
+            )
+    except IntegrityError:
+        return JsonResponse({'status': 'error', 'message': 'Anda sudah ada di antrean.'}, status=400)
+
+    matchmaker.sync(entry)
+    entry.refresh_from_db(fields=['match'])
+    return JsonResponse(_queue_status(entry))
+
+
+@login_required
+@csrf_exempt
+def cancel_match_queue(request):
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'}, status=405)
+
+    entry = QueueEntry.objects.filter(user=request.user, match__isnull=True).first()
+    if entry is None:
+        return JsonResponse({'status': 'error', 'message': 'Anda tidak sedang mengantre.'}, status=400)
+    entry.delete()
+    get_matchmaker().discard(entry.id)
+    return JsonResponse({'status': 'success'})
+
+
 # =======================
 # WEB VIEWS (DUMMY)
 # =======================
 
 @login_required
 def matchmaking_home(request):
-    matches = Match.objects.all()
+    matches = Match.objects.with_player_info()
     return render(request, 'matchmaking/matchmaking.html', {'matches': matches})
 
 
@@ -147,11 +305,9 @@ def one_vs_one(request):
             messages.error(request, "Anda sudah terdaftar di match lain.")
             return redirect('matchmaking:home')
 
-        match = Match.objects.create(
-            mode='1v1',
-            created_by=request.user
-        )
-        match.players.add(request.user)
+        if _create_match(request.user, mode='1v1') is None:
+            messages.error(request, "Anda sudah terdaftar di match lain.")
+            return redirect('matchmaking:home')
 
         messages.success(request, "Match 1v1 berhasil dibuat!")
         return redirect('matchmaking:home')
@@ -172,12 +328,9 @@ def two_vs_two(request):
             messages.error(request, "Anda sudah terdaftar di match lain.")
             return redirect('matchmaking:home')
 
-        match = Match.objects.create(
-            mode='2v2',
-            created_by=request.user,
-            temp_teammate=teammate
-        )
-        match.players.add(request.user)
+        if _create_match(request.user, mode='2v2', temp_teammate=teammate) is None:
+            messages.error(request, "Anda sudah terdaftar di match lain.")
+            return redirect('matchmaking:home')
 
         messages.success(request, "Match 2v2 berhasil dibuat!")
         return redirect('matchmaking:home')
@@ -0,0 +1,134 @@
+"""Agregat review yang didenormalisasi ke LapanganPadel.
+
+Kolom app_total_review, app_rating_sum, app_rating dan app_star_1..5 di
+LapanganPadel dijaga secara inkremental oleh signal di review.models,
+sehingga listing bisa mengurutkan berdasarkan rating aplikasi tanpa query
+agregasi tambahan. Command reconcile_review_aggregates menghitung ulang
+semuanya dari tabel Review jika ada yang meleset.
+"""
+import math
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+
+from home.models import LapanganPadel
+from sync.models import ChangeLog, record_change, record_changes
+
+STARS = (1, 2, 3, 4, 5)
+
+# Batas bawah (inklusif) rating untuk tiap bintang, pembulatan setengah ke atas.
+STAR_THRESHOLDS = {5: 4.5, 4: 3.5, 3: 2.5, 2: 1.5, 1: None}
+
+
+def star_field(star):
+    return f'app_star_{star}'
+
+
+def star_bucket(rating):
+    """Bintang (1-5) untuk sebuah rating, misal 4.5 -> 5, 4.4 -> 4, 0 -> 1."""
+    rating = float(rating or 0)
+    for star in (5, 4, 3, 2):
+        if rating >= STAR_THRESHOLDS[star]:
+            return star
+    return 1
+
+
+def star_q(star, prefix=''):
+    """Q filter yang setara dengan star_bucket() untuk dipakai di query."""
+    field = f'{prefix}rating'
+    lower = STAR_THRESHOLDS[star]
+    upper = STAR_THRESHOLDS.get(star + 1)
+    q = Q()
+    if lower is not None:
+        q &= Q(**{f'{field}__gte': lower})
+    if upper is not None:
+        q &= Q(**{f'{field}__lt': upper})
+    return q
+
+
+def average_expression():
+    return Case(
+        When(app_total_review__gt=0, then=F('app_rating_sum') / F('app_total_review')),
+        default=None,
+        output_field=FloatField(),
+    )
+
+
+def apply_review(lapangan_id, rating, sign):
+    """Tambah (sign=1) atau kurangi (sign=-1) satu review dari agregat lapangan."""
+    rating = float(rating or 0)
+    star = star_bucket(rating)
+    with transaction.atomic():
+        qs = LapanganPadel.objects.filter(pk=lapangan_id)
+        qs.update(**{
+            'app_total_review': F('app_total_review') + sign,
+            'app_rating_sum': F('app_rating_sum') + sign * rating,
+            star_field(star): F(star_field(star)) + sign,
+            # Kunci cache stats ikut berganti di semua worker
+            'app_review_version': F('app_review_version') + 1,
+            'score_stale': True,
+        })
+        # Update kedua agar rata-rata dihitung dari nilai yang sudah baru
+        qs.update(app_rating=average_expression())
+        # app_rating ikut dikirim ke client, jadi catat di sync feed
+        record_change(LapanganPadel(pk=lapangan_id), ChangeLog.UPSERT)
+
+
+def compute_aggregates(lapangan_ids=None):
+    """Hitung agregat langsung dari tabel Review, dikelompokkan per lapangan."""
+    from .models import Review
+
+    reviews = Review.objects.all()
+    if lapangan_ids is not None:
+        reviews = reviews.filter(lapangan_id__in=lapangan_ids)
+    rows = (
+        reviews
+        .order_by()
+        .values('lapangan_id')
+        .annotate(
+            total=Count('id'),
+            rating_sum=Sum('rating'),
+            **{star_field(star): Count('id', filter=star_q(star)) for star in STARS},
+        )
+    )
+    return {row.pop('lapangan_id'): row for row in rows}
+
+
+def _differs(current, expected):
+    if current is None or expected is None:
+        return current != expected
+    return not math.isclose(current, expected, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def reconcile(batch_size=500):
+    """Samakan kolom agregat semua lapangan dengan isi tabel Review.
+
+    Return jumlah lapangan yang nilainya diperbaiki.
+    """
+    fields = ['app_total_review', 'app_rating_sum', 'app_rating'] + [star_field(s) for s in STARS]
+    aggregates = compute_aggregates()
+    fixed = []
+    for lapangan in LapanganPadel.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+        row = aggregates.get(lapangan.pk, {})
+        expected = {
+            'app_total_review': row.get('total', 0),
+            'app_rating_sum': float(row.get('rating_sum') or 0),
+            **{star_field(s): row.get(star_field(s), 0) for s in STARS},
+        }
+        total = expected['app_total_review']
+        expected['app_rating'] = expected['app_rating_sum'] / total if total else None
+
+        if any(_differs(getattr(lapangan, f), v) for f, v in expected.items()):
+            for f, v in expected.items():
+                setattr(lapangan, f, v)
+            fixed.append(lapangan)
+
+    if fixed:
+        with transaction.atomic():
+            LapanganPadel.objects.bulk_update(fixed, fields, batch_size=batch_size)
+            LapanganPadel.objects.filter(pk__in=[lapangan.pk for lapangan in fixed]).update(
+                app_review_version=F('app_review_version') + 1
+            )
+            # bulk_update tidak memanggil save(), catat sync feed manual
+            record_changes(fixed, ChangeLog.UPSERT)
+    return len(fixed)
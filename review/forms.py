@@ -1,5 +1,6 @@
 from django import forms
 from .models import Review, LapanganPadel
+from .unreviewed import unreviewed_venues, venue_choices
 
 class ReviewForm(forms.ModelForm):
     class Meta:
@@ -11,8 +12,9 @@ class ReviewForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         if user:
-            reviewed_ids = Review.objects.filter(user=user).values_list("lapangan_id", flat=True)
-            self.fields['lapangan'].queryset = LapanganPadel.objects.exclude(id__in=reviewed_ids)
+            # queryset dipakai untuk validasi, choices (dari cache) untuk render dropdown
+            self.fields['lapangan'].queryset = unreviewed_venues(user)
+            self.fields['lapangan'].choices = [('', '---------')] + venue_choices(user)
 
         self.fields['lapangan'].widget.attrs.update({
             'class': 'w-full border rounded-md px-3 py-2 focus:outline-none focus:ring-2 focus:ring-lime-500',
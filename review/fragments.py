@@ -0,0 +1,38 @@
+"""Kunci cache fragment template review.
+
+Semua kunci diturunkan dari data yang sudah dimuat dari database, jadi
+setiap worker melihat kunci baru begitu datanya berubah tanpa perlu
+invalidasi yang hanya menjangkau cache proses sendiri:
+
+- kartu review: (id, updated_at) ditambah data lapangan dan profil yang
+  ikut dirender (nama/thumbnail lapangan, username, foto profil);
+- daftar review per lapangan: LapanganPadel.app_review_version (naik setiap
+  review lapangan itu ditulis/dihapus) ditambah stamp semua kartu di halaman.
+"""
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+
+def fragment_cache():
+    # Sama dengan cache yang dipakai tag {% cache %}
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return cache
+
+
+def card_stamp(review):
+    lapangan = review.lapangan
+    # Profil bisa belum ada (mis. user dibuat lewat bulk_create)
+    profile = getattr(review.user, 'profile', None)
+    return '|'.join([
+        review.updated_at.isoformat() if review.updated_at else '',
+        lapangan.nama or '',
+        lapangan.thumbnail_url or '',
+        review.user.username,
+        (profile.photo_url if profile else None) or '',
+    ])
+
+
+def list_stamp(reviews):
+    return ':'.join(f'{review.pk}={card_stamp(review)}' for review in reviews)
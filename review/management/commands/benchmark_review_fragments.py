@@ -0,0 +1,92 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from home.models import LapanganPadel
+from review.fragments import fragment_cache
+from review.models import Review
+
+NO_FRAGMENT_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'template_fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark render all_reviews.html dengan dan tanpa cache fragment (data dibuat lalu di-rollback)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            lapangan, reviews = self._seed(options['reviews'])
+            results = self._run(lapangan, reviews, options['repeat'])
+            transaction.set_rollback(True)
+
+        baseline = results['no fragment cache']
+        self.stdout.write(f'Rendering {len(reviews)} review cards (median of {options["repeat"]} runs):')
+        for label, seconds in results.items():
+            self.stdout.write(f'  {label:<28} {seconds * 1000:9.1f} ms  ({baseline / seconds:5.1f}x)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Warm cache saves {(baseline - results["warm (list cached)"]) * 1000:.1f} ms per render.'
+        ))
+
+    def _seed(self, n):
+        tag = uuid.uuid4().hex[:8]
+        lapangan = LapanganPadel.objects.create(place_id=f'bench_{tag}', nama=f'Bench {tag}', alamat='-')
+        # bulk_create melewati signal, jadi agregat/profil tidak ikut dibuat (cukup untuk render)
+        users = User.objects.bulk_create(
+            [User(username=f'bench_{tag}_{i}') for i in range(n)], batch_size=500
+        )
+        Review.objects.bulk_create(
+            [
+                Review(user=user, lapangan=lapangan, rating=(i % 9) / 2 + 1, comment=f'Review {i}', anonymous=i % 4 == 0)
+                for i, user in enumerate(users)
+            ],
+            batch_size=500,
+        )
+        reviews = list(
+            Review.objects.filter(lapangan=lapangan)
+            .select_related('lapangan', 'user__profile')
+            .order_by('-created_at', '-id')
+        )
+        return lapangan, reviews
+
+    def _run(self, lapangan, reviews, repeat):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'lapangan': lapangan, 'reviews': reviews, 'next_cursor': None, 'form': None}
+
+        def render():
+            start = time.perf_counter()
+            render_to_string('all_reviews.html', context, request=request)
+            return time.perf_counter() - start
+
+        def measure(prepare=None):
+            timings = []
+            for _ in range(repeat):
+                if prepare:
+                    prepare()
+                timings.append(render())
+            return statistics.median(timings)
+
+        results = {}
+        with override_settings(CACHES=NO_FRAGMENT_CACHE):
+            results['no fragment cache'] = measure()
+        results['cold (empty cache)'] = measure(fragment_cache().clear)
+        # Versi review lapangan naik: fragment daftar miss, kartu-kartunya tetap hit
+        def bump_version():
+            lapangan.app_review_version += 1
+
+        results['cards cached, list miss'] = measure(bump_version)
+        render()
+        results['warm (list cached)'] = measure()
+        return results
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from review.aggregates import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang agregat review (app_total_review, app_rating, app_star_*) di LapanganPadel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(batch_size=options['batch_size'])
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Fixed review aggregates for {fixed} lapangan.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Review aggregates already up to date.'))
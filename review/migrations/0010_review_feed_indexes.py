@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_lapanganpadel_recommendation_score'),
+        ('review', '0009_alter_review_comment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['lapangan', '-created_at', '-id'], name='review_lapangan_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='review_user_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_lapanganpadel_app_review_version'),
+        ('review', '0011_review_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', 'updated_at'], name='review_user_updated_idx'),
+        ),
+    ]
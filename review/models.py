@@ -1,11 +1,17 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from home.models import LapanganPadel
+from sync.models import SyncTrackedMixin
 import review
 from django.core.validators import MaxLengthValidator
 
 # Create your models here.
-class Review(models.Model):
+class Review(SyncTrackedMixin, models.Model):
+    sync_key = 'review'
+    sync_owner_field = 'user_id'
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     lapangan = models.ForeignKey(LapanganPadel, on_delete=models.CASCADE, related_name="reviews")
     rating = models.FloatField(default=0.0)
@@ -13,9 +19,74 @@ class Review(models.Model):
     anonymous = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     views = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'Review by {self.user.username} - Rating: {self.rating}'
     
     class Meta:
-        unique_together = ('user', 'lapangan')  # 1 user 1 review per lapangan
\ No newline at end of file
+        unique_together = ('user', 'lapangan')  # 1 user 1 review per lapangan
+        indexes = [
+            # Feed review per lapangan / per user, urut terbaru (cursor pagination)
+            models.Index(fields=['lapangan', '-created_at', '-id'], name='review_lapangan_feed_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='review_user_feed_idx'),
+            # Versi cache picker lapangan yang belum direview (review/unreviewed.py)
+            models.Index(fields=['user', 'updated_at'], name='review_user_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Simpan nilai awal dari DB agar signal bisa tahu apa yang berubah
+        instance._loaded_aggregate_key = instance._aggregate_key()
+        return instance
+
+    def _aggregate_key(self):
+        """(lapangan_id, rating) yang dipakai agregat di LapanganPadel."""
+        deferred = self.get_deferred_fields()
+        if 'lapangan_id' in deferred or 'rating' in deferred:
+            return None
+        return (self.lapangan_id, self.rating)
+
+
+# ===== Agregat review di LapanganPadel (lihat review/aggregates.py) =====
+
+@receiver(pre_save, sender=Review)
+def capture_old_aggregate_key(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or getattr(instance, '_loaded_aggregate_key', None) is not None:
+        return
+    # Instance tidak berasal dari DB (atau field-nya deferred): baca nilai lama
+    # sebelum baris ditimpa; di post_save yang terbaca sudah nilai baru
+    instance._old_aggregate_key = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('lapangan_id', 'rating')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_lapangan_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    from .aggregates import apply_review
+
+    if raw:
+        return
+    new_key = instance._aggregate_key()
+    if created:
+        apply_review(instance.lapangan_id, instance.rating, 1)
+    else:
+        old_key = getattr(instance, '_loaded_aggregate_key', None)
+        if old_key is None:
+            old_key = instance.__dict__.pop('_old_aggregate_key', None)
+        if old_key != new_key:
+            if old_key is not None:
+                apply_review(old_key[0], old_key[1], -1)
+            apply_review(instance.lapangan_id, instance.rating, 1)
+    instance._loaded_aggregate_key = new_key
+
+
+@receiver(post_delete, sender=Review)
+def update_lapangan_aggregates_on_delete(sender, instance, **kwargs):
+    from .aggregates import apply_review
+
+    apply_review(instance.lapangan_id, instance.rating, -1)
+
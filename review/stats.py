@@ -0,0 +1,97 @@
+"""Statistik review per lapangan untuk header halaman venue.
+
+Histogram bintang dan rata-rata dibaca dari kolom agregat di LapanganPadel
+(lihat review/aggregates.py), jadi tidak perlu mengagregasi seluruh review.
+Hanya tren terbaru yang butuh query ke tabel Review (memakai index
+lapangan+created_at). Hasil lengkapnya di-cache per lapangan dengan kunci
+yang memuat LapanganPadel.app_review_version. Versi itu naik di database
+setiap review lapangan ditulis/dihapus, jadi semua worker langsung memakai
+kunci baru walau cache-nya per proses; entri lama habis sendiri oleh TTL.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from home.models import LapanganPadel
+from .aggregates import STARS, star_field
+
+CACHE_TTL = 60 * 10
+TREND_WINDOW = timedelta(days=30)
+
+
+def stats_cache_key(lapangan_id, version):
+    return f'review:stats:{lapangan_id}:{version}'
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def recent_trend(lapangan_id, now=None):
+    """Jumlah dan rata-rata review TREND_WINDOW terakhir vs periode sebelumnya."""
+    from .models import Review
+
+    now = now or timezone.now()
+    recent = Q(created_at__gte=now - TREND_WINDOW)
+    previous = Q(created_at__gte=now - 2 * TREND_WINDOW, created_at__lt=now - TREND_WINDOW)
+    row = Review.objects.filter(
+        lapangan_id=lapangan_id, created_at__gte=now - 2 * TREND_WINDOW
+    ).aggregate(
+        recent_count=Count('id', filter=recent),
+        recent_sum=Sum('rating', filter=recent),
+        previous_count=Count('id', filter=previous),
+        previous_sum=Sum('rating', filter=previous),
+    )
+    recent_average = _average(row['recent_sum'] or 0, row['recent_count'])
+    previous_average = _average(row['previous_sum'] or 0, row['previous_count'])
+    change = None
+    if recent_average is not None and previous_average is not None:
+        change = round(recent_average - previous_average, 2)
+    return {
+        'days': TREND_WINDOW.days,
+        'count': row['recent_count'],
+        'average': recent_average,
+        'previous_count': row['previous_count'],
+        'previous_average': previous_average,
+        'change': change,
+    }
+
+
+def compute_stats(lapangan_id):
+    """Hitung statistik tanpa cache. Return None jika lapangan tidak ada."""
+    fields = ['app_total_review', 'app_rating', 'rating', 'total_review'] + [star_field(s) for s in STARS]
+    lapangan = LapanganPadel.objects.filter(pk=lapangan_id).values(*fields).first()
+    if lapangan is None:
+        return None
+
+    total = lapangan['app_total_review']
+    histogram = {str(s): lapangan[star_field(s)] for s in reversed(STARS)}
+    return {
+        'lapangan_id': lapangan_id,
+        'total_review': total,
+        'average_rating': round(lapangan['app_rating'], 2) if lapangan['app_rating'] is not None else None,
+        'histogram': histogram,
+        'percentages': {s: round(n * 100 / total, 1) if total else 0 for s, n in histogram.items()},
+        'google_rating': lapangan['rating'],
+        'google_total_review': lapangan['total_review'],
+        'recent': recent_trend(lapangan_id),
+    }
+
+
+def venue_stats(lapangan_id):
+    version = (
+        LapanganPadel.objects.filter(pk=lapangan_id)
+        .values_list('app_review_version', flat=True)
+        .first()
+    )
+    if version is None:
+        return None
+    key = stats_cache_key(lapangan_id, version)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(lapangan_id)
+        if stats is not None:
+            cache.set(key, stats, CACHE_TTL)
+    return stats
@@ -16,4 +16,18 @@ def make_list(n):
         n = int(n)
     except:
         n = 0
-    return range(n)
\ No newline at end of file
+    return range(n)
+
+@register.filter
+def card_stamp(review):
+    # Bagian kunci cache fragment kartu review (lihat review/fragments.py)
+    from review.fragments import card_stamp as stamp
+
+    return stamp(review)
+
+
+@register.filter
+def list_stamp(reviews):
+    from review.fragments import list_stamp as stamp
+
+    return stamp(reviews)
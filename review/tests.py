@@ -1,13 +1,32 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from home.models import LapanganPadel
+from sync.models import ChangeLog
+from .aggregates import star_bucket
+from .forms import ReviewForm
+from .fragments import card_stamp, fragment_cache
 from .models import Review
+from .stats import stats_cache_key, venue_stats
+from .unreviewed import unreviewed_venues, venue_choices
+from .view_counter import ViewCounter, view_counter
 
 
 class ReviewViewsTests(TestCase):
     def setUp(self):
+        # Tampilan yang dicatat view counter jangan sampai ditulis setelah test selesai
+        self.addCleanup(view_counter.discard)
         self.client = Client()
         self.user = User.objects.create_user(username="tasya", password="12345")
         self.lapangan = LapanganPadel.objects.create(
@@ -101,3 +120,433 @@ class ReviewViewsTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(Review.objects.count(), 1)
+
+
+class ReviewAggregateTests(TestCase):
+    """Agregat review di LapanganPadel dijaga oleh signal Review."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.user2 = User.objects.create_user(username="fidel", password="12345")
+        self.lapangan = LapanganPadel.objects.create(place_id="agg1", nama="A", alamat="Jl. A")
+        self.lapangan2 = LapanganPadel.objects.create(place_id="agg2", nama="B", alamat="Jl. B")
+
+    def test_star_bucket(self):
+        self.assertEqual(star_bucket(4.5), 5)
+        self.assertEqual(star_bucket(4.49), 4)
+        self.assertEqual(star_bucket(1.0), 1)
+        self.assertEqual(star_bucket(0), 1)
+
+    def test_create_update_delete_keep_aggregates_in_sync(self):
+        r1 = Review.objects.create(user=self.user, lapangan=self.lapangan, rating=5.0, comment="a")
+        Review.objects.create(user=self.user2, lapangan=self.lapangan, rating=3.0, comment="b")
+        self.lapangan.refresh_from_db()
+        self.assertEqual(self.lapangan.app_total_review, 2)
+        self.assertEqual(self.lapangan.app_rating, 4.0)
+        self.assertEqual((self.lapangan.app_star_5, self.lapangan.app_star_3), (1, 1))
+
+        # Ubah rating dan pindah lapangan
+        r1 = Review.objects.get(pk=r1.pk)
+        r1.rating = 4.0
+        r1.lapangan = self.lapangan2
+        r1.save()
+        self.lapangan.refresh_from_db()
+        self.lapangan2.refresh_from_db()
+        self.assertEqual(self.lapangan.app_total_review, 1)
+        self.assertEqual(self.lapangan.app_star_5, 0)
+        self.assertEqual(self.lapangan2.app_rating, 4.0)
+        self.assertEqual(self.lapangan2.app_star_4, 1)
+
+        # Simpan ulang tanpa perubahan tidak menggandakan hitungan
+        r1.comment = "edit"
+        r1.save()
+        r1.delete()
+        self.lapangan2.refresh_from_db()
+        self.assertEqual(self.lapangan2.app_total_review, 0)
+        self.assertIsNone(self.lapangan2.app_rating)
+
+    def test_update_from_unloaded_instance_moves_old_aggregate(self):
+        r1 = Review.objects.create(user=self.user, lapangan=self.lapangan, rating=5.0, comment="a")
+        # Instance dibuat manual (misal dari form/serializer), bukan dibaca dari DB
+        Review(
+            pk=r1.pk, user=self.user, lapangan=self.lapangan2, rating=2.0, comment="a",
+            created_at=r1.created_at,
+        ).save()
+        self.lapangan.refresh_from_db()
+        self.lapangan2.refresh_from_db()
+        self.assertEqual((self.lapangan.app_total_review, self.lapangan.app_star_5), (0, 0))
+        self.assertEqual((self.lapangan2.app_total_review, self.lapangan2.app_star_2), (1, 1))
+
+    def test_reconcile_command_fixes_drift(self):
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=2.0, comment="a")
+        LapanganPadel.objects.filter(pk=self.lapangan.pk).update(app_total_review=9, app_rating=1.0)
+        last_change = ChangeLog.objects.order_by("-id").values_list("id", flat=True).first()
+
+        out = StringIO()
+        call_command("reconcile_review_aggregates", stdout=out)
+        self.assertIn("1 lapangan", out.getvalue())
+        # Client sync ikut menerima nilai yang diperbaiki
+        self.assertEqual(
+            list(ChangeLog.objects.filter(id__gt=last_change).values_list("model", "object_pk")),
+            [("lapangan", str(self.lapangan.pk))],
+        )
+        self.lapangan.refresh_from_db()
+        self.assertEqual(self.lapangan.app_total_review, 1)
+        self.assertEqual(self.lapangan.app_rating, 2.0)
+        self.assertEqual(self.lapangan.app_star_2, 1)
+
+        out = StringIO()
+        call_command("reconcile_review_aggregates", stdout=out)
+        self.assertIn("already up to date", out.getvalue())
+
+    def test_lapangan_json_sorted_by_app_rating(self):
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=2.0, comment="a")
+        Review.objects.create(user=self.user, lapangan=self.lapangan2, rating=5.0, comment="b")
+        response = self.client.get(reverse("home:get_lapangan_json") + "?sort=app_rating")
+        data = response.json()
+        self.assertEqual([d["pk"] for d in data], [self.lapangan2.pk, self.lapangan.pk])
+        self.assertEqual(data[0]["fields"]["app_rating"], 5.0)
+
+
+class ReviewFeedPaginationTests(TestCase):
+    """Feed review memakai cursor pagination dan jumlah query yang tetap."""
+
+    def setUp(self):
+        # Tampilan yang dicatat view counter jangan sampai ditulis setelah test selesai
+        self.addCleanup(view_counter.discard)
+        self.client = Client()
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.lapangan = LapanganPadel.objects.create(place_id="feed1", nama="Feed", alamat="Jl. Feed")
+        self.client.login(username="tasya", password="12345")
+
+    def _add_reviews(self, n, start=0):
+        for i in range(start, start + n):
+            reviewer = User.objects.create_user(username=f"reviewer{i}", password="12345")
+            Review.objects.create(user=reviewer, lapangan=self.lapangan, rating=4, comment=f"Review {i}")
+
+    def _count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_cursor_walks_all_reviews_once(self):
+        self._add_reviews(5)
+        url = reverse("review:api_venue_reviews", args=[self.lapangan.id])
+
+        seen = []
+        params = {"limit": 2}
+        while True:
+            data = self.client.get(url, params).json()
+            seen += [row["comment"] for row in data["results"]]
+            if not data["next_cursor"]:
+                break
+            params = {"limit": 2, "cursor": data["next_cursor"]}
+
+        self.assertEqual(seen, [f"Review {i}" for i in reversed(range(5))])
+
+    def test_legacy_list_without_params(self):
+        self._add_reviews(3)
+        url = reverse("review:api_venue_reviews", args=[self.lapangan.id])
+        data = self.client.get(url).json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 3)
+
+    def test_invalid_cursor(self):
+        url = reverse("review:api_my_reviews")
+        response = self.client.get(url, {"cursor": "bukan-kursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_query_count_constant(self):
+        url = reverse("review:api_venue_reviews", args=[self.lapangan.id])
+        self._add_reviews(2)
+        few = self._count_queries(url, {"limit": 20})
+        self._add_reviews(15, start=2)
+        many = self._count_queries(url, {"limit": 20})
+        self.assertEqual(few, many)
+
+    def test_html_query_count_constant(self):
+        url = reverse("review:all_reviews", args=[self.lapangan.id])
+        self._add_reviews(2)
+        few = self._count_queries(url)
+        self._add_reviews(15, start=2)
+        many = self._count_queries(url)
+        self.assertEqual(few, many)
+
+    def test_html_next_page_link(self):
+        self._add_reviews(15)
+        url = reverse("review:all_reviews", args=[self.lapangan.id])
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["reviews"]), 12)
+        cursor = response.context["next_cursor"]
+        self.assertIsNotNone(cursor)
+
+        response = self.client.get(url, {"cursor": cursor})
+        self.assertEqual(len(response.context["reviews"]), 3)
+        self.assertIsNone(response.context["next_cursor"])
+
+
+class ReviewViewCounterTests(TestCase):
+    """Review.views ditambah lewat buffer write-behind, bukan save() per tampilan."""
+
+    def setUp(self):
+        view_counter.discard()
+        self.client = Client()
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.lapangan = LapanganPadel.objects.create(place_id="views1", nama="Views", alamat="Jl. Views")
+        self.review = Review.objects.create(user=self.user, lapangan=self.lapangan, rating=4, comment="Mantap")
+        self.client.login(username="tasya", password="12345")
+
+    def tearDown(self):
+        view_counter.discard()
+
+    def test_flush_writes_accumulated_counts(self):
+        other = User.objects.create_user(username="fidel", password="12345")
+        review2 = Review.objects.create(user=other, lapangan=self.lapangan, rating=5, comment="Oke")
+        counter = ViewCounter(flush_interval=3600)
+
+        counter.incr([self.review.pk, review2.pk])
+        counter.incr([self.review.pk])
+        counter.incr([self.review.pk])
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.views, 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(counter.flush(), 2)
+        self.review.refresh_from_db()
+        review2.refresh_from_db()
+        self.assertEqual((self.review.views, review2.views), (3, 1))
+        self.assertEqual(counter.pending(), {})
+
+    def test_full_buffer_flushes_in_background(self):
+        counter = ViewCounter(flush_interval=3600, max_pending=1)
+        flushed = threading.Event()
+        threads = []
+
+        def fake_flush():
+            threads.append(threading.current_thread())
+            flushed.set()
+            return 1
+
+        with patch.object(counter, "flush", side_effect=fake_flush):
+            with self.assertNumQueries(0):
+                counter.incr([self.review.pk])
+            self.assertTrue(flushed.wait(5))
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_venue_feed_buffers_views(self):
+        url = reverse("review:api_venue_reviews", args=[self.lapangan.id])
+        with patch.object(view_counter, "flush_interval", 3600):
+            self.client.get(url)
+            self.client.get(url, {"limit": 5})
+        self.assertEqual(view_counter.pending(), {self.review.pk: 2})
+
+        view_counter.flush()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.views, 2)
+
+    def test_failed_flush_is_logged_and_retried(self):
+        counter = ViewCounter(flush_interval=3600)
+        counter.incr([self.review.pk])
+        with patch.object(Review.objects, "filter", side_effect=DatabaseError("locked")):
+            with self.assertLogs("review.view_counter", "ERROR"):
+                self.assertEqual(counter.flush_quietly(), 0)
+        self.assertEqual(counter.pending(), {self.review.pk: 1})
+        self.assertEqual(counter.flush(), 1)
+
+
+class ReviewStatsTests(TestCase):
+    """Endpoint stats membaca histogram dari LapanganPadel dan di-cache per lapangan."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.lapangan = LapanganPadel.objects.create(
+            place_id="stats1", nama="Stats", alamat="Jl. Stats", rating=4.2, total_review=80
+        )
+        self.client.login(username="tasya", password="12345")
+
+    def _review(self, username, rating, days_ago=0):
+        user = User.objects.create_user(username=username, password="12345")
+        review = Review.objects.create(user=user, lapangan=self.lapangan, rating=rating, comment="ok")
+        if days_ago:
+            Review.objects.filter(pk=review.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return review
+
+    def test_histogram_and_trend(self):
+        self._review("a", 5)
+        self._review("b", 4)
+        self._review("c", 2, days_ago=40)
+        self._review("d", 1, days_ago=90)
+
+        response = self.client.get(reverse("review:api_venue_stats", args=[self.lapangan.id]))
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["total_review"], 4)
+        self.assertEqual(data["average_rating"], 3.0)
+        self.assertEqual(data["histogram"], {"5": 1, "4": 1, "3": 0, "2": 1, "1": 1})
+        self.assertEqual(data["percentages"]["5"], 25.0)
+        self.assertEqual(data["google_total_review"], 80)
+        self.assertEqual(data["recent"]["count"], 2)
+        self.assertEqual(data["recent"]["average"], 4.5)
+        self.assertEqual(data["recent"]["previous_average"], 2.0)
+        self.assertEqual(data["recent"]["change"], 2.5)
+
+    def test_served_from_cache(self):
+        self._review("a", 5)
+        venue_stats(self.lapangan.id)
+        # Hanya membaca versi agregat lapangan
+        with self.assertNumQueries(1):
+            stats = venue_stats(self.lapangan.id)
+        self.assertEqual(stats["total_review"], 1)
+
+    def test_review_write_changes_cache_key(self):
+        venue_stats(self.lapangan.id)
+        self.assertIsNotNone(cache.get(stats_cache_key(self.lapangan.id, 0)))
+        # Tanpa menghapus apa pun dari cache (seperti worker lain): versi di DB naik
+        review = self._review("a", 5)
+        self.assertEqual(venue_stats(self.lapangan.id)["total_review"], 1)
+
+        review.delete()
+        self.assertEqual(venue_stats(self.lapangan.id)["total_review"], 0)
+
+    def test_unknown_lapangan(self):
+        response = self.client.get(reverse("review:api_venue_stats", args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class UnreviewedVenuesTests(TestCase):
+    """Picker lapangan yang belum direview: anti-join, pagination, cache per user."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.venues = [
+            LapanganPadel.objects.create(place_id=f"unrev{i}", nama=f"Padel {name}", alamat="Jl. X")
+            for i, name in enumerate(["Alpha", "Bravo", "Charlie", "Delta", "Echo"])
+        ]
+        Review.objects.create(user=self.user, lapangan=self.venues[0], rating=4, comment="ok")
+        self.client.login(username="tasya", password="12345")
+
+    def test_uses_not_exists(self):
+        sql = str(unreviewed_venues(self.user).query).upper()
+        self.assertIn("NOT EXISTS", sql)
+        self.assertEqual(
+            [v.nama for v in unreviewed_venues(self.user)],
+            ["Padel Bravo", "Padel Charlie", "Padel Delta", "Padel Echo"],
+        )
+
+    def test_search_and_pagination(self):
+        url = reverse("review:api_get_unreviewed_venues")
+        data = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["Padel Bravo", "Padel Charlie"])
+        self.assertTrue(data["has_next"])
+
+        data = self.client.get(url, {"limit": 2, "page": 2}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["Padel Delta", "Padel Echo"])
+        self.assertFalse(data["has_next"])
+
+        data = self.client.get(url, {"q": "char"}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["Padel Charlie"])
+
+    def test_legacy_list(self):
+        data = self.client.get(reverse("review:api_get_unreviewed_venues")).json()
+        self.assertEqual(len(data), 4)
+        self.assertEqual(set(data[0]), {"id", "name"})
+
+    def test_cached_until_user_writes_review(self):
+        venue_choices(self.user)
+        # Hanya query versi, daftar lapangannya dari cache
+        with self.assertNumQueries(1):
+            self.assertEqual(len(venue_choices(self.user)), 4)
+
+        # Tanpa callback on_commit: tulisan dari worker lain juga terlihat
+        Review.objects.create(user=self.user, lapangan=self.venues[1], rating=4, comment="ok")
+        self.assertEqual(len(venue_choices(self.user)), 3)
+
+        Review.objects.filter(user=self.user, lapangan=self.venues[0]).delete()
+        self.assertEqual(len(venue_choices(self.user)), 4)
+
+    def test_form_renders_from_cache(self):
+        ReviewForm(user=self.user).as_p()
+        with self.assertNumQueries(1):
+            html = ReviewForm(user=self.user).as_p()
+        self.assertIn("Padel Bravo", html)
+        self.assertNotIn("Padel Alpha", html)
+
+    def test_form_rejects_reviewed_venue(self):
+        form = ReviewForm({"lapangan": self.venues[0].id, "comment": "lagi"}, user=self.user)
+        self.assertFalse(form.is_valid())
+        form = ReviewForm({"lapangan": self.venues[1].id, "comment": "baru"}, user=self.user)
+        self.assertTrue(form.is_valid())
+
+
+class ReviewFragmentCacheTests(TestCase):
+    """Fragment kartu/daftar review di-cache dan diganti saat review diedit/dihapus."""
+
+    def setUp(self):
+        # Tampilan yang dicatat view counter jangan sampai ditulis setelah test selesai
+        self.addCleanup(view_counter.discard)
+        cache.clear()
+        fragment_cache().clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="tasya", password="12345")
+        self.lapangan = LapanganPadel.objects.create(place_id="frag1", nama="Frag", alamat="Jl. Frag")
+        self.review = Review.objects.create(user=self.user, lapangan=self.lapangan, rating=4, comment="Komentar awal")
+        self.client.login(username="tasya", password="12345")
+        self.url = reverse("review:all_reviews", args=[self.lapangan.id])
+
+    def test_card_fragment_cached(self):
+        self.client.get(self.url)
+        key = make_template_fragment_key("review_card", [self.review.pk, card_stamp(self.review)])
+        self.assertIsNotNone(fragment_cache().get(key))
+
+    def test_edit_shows_new_comment(self):
+        self.assertContains(self.client.get(self.url), "Komentar awal")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review.comment = "Komentar baru"
+            self.review.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Komentar baru")
+        self.assertNotContains(response, "Komentar awal")
+
+    def test_delete_removes_card(self):
+        other = User.objects.create_user(username="fidel", password="12345")
+        Review.objects.create(user=other, lapangan=self.lapangan, rating=5, comment="Masih ada")
+        self.assertContains(self.client.get(self.url), "Komentar awal")
+
+        # Callback on_commit sengaja tidak dijalankan: perubahan dari worker
+        # lain tetap harus terlihat tanpa invalidasi cache proses ini
+        with self.captureOnCommitCallbacks(execute=False):
+            self.review.delete()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Masih ada")
+        self.assertNotContains(response, "Komentar awal")
+
+    def test_comment_edit_in_other_worker_shows(self):
+        self.assertContains(self.client.get(self.url), "Komentar awal")
+        Review.objects.filter(pk=self.review.pk).update(comment="Dari worker lain", updated_at=timezone.now())
+        self.assertContains(self.client.get(self.url), "Dari worker lain")
+
+    def test_profile_photo_change_shows(self):
+        other = User.objects.create_user(username="fidel", password="12345")
+        Review.objects.create(user=other, lapangan=self.lapangan, rating=5, comment="Mantap")
+        self.client.get(self.url)
+        other.profile.photo_url = "https://example.com/foto-baru.png"
+        other.profile.save()
+        self.assertContains(self.client.get(self.url), "foto-baru.png")
+
+    def test_venue_rename_shows(self):
+        self.client.get(reverse("review:my_reviews"))
+        LapanganPadel.objects.filter(pk=self.lapangan.pk).update(nama="Nama Baru")
+        self.assertContains(self.client.get(reverse("review:my_reviews")), 'alt="Nama Baru"')
+
+    def test_my_reviews_edit_invalidates_card(self):
+        self.assertContains(self.client.get(reverse("review:my_reviews")), "Komentar awal")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review.anonymous = True
+            self.review.comment = "Sudah diubah"
+            self.review.save()
+        self.assertContains(self.client.get(reverse("review:my_reviews")), "Sudah diubah")
@@ -0,0 +1,65 @@
+"""Lapangan yang belum direview user, untuk dropdown/picker di form review.
+
+Query memakai anti-join NOT EXISTS (bukan exclude(id__in=...) yang
+membawa seluruh id review user ke query). Hasil per user di-cache dengan
+kunci berversi; versi diturunkan dari review user di database (jumlah dan
+updated_at terbaru) sehingga tulis/hapus review di worker mana pun langsung
+membuat semua halaman/pencarian lama tidak terpakai.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef
+
+from home.models import LapanganPadel
+
+CACHE_TTL = 60 * 10
+
+
+def unreviewed_venues(user):
+    from .models import Review
+
+    reviewed = Review.objects.filter(user=user, lapangan=OuterRef('pk'))
+    return LapanganPadel.objects.filter(~Exists(reviewed)).order_by('nama', 'pk')
+
+
+def _version(user):
+    from .models import Review
+
+    # Satu query di index (user, updated_at); hapus review mengubah jumlah,
+    # tambah/edit review mengubah updated_at terbaru
+    stamp = Review.objects.filter(user=user).aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stamp['latest'].timestamp() if stamp['latest'] else 0
+    return f"{stamp['count']}-{latest}"
+
+
+def _cached(user, suffix, compute):
+    key = f'review:unreviewed:{user.pk}:{_version(user)}:{suffix}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, CACHE_TTL)
+    return value
+
+
+def venue_choices(user):
+    """Semua pilihan (id, nama) untuk select di ReviewForm."""
+    return _cached(user, 'choices', lambda: list(unreviewed_venues(user).values_list('pk', 'nama')))
+
+
+def search_page(user, query='', page=1, limit=20):
+    """Satu halaman hasil pencarian nama lapangan yang belum direview."""
+    def compute():
+        venues = unreviewed_venues(user)
+        if query:
+            venues = venues.filter(nama__icontains=query)
+        start = (page - 1) * limit
+        rows = list(venues.values('id', 'nama')[start:start + limit + 1])
+        return {
+            'results': [{'id': row['id'], 'name': row['nama']} for row in rows[:limit]],
+            'page': page,
+            'has_next': len(rows) > limit,
+        }
+
+    digest = hashlib.md5(query.lower().encode()).hexdigest()
+    return _cached(user, f'search:{digest}:{page}:{limit}', compute)
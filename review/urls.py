@@ -13,6 +13,7 @@ urlpatterns = [
     # Path API url
     path('api/my-reviews/', views.api_my_reviews, name='api_my_reviews'),
     path('api/venue/<int:lapangan_id>/', views.api_venue_reviews, name='api_venue_reviews'),
+    path('api/venue/<int:lapangan_id>/stats/', views.api_venue_stats, name='api_venue_stats'),
     path('api/create/', views.api_create_review, name='api_create_review'),
     path('api/update/<int:pk>/', views.api_update_review, name='api_update_review'),
     path('api/delete/<int:pk>/', views.api_delete_review, name='api_delete_review'),
@@ -0,0 +1,126 @@
+"""Counter write-behind untuk Review.views.
+
+Menyimpan +1 per tampilan dengan save() membuat feed review jadi hotspot
+tulis. Di sini penambahan ditampung di memori per proses, lalu ditulis
+sekaligus dengan satu UPDATE per batch:
+
+    UPDATE review_review SET views = views + CASE id WHEN .. THEN n .. END
+    WHERE id IN (...)
+
+Flush dijalankan thread timer di background, bukan di request: paling
+lambat FLUSH_INTERVAL setelah tampilan pertama yang tertunda, atau segera
+saat buffer mencapai MAX_PENDING, dan sekali lagi saat proses keluar
+(atexit) sehingga worker gunicorn yang dimatikan secara graceful tidak
+kehilangan hitungan. Gagal menulis hanya di-log; hitungan dikembalikan ke
+buffer dan dicoba lagi pada flush berikutnya.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.db import DatabaseError, connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10  # detik
+MAX_PENDING = 1000  # jumlah review berbeda di buffer
+BATCH_SIZE = 500
+
+
+class ViewCounter:
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._timer = None
+
+    def incr(self, review_ids):
+        """Catat satu tampilan untuk tiap id review. Tidak menyentuh database."""
+        with self._lock:
+            self._pending.update(review_ids)
+            if len(self._pending) >= self.max_pending:
+                self._schedule(0)
+            elif self._pending:
+                self._schedule(self.flush_interval)
+
+    def _schedule(self, delay):
+        # Dipanggil dengan self._lock terkunci
+        if self._timer is not None:
+            if delay:
+                return
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._run_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_timer(self):
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+        try:
+            self.flush_quietly()
+        finally:
+            # Koneksi database milik thread timer ini
+            connections.close_all()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def discard(self):
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self):
+        """Tulis semua hitungan yang tertunda. Return jumlah review yang diperbarui."""
+        from .models import Review
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        written = 0
+        try:
+            while written < len(items):
+                batch = items[written:written + BATCH_SIZE]
+                increment = Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in batch],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                Review.objects.filter(pk__in=[pk for pk, _ in batch]).update(views=F('views') + increment)
+                written += len(batch)
+        except DatabaseError:
+            # Kembalikan yang belum tertulis ke buffer untuk dicoba lagi nanti
+            with self._lock:
+                self._pending.update(dict(items[written:]))
+            raise
+        return len(pending)
+
+    def flush_quietly(self):
+        """flush() yang tidak pernah raise; jika gagal, flush berikutnya dijadwalkan."""
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('Gagal menulis view count review')
+            with self._lock:
+                if self._pending:
+                    self._schedule(self.flush_interval)
+            return 0
+
+
+view_counter = ViewCounter()
+
+
+def record_views(reviews):
+    view_counter.incr(review.pk for review in reviews)
+
+
+@atexit.register
+def _flush_on_exit():
+    view_counter.flush_quietly()
@@ -8,6 +8,25 @@ from django.http import JsonResponse
 import json
 import requests
 from django.http import HttpResponse
+from .stats import venue_stats
+from .unreviewed import search_page, venue_choices
+from .view_counter import record_views
+from sportspace.pagination import InvalidCursor, paginate_desc, parse_limit
+from sportspace.ratelimit import rate_limit
+
+REVIEW_PAGE_SIZE = 12
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+UNREVIEWED_PAGE_SIZE = 20
+
+
+def _review_page(request, reviews):
+    # Satu halaman review untuk template; kursor rusak dianggap halaman pertama
+    reviews = reviews.select_related('lapangan', 'user__profile')
+    try:
+        return paginate_desc(reviews, request.GET.get('cursor'), REVIEW_PAGE_SIZE)
+    except InvalidCursor:
+        return paginate_desc(reviews, None, REVIEW_PAGE_SIZE)
 
 # review/views.py
 @login_required
@@ -36,7 +55,7 @@ def add_review(request, lapangan_id):
 @login_required
 def all_reviews(request, id):
     lapangan = get_object_or_404(LapanganPadel, pk=id)
-    reviews = Review.objects.filter(lapangan=lapangan).order_by('-created_at')
+    reviews, next_cursor = _review_page(request, Review.objects.filter(lapangan=lapangan))
 
     # Form logic
     if request.method == "POST":
@@ -51,15 +70,17 @@ def all_reviews(request, id):
     else:
         form = ReviewForm(user=request.user)
 
+    record_views(reviews)
     return render(request, "all_reviews.html", {
         "lapangan": lapangan,
         "reviews": reviews,
+        "next_cursor": next_cursor,
         "form": form,
     })
     
 @login_required
 def my_reviews(request):
-    reviews = Review.objects.filter(user=request.user)
+    reviews, next_cursor = _review_page(request, Review.objects.filter(user=request.user))
 
     if request.method == "POST":
         form = ReviewForm(request.POST, user=request.user)
@@ -78,7 +99,7 @@ def my_reviews(request):
     else:
         form = ReviewForm(user=request.user)
 
-    return render(request, "my_reviews.html", {"reviews": reviews, "form": form})
+    return render(request, "my_reviews.html", {"reviews": reviews, "next_cursor": next_cursor, "form": form})
 
 @login_required
 def edit_review(request, pk):
@@ -142,20 +163,52 @@ def serialize_review(request, review):
         'reviewed_at': review.created_at.strftime("%Y-%m-%d"),
     }
 
+def _review_feed(request, reviews, count_views=False):
+    """
+    Response JSON untuk daftar review.
+
+    Dengan ?cursor= atau ?limit= -> {"results": [...], "next_cursor": ...},
+    panggil lagi dengan ?cursor=<next_cursor> sampai next_cursor null.
+    Tanpa keduanya tetap list penuh (format lama) untuk client yang belum update.
+    """
+    reviews = reviews.select_related('lapangan', 'user__profile')
+    if 'cursor' not in request.GET and 'limit' not in request.GET:
+        reviews = list(reviews.order_by('-created_at', '-id'))
+        if count_views:
+            record_views(reviews)
+        return JsonResponse([serialize_review(request, r) for r in reviews], safe=False)
+
+    try:
+        page, next_cursor = paginate_desc(
+            reviews, request.GET.get('cursor'), parse_limit(request, API_PAGE_SIZE, API_MAX_PAGE_SIZE)
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    if count_views:
+        record_views(page)
+    return JsonResponse({
+        'results': [serialize_review(request, r) for r in page],
+        'next_cursor': next_cursor,
+    })
+
 @login_required
 def api_my_reviews(request):
     # API: Ambil daftar review milik user yang sedang login
-    reviews = Review.objects.filter(user=request.user).order_by('-created_at')
-    data = [serialize_review(request, r) for r in reviews]
-    return JsonResponse(data, safe=False)
+    return _review_feed(request, Review.objects.filter(user=request.user))
 
 @login_required
 def api_venue_reviews(request, lapangan_id):
     # API: Ambil daftar review untuk lapangan tertentu
     lapangan = get_object_or_404(LapanganPadel, id=lapangan_id)
-    reviews = Review.objects.filter(lapangan=lapangan).order_by('-created_at')
-    data = [serialize_review(request, r) for r in reviews]
-    return JsonResponse(data, safe=False)
+    return _review_feed(request, Review.objects.filter(lapangan=lapangan), count_views=True)
+
+@login_required
+def api_venue_stats(request, lapangan_id):
+    # API: Ringkasan review lapangan (histogram bintang + tren) untuk header halaman venue
+    stats = venue_stats(lapangan_id)
+    if stats is None:
+        return JsonResponse({'error': 'Lapangan not found'}, status=404)
+    return JsonResponse(stats)
 
 @csrf_exempt
 @login_required
@@ -217,7 +270,9 @@ def api_delete_review(request, pk):
         
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+# Bucket sama dengan home.views.proxy_image supaya limit tidak bisa dihindari lewat URL ini
 @csrf_exempt
+@rate_limit('proxy_image', '60/m', key='ip')
 def proxy_image(request):
     # Helper: Proxy gambar eksternal untuk mengatasi masalah CORS/SSL di Flutter
     url = request.GET.get('url')
@@ -244,14 +299,16 @@ def proxy_image(request):
 @login_required
 def api_get_unreviewed_venues(request):
     # API: List lapangan yang BELUM direview user (untuk dropdown pilihan)
-    reviewed_venue_ids = Review.objects.filter(user=request.user).values_list('lapangan_id', flat=True)
-    unreviewed_venues = LapanganPadel.objects.exclude(id__in=reviewed_venue_ids)
-    
-    data = []
-    for venue in unreviewed_venues:
-        data.append({
-            'id': venue.id,
-            'name': venue.nama,
-        })
-        
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    # ?q=<nama>&page=1&limit=20 -> {"results": [...], "page": 1, "has_next": ...}
+    # Tanpa parameter tetap list penuh (format lama)
+    if not any(param in request.GET for param in ('q', 'page', 'limit')):
+        data = [{'id': pk, 'name': nama} for pk, nama in venue_choices(request.user)]
+        return JsonResponse(data, safe=False)
+
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    limit = parse_limit(request, UNREVIEWED_PAGE_SIZE, API_MAX_PAGE_SIZE)
+    query = request.GET.get('q', '').strip()
+    return JsonResponse(search_page(request.user, query, page, limit))
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Pagination berbasis kursor (keyset) yang dipakai beberapa app.
+
+Berbeda dengan Paginator (OFFSET), kursor menyimpan posisi baris terakhir
+sehingga query halaman berikutnya tetap memakai index dan tidak bergeser
+saat ada data baru.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_limit(request, default=20, maximum=100):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def paginate_desc(queryset, cursor=None, limit=20, field='created_at'):
+    """Keyset pagination urut menurun berdasarkan (field datetime, id).
+
+    Return (items, next_cursor); next_cursor None jika sudah halaman
+    terakhir. Raise InvalidCursor jika kursor tidak bisa dibaca.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor)
+            value = datetime.fromisoformat(value)
+            last_id = int(last_id)
+        except (InvalidCursor, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': last_id})
+        )
+
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field).isoformat(), last.id])
+    return items, next_cursor
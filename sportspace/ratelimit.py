@@ -0,0 +1,178 @@
+"""Rate limiting token bucket untuk endpoint yang mahal dilayani.
+
+    @rate_limit('proxy_image', '60/m', key='ip')
+    def proxy_image(request): ...
+
+Setiap klien (user atau IP) punya bucket berisi `burst` token (default sama
+dengan jumlah pada rate) yang terisi kembali sesuai rate. Satu request
+memakai satu token; jika kosong, view tidak dijalankan dan klien mendapat
+429 dengan header Retry-After (detik).
+
+Rate per route bisa diubah tanpa menyentuh kode lewat
+settings.RATE_LIMITS = {'proxy_image': '120/m'} (None = tidak dibatasi).
+Tempat menyimpan bucket dipilih lewat settings.RATE_LIMIT_STORAGE:
+
+- LocalStorage: dict di memori proses; cukup untuk development atau satu worker.
+- CacheStorage: cache Django (RATE_LIMIT_CACHE, default 'default'); pakai
+  cache bersama (Redis/Memcached) agar limit berlaku untuk semua worker.
+"""
+import math
+import threading
+import time
+from functools import lru_cache, wraps
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+DEFAULT_STORAGE = 'sportspace.ratelimit.LocalStorage'
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' -> (10, 60): 10 request per 60 detik."""
+    count, _, unit = rate.partition('/')
+    return int(count), UNITS[unit[:1]]
+
+
+def take(state, now, capacity, per_second):
+    """Ambil satu token dari bucket.
+
+    state adalah (token, waktu) terakhir atau None untuk bucket baru.
+    Return (state baru, detik yang harus ditunggu; 0 jika diizinkan).
+    """
+    tokens, last = state if state else (capacity, now)
+    tokens = min(capacity, tokens + (now - last) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalStorage:
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        # key -> (state, waktu bucket penuh lagi); urutan dict = urutan akses terakhir
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, per_second):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.pop(key, None)
+            state, wait = take(entry[0] if entry else None, now, capacity, per_second)
+            # Setiap route punya rate sendiri, jadi waktu penuhnya disimpan per bucket
+            self._buckets[key] = (state, now + (capacity - state[0]) / per_second)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # Bucket yang sudah penuh lagi sama saja dengan bucket baru
+        buckets = {k: v for k, v in self._buckets.items() if v[1] > now}
+        # Masih terlalu banyak: buang yang paling lama tidak dipakai. Sisakan
+        # ruang 10% agar prune O(n) tidak terulang di setiap request berikutnya.
+        excess = len(buckets) - self.MAX_KEYS * 9 // 10
+        if excess > 0:
+            for k in list(islice(buckets, excess)):
+                del buckets[k]
+        self._buckets = buckets
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheStorage:
+    """Bucket di cache Django.
+
+    Baca lalu tulis tidak atomik, jadi request yang benar-benar bersamaan di
+    worker berbeda bisa sedikit melewati limit; cukup untuk mencegah
+    penyalahgunaan tanpa menambah lock ke setiap request.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+    def consume(self, key, capacity, per_second):
+        now = time.time()
+        key = f'ratelimit:{key}'
+        state, wait = take(self.cache.get(key), now, capacity, per_second)
+        # Lewat dari waktu ini bucket sudah penuh lagi, entri boleh hilang
+        self.cache.set(key, state, math.ceil(capacity / per_second) + 1)
+        return wait
+
+    def clear(self):
+        self.cache.clear()
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage():
+    path = getattr(settings, 'RATE_LIMIT_STORAGE', DEFAULT_STORAGE)
+    if path not in _storages:
+        with _storages_lock:
+            if path not in _storages:
+                _storages[path] = import_string(path)()
+    return _storages[path]
+
+
+def client_ip(request):
+    # Di belakang reverse proxy, set RATE_LIMIT_IP_HEADER = 'HTTP_X_FORWARDED_FOR'
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request, key):
+    if key == 'user' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def check_rate(request, name, rate, key='user', burst=None):
+    """
+    Ambil satu token dari bucket `name` untuk klien request ini.
+
+    Return response 429 jika limit habis, None jika request boleh lanjut.
+    Dipakai langsung di view yang hanya membatasi sebagian jalurnya.
+    """
+    configured = getattr(settings, 'RATE_LIMITS', {}).get(name, rate)
+    if configured is None:
+        return None
+
+    count, period = parse_rate(configured)
+    capacity = burst or count
+    wait = get_storage().consume(f'{name}:{client_key(request, key)}', capacity, count / period)
+    if not wait:
+        return None
+    response = JsonResponse(
+        {'status': False, 'success': False, 'message': 'Terlalu banyak request, coba lagi nanti.'},
+        status=429,
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit(name, rate, key='user', burst=None):
+    """
+    Batasi view dengan token bucket bernama `name`.
+
+    key='user' -> per user yang login (fallback ke IP untuk anonim),
+    key='ip'   -> per alamat IP.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            limited = check_rate(request, name, rate, key, burst)
+            if limited:
+                return limited
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -67,6 +67,7 @@ INSTALLED_APPS = [
     'widget_tweaks',
     'home',
     'matchmaking',
+    'sync',
     "corsheaders",
 ]
 
@@ -78,6 +79,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Token Bearer untuk Flutter (accounts/tokens.py), tanpa baca tabel session
+    'accounts.middleware.TokenAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -141,9 +144,43 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # SQLite mengabaikan select_for_update; BEGIN IMMEDIATE mengambil
+            # lock tulis di awal transaksi sehingga transaksi join/matchmaking
+            # tetap berjalan bergantian
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+            # Database test berbentuk file (bukan in-memory) agar test yang
+            # memakai beberapa thread/koneksi bisa berjalan
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Fragment template ({% cache %}) untuk kartu review, dipisah agar tidak
+    # saling menggusur dengan cache data biasa
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Broker pub/sub untuk chat realtime (lihat accounts/realtime.py). Default-nya
+# hanya menjangkau koneksi di proses yang sama; ganti dengan broker eksternal
+# jika server ASGI dijalankan dengan beberapa worker.
+CHAT_BROKER = 'accounts.realtime.InProcessBroker'
+
+# Rate limit endpoint mahal (lihat sportspace/ratelimit.py). LocalStorage hanya
+# berlaku per proses; untuk beberapa worker gunakan CacheStorage dengan cache
+# bersama. RATE_LIMITS mengganti rate bawaan per nama, mis. {'proxy_image': '120/m'}.
+RATE_LIMIT_STORAGE = 'sportspace.ratelimit.LocalStorage'
+RATE_LIMITS = {}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -190,6 +227,14 @@ if DEBUG:
 else:
     STATIC_ROOT = BASE_DIR / 'static' # merujuk ke /static root project pada mode production
 
+AUTHENTICATION_BACKENDS = [
+    # User + Profile dalam satu query untuk setiap request yang login
+    'accounts.backends.ProfileModelBackend',
+    # Untuk session lama yang tersimpan dengan backend bawaan; boleh dihapus
+    # setelah session tersebut kedaluwarsa (SESSION_COOKIE_AGE)
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Auth redirects
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/home/'
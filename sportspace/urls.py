@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from accounts import views as accounts_views
+from sync import views as sync_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -35,4 +36,8 @@ urlpatterns = [
     # Admin panel app 
     path('dashboard-admin/', include('adminpanel.urls')),
     path('matchmaking/', include('matchmaking.urls')),
+    # Delta sync untuk aplikasi Flutter
+    path('sync/', include('sync.urls')),
+    # Gabungan beberapa GET dalam satu request (lihat sync.views.batch)
+    path('api/batch/', sync_views.batch, name='api_batch'),
 ]
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = (
+        'Hapus entri ChangeLog yang lebih tua dari --days hari. Client dengan sync token '
+        'yang lebih tua akan otomatis mendapat snapshot penuh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = ChangeLog.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change log entries.'))
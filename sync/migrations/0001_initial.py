@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_pk', models.CharField(max_length=64)),
+                ('action', models.CharField(choices=[('upsert', 'Created/Updated'), ('delete', 'Deleted')], max_length=10)),
+                ('owner_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['owner_id', 'id'], name='sync_change_owner_i_bc1e24_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+
+class ChangeLog(models.Model):
+    """Satu baris per mutasi pada model yang di-sync ke aplikasi Flutter.
+
+    id dipakai sebagai kursor sync token (naik terus). Baris ditulis di
+    transaksi yang sama dengan mutasinya, lihat SyncTrackedMixin.
+    """
+
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (UPSERT, 'Created/Updated'),
+        (DELETE, 'Deleted'),
+    ]
+
+    model = models.CharField(max_length=32)
+    object_pk = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Pemilik data privat (Booking/Review). None = data publik untuk semua user.
+    # Sengaja bukan ForeignKey: tombstone tetap ada walau user-nya dihapus.
+    owner_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['owner_id', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model}:{self.object_pk}"
+
+
+class SyncTrackedMixin:
+    """Mixin untuk model yang perubahannya dicatat di ChangeLog.
+
+    Subclass wajib mengisi sync_key, dan sync_owner_field jika datanya
+    privat per user (misal 'user_id').
+    """
+
+    sync_key = None
+    sync_owner_field = None
+
+    def sync_owner_id(self):
+        if self.sync_owner_field is None:
+            return None
+        return getattr(self, self.sync_owner_field)
+
+    def save(self, *args, **kwargs):
+        # post_save tidak berjalan di dalam transaksi save, jadi dibungkus di sini
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            record_change(self, ChangeLog.UPSERT)
+
+
+def record_change(instance, action):
+    return ChangeLog.objects.create(
+        model=instance.sync_key,
+        object_pk=str(instance.pk),
+        action=action,
+        owner_id=instance.sync_owner_id(),
+    )
+
+
+def record_changes(instances, action):
+    """Versi bulk dari record_change (untuk bulk_create/bulk_update)."""
+    ChangeLog.objects.bulk_create([
+        ChangeLog(
+            model=instance.sync_key,
+            object_pk=str(instance.pk),
+            action=action,
+            owner_id=instance.sync_owner_id(),
+        )
+        for instance in instances
+    ])
+
+
+@receiver(post_delete)
+def log_delete(sender, instance, **kwargs):
+    # post_delete dikirim di dalam transaksi Collector.delete()
+    if isinstance(instance, SyncTrackedMixin):
+        record_change(instance, ChangeLog.DELETE)
+
+
+@receiver(m2m_changed)
+def log_m2m_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    # Misal Match.players.add(user): baris Match ikut berubah bagi client
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, SyncTrackedMixin):
+        record_change(instance, ChangeLog.UPSERT)
+    elif issubclass(model, SyncTrackedMixin) and pk_set:
+        record_changes(model.objects.filter(pk__in=pk_set), ChangeLog.UPSERT)
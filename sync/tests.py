@@ -0,0 +1,204 @@
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from booking.models import Booking, Venue
+from home.models import LapanganPadel
+from matchmaking.models import Match
+from review.models import Review
+from review.view_counter import view_counter
+from . import views
+from .models import ChangeLog
+
+
+class ChangesSinceTests(TestCase):
+    """Tes delta sync feed (/sync/api/changes/)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="12345")
+        self.other = User.objects.create_user(username="bob", password="12345")
+        self.client.login(username="alice", password="12345")
+        self.url = reverse("sync:changes_since")
+
+        self.lapangan = LapanganPadel.objects.create(place_id="s1", nama="Sync Court", alamat="Jl. S")
+        self.venue = Venue.objects.create(name="Sync Court", location="X", address="Jl. S")
+        self.match = Match.objects.create(mode="1v1", created_by=self.other)
+
+    def _booking(self, user, hour):
+        return Booking.objects.create(
+            user=user, venue=self.venue, booking_date=date.today() + timedelta(days=1),
+            start_time=time(hour, 0), end_time=time(hour + 1, 0),
+            customer_name="A", customer_email="a@a.com", customer_phone="1",
+        )
+
+    def test_full_sync_without_token(self):
+        self._booking(self.user, 10)
+        self._booking(self.other, 11)
+        data = self.client.get(self.url).json()
+        self.assertTrue(data["full"])
+        self.assertEqual(len(data["changes"]["lapangan"]["upserted"]), 1)
+        self.assertEqual(len(data["changes"]["match"]["upserted"]), 1)
+        # Booking user lain tidak ikut
+        self.assertEqual(len(data["changes"]["booking"]["upserted"]), 1)
+        self.assertTrue(data["sync_token"])
+
+    def test_delta_returns_changes_and_tombstones(self):
+        token = self.client.get(self.url).json()["sync_token"]
+
+        new_lapangan = LapanganPadel.objects.create(place_id="s2", nama="Baru", alamat="Jl. B")
+        mine = self._booking(self.user, 10)
+        self._booking(self.other, 11)
+        Review.objects.create(user=self.user, lapangan=self.lapangan, rating=4.0, comment="ok")
+        match_id = self.match.pk
+        self.match.delete()
+
+        data = self.client.get(self.url, {"token": token}).json()
+        self.assertFalse(data["full"])
+        changes = data["changes"]
+        lapangan_ids = {row["pk"] for row in changes["lapangan"]["upserted"]}
+        # Lapangan baru + lapangan yang agregat review-nya berubah
+        self.assertEqual(lapangan_ids, {new_lapangan.pk, self.lapangan.pk})
+        self.assertEqual([b["id"] for b in changes["booking"]["upserted"]], [str(mine.pk)])
+        self.assertEqual(len(changes["review"]["upserted"]), 1)
+        self.assertEqual(changes["match"]["deleted"], [str(match_id)])
+
+        # Token baru: tidak ada perubahan lagi
+        data = self.client.get(self.url, {"token": data["sync_token"]}).json()
+        self.assertTrue(all(not c["upserted"] and not c["deleted"] for c in data["changes"].values()))
+
+    def test_pagination_with_limit(self):
+        token = self.client.get(self.url).json()["sync_token"]
+        for i in range(3):
+            LapanganPadel.objects.create(place_id=f"p{i}", nama=f"P{i}", alamat="Jl.")
+
+        data = self.client.get(self.url, {"token": token, "limit": 2}).json()
+        self.assertTrue(data["has_more"])
+        self.assertEqual(len(data["changes"]["lapangan"]["upserted"]), 2)
+        data = self.client.get(self.url, {"token": data["sync_token"], "limit": 2}).json()
+        self.assertFalse(data["has_more"])
+        self.assertEqual(len(data["changes"]["lapangan"]["upserted"]), 1)
+
+    def test_late_commit_below_cursor_is_delivered(self):
+        token = self.client.get(self.url).json()["sync_token"]
+        slow = LapanganPadel.objects.create(place_id="lambat", nama="Lambat", alamat="Jl.")
+        fast = LapanganPadel.objects.create(place_id="cepat", nama="Cepat", alamat="Jl.")
+        # Seolah transaksi "lambat" belum commit saat sync berjalan: id-nya
+        # lebih kecil dari entri "cepat" yang sudah terlihat
+        entry = ChangeLog.objects.get(model="lapangan", object_pk=str(slow.pk))
+        entry.delete()
+
+        data = self.client.get(self.url, {"token": token}).json()
+        self.assertEqual([row["pk"] for row in data["changes"]["lapangan"]["upserted"]], [fast.pk])
+
+        ChangeLog.objects.create(id=entry.id, model="lapangan", object_pk=str(slow.pk), action=ChangeLog.UPSERT)
+        data = self.client.get(self.url, {"token": data["sync_token"]}).json()
+        self.assertEqual([row["pk"] for row in data["changes"]["lapangan"]["upserted"]], [slow.pk])
+
+        data = self.client.get(self.url, {"token": data["sync_token"]}).json()
+        self.assertFalse(data["changes"]["lapangan"]["upserted"])
+
+    def test_gap_overflow_rewinds_cursor_instead_of_dropping(self):
+        token = self.client.get(self.url).json()["sync_token"]
+        slow = [
+            LapanganPadel.objects.create(place_id=f"lambat{i}", nama=f"Lambat {i}", alamat="Jl.")
+            for i in range(3)
+        ]
+        fast = LapanganPadel.objects.create(place_id="cepat", nama="Cepat", alamat="Jl.")
+        entries = [ChangeLog.objects.get(model="lapangan", object_pk=str(lap.pk)) for lap in slow]
+        ChangeLog.objects.filter(id__in=[e.id for e in entries]).delete()
+
+        with patch("sync.views.MAX_GAPS", 2):
+            data = self.client.get(self.url, {"token": token}).json()
+            cursor, gaps = views.read_token(data["sync_token"])
+            self.assertEqual(len(gaps), 2)
+            self.assertLess(cursor, entries[2].id)
+
+            for e in entries:
+                ChangeLog.objects.create(id=e.id, model="lapangan", object_pk=e.object_pk, action=ChangeLog.UPSERT)
+            delivered = set()
+            for _ in range(3):
+                data = self.client.get(self.url, {"token": data["sync_token"]}).json()
+                delivered |= {row["pk"] for row in data["changes"]["lapangan"]["upserted"]}
+        self.assertTrue({lap.pk for lap in slow} <= delivered)
+        self.assertIn(fast.pk, delivered)  # di atas kursor yang mundur, terkirim ulang
+
+    def test_gap_older_than_timeout_not_tracked(self):
+        token = self.client.get(self.url).json()["sync_token"]
+        slow = LapanganPadel.objects.create(place_id="lambat", nama="Lambat", alamat="Jl.")
+        LapanganPadel.objects.create(place_id="cepat", nama="Cepat", alamat="Jl.")
+        ChangeLog.objects.filter(model="lapangan", object_pk=str(slow.pk)).delete()
+        # Entri di atas gap ditulis lebih dari GAP_TIMEOUT lalu: transaksi
+        # pemilik gap sudah dianggap rollback
+        ChangeLog.objects.update(created_at=timezone.now() - views.GAP_TIMEOUT - timedelta(minutes=1))
+        data = self.client.get(self.url, {"token": token}).json()
+        self.assertEqual(views.read_token(data["sync_token"])[1], [])
+
+    def test_legacy_token_still_accepted(self):
+        cursor = ChangeLog.objects.order_by("-id").values_list("id", flat=True).first()
+        token = signing.Signer(salt="sync.token").sign(str(cursor))
+        LapanganPadel.objects.create(place_id="baru", nama="Baru", alamat="Jl.")
+        data = self.client.get(self.url, {"token": token}).json()
+        self.assertFalse(data["full"])
+        self.assertEqual(len(data["changes"]["lapangan"]["upserted"]), 1)
+
+    def test_invalid_token_falls_back_to_full_sync(self):
+        data = self.client.get(self.url, {"token": "123:palsu"}).json()
+        self.assertTrue(data["full"])
+
+    def test_change_log_rolls_back_with_mutation(self):
+        before = ChangeLog.objects.count()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                LapanganPadel.objects.create(place_id="gagal", nama="Gagal", alamat="Jl.")
+                raise RuntimeError
+        self.assertEqual(ChangeLog.objects.count(), before)
+
+
+class BatchApiTests(TestCase):
+    """Tes /api/batch/ (beberapa GET internal dalam satu request)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="12345")
+        self.client.login(username="alice", password="12345")
+        self.url = reverse("api_batch")
+        self.addCleanup(view_counter.discard)
+        self.lapangan = LapanganPadel.objects.create(place_id="b1", nama="Batch Court", alamat="Jl. B")
+        for i in range(3):
+            reviewer = User.objects.create_user(username=f"r{i}", password="12345")
+            Review.objects.create(user=reviewer, lapangan=self.lapangan, rating=4.0, comment=f"ok {i}")
+
+    def _batch(self, paths):
+        return self.client.post(self.url, {"requests": paths}, content_type="application/json")
+
+    def test_combines_responses_in_order(self):
+        data = self._batch([
+            reverse("accounts:profile_json"),
+            reverse("review:api_venue_reviews", args=[self.lapangan.pk]) + "?limit=2",
+            reverse("review:api_venue_stats", args=[999]),
+            "/tidak-ada/",
+        ]).json()
+        profile, reviews, missing_venue, missing_path = data["responses"]
+        self.assertEqual(profile["status"], 200)
+        self.assertEqual(profile["body"]["username"], "alice")
+        # Query string diteruskan ke view tujuan
+        self.assertEqual(len(reviews["body"]["results"]), 2)
+        self.assertEqual(missing_venue["status"], 404)
+        self.assertEqual(missing_path["status"], 404)
+
+    def test_rejects_too_many_and_external_paths(self):
+        response = self._batch(["/accounts/profile/json/"] * 21)
+        self.assertEqual(response.status_code, 400)
+
+        data = self._batch(["https://example.com/", self.url, 42]).json()
+        self.assertEqual([item["status"] for item in data["responses"]], [400, 400, 400])
+
+    def test_requires_login_and_post(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.client.logout()
+        self.assertEqual(self._batch(["/accounts/profile/json/"]).status_code, 302)
@@ -0,0 +1,322 @@
+import copy
+import json
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.core.handlers.exception import response_for_exception
+from django.db.models import Max, Min, Q
+from django.http import JsonResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.csrf import csrf_exempt
+
+from booking.models import Booking
+from booking.views import serialize_booking
+from home.models import LapanganPadel
+from home.views import _lapangan_to_json
+from matchmaking.models import Match
+from matchmaking.serializers import MatchSerializer
+from review.models import Review
+from review.views import serialize_review
+from .models import ChangeLog
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+# id ChangeLog dialokasikan saat INSERT, bukan saat COMMIT: transaksi yang
+# commit belakangan bisa punya id lebih kecil dari entri yang sudah dikirim.
+# id yang belum terlihat di bawah kursor ("gap") disimpan di sync token dan
+# dicek ulang di request berikutnya sampai muncul, atau sampai GAP_TIMEOUT
+# (batas lama transaksi; gap yang tersisa berarti transaksi di-rollback).
+# Lebih dari MAX_GAPS gap: kursor dimundurkan, gap tidak pernah dibuang.
+GAP_TIMEOUT = timedelta(minutes=10)
+MAX_GAPS = 200
+# Rentang id yang diperiksa per request (membatasi pencarian gap)
+MAX_SCAN = 5000
+
+TOKEN_SALT = 'sync.token'
+
+
+# ===== Loader per model: ambil baris terkini sesuai hak akses user =====
+
+def _load_lapangan(request, pks=None):
+    qs = LapanganPadel.objects.all()
+    if pks is not None:
+        qs = qs.filter(pk__in=pks)
+    return {str(obj.pk): _lapangan_to_json(obj) for obj in qs}
+
+
+def _load_bookings(request, pks=None):
+    qs = Booking.objects.filter(user=request.user).select_related('venue')
+    if pks is not None:
+        qs = qs.filter(pk__in=pks)
+    now = timezone.now()
+    return {str(obj.pk): serialize_booking(obj, now) for obj in qs}
+
+
+def _load_reviews(request, pks=None):
+    qs = Review.objects.filter(user=request.user).select_related('lapangan', 'user__profile')
+    if pks is not None:
+        qs = qs.filter(pk__in=pks)
+    return {str(obj.pk): serialize_review(request, obj) for obj in qs}
+
+
+def _load_matches(request, pks=None):
+    qs = Match.objects.with_player_info(request.user)
+    if pks is not None:
+        qs = qs.filter(pk__in=pks)
+    data = MatchSerializer(qs, many=True, context={'request': request}).data
+    return {str(row['id']): row for row in data}
+
+
+LOADERS = {
+    'lapangan': _load_lapangan,
+    'booking': _load_bookings,
+    'review': _load_reviews,
+    'match': _load_matches,
+}
+
+
+# ===== Sync token =====
+
+def make_token(cursor, gaps=()):
+    """gaps: list (id, waktu pertama terlihat kosong) di bawah kursor."""
+    return signing.dumps({'c': cursor, 'g': [list(gap) for gap in gaps]}, salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    """Return (kursor, gaps) dari token, atau None jika token kosong/tidak valid."""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+        return int(data['c']), [(int(pk), int(seen)) for pk, seen in data['g']]
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        pass
+    try:
+        # Format lama: kursor saja
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token)), []
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def _find_gaps(low, high, now):
+    """Gap (id, waktu) di rentang (low, high] yang belum melewati GAP_TIMEOUT.
+
+    Waktu gap diambil dari created_at entri terdekat di atasnya: transaksi
+    pemilik id itu sudah berjalan sebelum entri tersebut ditulis. Dengan begitu
+    umur gap tetap sama walau rentangnya dipindai ulang setelah kursor mundur.
+    """
+    created = dict(ChangeLog.objects.filter(id__gt=low, id__lte=high).values_list('id', 'created_at'))
+    gaps = []
+    seen = now
+    for pk in range(high, low, -1):
+        if pk in created:
+            seen = int(created[pk].timestamp())
+        elif now - seen < GAP_TIMEOUT.total_seconds():
+            gaps.append((pk, seen))
+    gaps.reverse()
+    return gaps
+
+
+def _cap_gaps(cursor, gaps):
+    """Jika gap lebih dari MAX_GAPS, mundurkan kursor ke bawah gap yang tidak muat.
+
+    Entri di atas kursor baru akan dikirim ulang (upsert/tombstone aman
+    diterima dua kali); gap yang dibuang begitu saja tidak akan pernah terkirim.
+    """
+    gaps = sorted(gaps)
+    if len(gaps) > MAX_GAPS:
+        cursor = gaps[MAX_GAPS][0] - 1
+        gaps = gaps[:MAX_GAPS]
+    return cursor, gaps
+
+
+def _is_expired(cursor):
+    """True jika entri setelah kursor sudah dihapus oleh prune_sync_changelog."""
+    oldest = ChangeLog.objects.aggregate(oldest=Min('id'))['oldest']
+    return oldest is not None and oldest > cursor + 1
+
+
+def _full_sync(request):
+    # Ambil kursor dulu sebelum membaca data, supaya perubahan yang terjadi
+    # selama snapshot dibaca tetap terkirim di sync berikutnya.
+    bounds = ChangeLog.objects.aggregate(first=Min('id'), last=Max('id'))
+    cursor = bounds['last'] or 0
+    # Transaksi yang belum commit saat ini punya id di ujung atas urutan;
+    # id di bawah entri tertua sudah dihapus prune_sync_changelog, bukan gap
+    low = max((bounds['first'] or 1) - 1, cursor - MAX_SCAN)
+    cursor, gaps = _cap_gaps(cursor, _find_gaps(low, cursor, int(time.time())))
+    changes = {
+        key: {'upserted': list(loader(request).values()), 'deleted': []}
+        for key, loader in LOADERS.items()
+    }
+    return JsonResponse({
+        'success': True,
+        'full': True,
+        'sync_token': make_token(cursor, gaps),
+        'has_more': False,
+        'changes': changes,
+    })
+
+
+@login_required
+def changes_since(request):
+    """
+    Delta sync untuk aplikasi Flutter.
+
+    GET ?token=<sync_token>&limit=500
+    Tanpa token (atau token tidak valid/kedaluwarsa) -> snapshot penuh
+    dengan "full": true. Selain itu hanya baris yang berubah sejak token,
+    plus "deleted" (tombstone) untuk baris yang dihapus. Panggil lagi
+    dengan sync_token yang baru selama has_more bernilai true.
+    """
+    token = read_token(request.GET.get('token'))
+    if token is None or _is_expired(token[0]):
+        return _full_sync(request)
+    cursor, gaps = token
+
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    now = int(time.time())
+    gaps = [(pk, seen) for pk, seen in gaps if now - seen < GAP_TIMEOUT.total_seconds()]
+    gap_ids = [pk for pk, _ in gaps]
+    last = ChangeLog.objects.aggregate(last=Max('id'))['last'] or 0
+    upper = max(cursor, min(cursor + MAX_SCAN, last))
+    # Dibaca sebelum entri: id yang commit setelah titik ini tetap dianggap gap
+    # dan dicek ulang (paling buruk terkirim dua kali, tidak pernah terlewat)
+    new_gaps = _find_gaps(cursor, upper, now)
+    visible_gaps = set(ChangeLog.objects.filter(id__in=gap_ids).values_list('id', flat=True))
+
+    entries = list(
+        ChangeLog.objects
+        .filter(Q(id__gt=cursor, id__lte=upper) | Q(id__in=gap_ids))
+        .filter(Q(owner_id__isnull=True) | Q(owner_id=request.user.id))
+        .order_by('id')
+        .values('id', 'model', 'object_pk', 'action')[:limit + 1]
+    )
+    if len(entries) > limit:
+        entries = entries[:limit]
+        served_upto = entries[-1]['id']
+        has_more = True
+    else:
+        # Semua entri milik user sampai upper sudah terkirim; entri user lain dilompati
+        served_upto = upper
+        has_more = last > upper
+
+    new_cursor = max(cursor, served_upto)
+    gaps = [(pk, seen) for pk, seen in gaps if not (pk in visible_gaps and pk <= served_upto)]
+    gaps += [(pk, seen) for pk, seen in new_gaps if pk <= new_cursor]
+    cursor, gaps = _cap_gaps(new_cursor, gaps)
+
+    # Beberapa perubahan pada baris yang sama cukup dikirim sekali (aksi terakhir)
+    latest = {}
+    for entry in entries:
+        latest[(entry['model'], entry['object_pk'])] = entry['action']
+
+    changes = {key: {'upserted': [], 'deleted': []} for key in LOADERS}
+    for key, loader in LOADERS.items():
+        pks = [pk for (model, pk), action in latest.items() if model == key and action == ChangeLog.UPSERT]
+        deleted = [pk for (model, pk), action in latest.items() if model == key and action == ChangeLog.DELETE]
+        rows = loader(request, pks) if pks else {}
+        changes[key]['upserted'] = list(rows.values())
+        # Baris yang sudah tidak ada (atau bukan milik user lagi) dikirim sebagai tombstone
+        changes[key]['deleted'] = deleted + [pk for pk in pks if pk not in rows]
+
+    return JsonResponse({
+        'success': True,
+        'full': False,
+        'sync_token': make_token(cursor, gaps),
+        'has_more': has_more,
+        'changes': changes,
+    })
+
+
+# ===== Batch: beberapa GET internal dalam satu request =====
+
+MAX_BATCH_REQUESTS = 20
+
+
+def _sub_request(request, path, query):
+    """Salinan request asli (session/user ikut) sebagai GET ke path lain."""
+    sub = copy.copy(request)
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {**request.META, 'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query}
+    sub.GET = QueryDict(query)
+    # Body batch tidak boleh terbaca oleh view tujuan
+    sub._body = b''
+    sub._post, sub._files = QueryDict(), MultiValueDict()
+    return sub
+
+
+def _dispatch(request, raw_path):
+    if not isinstance(raw_path, str):
+        return {'path': raw_path, 'status': 400, 'body': {'message': 'Path harus string.'}}
+    parts = urlsplit(raw_path)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+        return {'path': raw_path, 'status': 400, 'body': {'message': 'Hanya path internal yang diizinkan.'}}
+
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return {'path': raw_path, 'status': 404, 'body': {'message': 'Not found.'}}
+    if match.func is batch or iscoroutinefunction(match.func):
+        return {'path': raw_path, 'status': 400, 'body': {'message': 'Endpoint ini tidak bisa di-batch.'}}
+
+    sub = _sub_request(request, parts.path, parts.query)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response = response.render()
+    except Exception as exc:
+        response = response_for_exception(sub, exc)
+
+    item = {'path': raw_path, 'status': response.status_code}
+    if response.streaming:
+        item['status'] = 400
+        item['body'] = {'message': 'Response streaming tidak didukung.'}
+    elif response.has_header('Location'):
+        item['location'] = response['Location']
+    elif response.get('Content-Type', '').startswith('application/json'):
+        item['body'] = json.loads(response.content)
+    else:
+        item['body'] = response.content.decode(response.charset, errors='replace')
+    return item
+
+
+@csrf_exempt
+@login_required
+def batch(request):
+    """
+    Jalankan beberapa GET internal sekaligus untuk aplikasi Flutter.
+
+    POST {"requests": ["/home/api/lapangan/", "/booking/api/my-bookings-json/"]}
+    Setiap path di-resolve dan view-nya dipanggil langsung dalam proses ini
+    dengan session/user yang sama (middleware tidak dijalankan ulang).
+    Hasilnya berurutan sesuai input, masing-masing dengan status sendiri.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Gunakan metode POST.'}, status=405)
+    try:
+        paths = json.loads(request.body).get('requests')
+    except (ValueError, AttributeError):
+        paths = None
+    if not isinstance(paths, list):
+        return JsonResponse({'success': False, 'message': 'Body harus berisi "requests": [path, ...].'}, status=400)
+    if len(paths) > MAX_BATCH_REQUESTS:
+        return JsonResponse(
+            {'success': False, 'message': f'Maksimal {MAX_BATCH_REQUESTS} request per batch.'}, status=400
+        )
+
+    return JsonResponse({'success': True, 'responses': [_dispatch(request, path) for path in paths]})